@@ -19,6 +19,24 @@ def set_global_property(key, value):
     _data[key] = value
 
 
+def is_verbose(depth=None):
+    """
+    Check if the debug output of a given depth (by default 'REQUIRED_VERBOSITY_DEPTH') is enabled by the
+    'CURRENT_VERBOSITY_LEVEL'.
+    """
+    if depth is None:
+        depth = _data['REQUIRED_VERBOSITY_DEPTH']
+    return int(_data['CURRENT_VERBOSITY_LEVEL']) >= int(depth)
+
+
+def debug_print(message, *args):
+    """
+    Print a debug message, formatted with 'args' only when the verbosity level enables the debug output.
+    """
+    if is_verbose():
+        print(message.format(*args) if args else message)
+
+
 def module_test():
     print('Module accessed.')
 
@@ -8,20 +8,21 @@ import datetime
 # Bokeh Imports
 from bokeh import __version__ as bokeh_version
 from bokeh.layouts import row, column, layout
-from bokeh.models import ColumnDataSource, Select, Range1d, TableColumn, DataTable
-from bokeh.plotting import curdoc, figure
-from bokeh.models import Button, HoverTool, DatetimeTickFormatter
-from bokeh.models.tools import WheelZoomTool, PanTool, CrosshairTool, BoxZoomTool, ResetTool, SaveTool, BoxSelectTool
-from bokeh.models.widgets.tables import DateFormatter
+from bokeh.models import Select, DataTable
+from bokeh.plotting import curdoc
+from bokeh.models import Button
 from bokeh.models.callbacks import CustomJS
 from bokeh import events
 
 # Local Imports
 from coreglobals import get_global_property
 from coreglobals import set_global_property
+from coreglobals import debug_print
 import tools.utils as utils
 import tools.indicators as indicators
-import tools.wrappers as wrappers
+import tools.formatters as formatters
+import tools.charts as charts
+import tools.live as live
 from tools.timezones import ZonesList as tzl
 from tools.container import MyUpdater
 
@@ -39,8 +40,12 @@ foo.BAR.my_public_method()
 # Setup initial global propery.
 set_global_property('APP_NAME', 'app-plotter')
 
+# Debug output is disabled unless the verbosity level (for example PLOTTER_VERBOSITY=1) enables it.
+set_global_property('CURRENT_VERBOSITY_LEVEL', int(os.environ.get('PLOTTER_VERBOSITY', 0)))
+
 REL_DATA_PATH = 'data'
 RAW_CSV_FILE = 'data_{}.csv'
+RAW_STORE_DIR = 'store/{}'
 OS_SEPARATOR = '/'
 PROJECT_ROOT_SEARCH_DEPTH = 0
 EPOCH = datetime.datetime.utcfromtimestamp(0)
@@ -48,6 +53,54 @@ EPOCH = datetime.datetime.utcfromtimestamp(0)
 # Bokeh canvas width.
 PLOT_WIDTH = 900
 
+# Set to '5m' to aggregate every higher timeframe from the 5m data file in memory, instead of
+# importing a separate file per timeframe. The bundled data snapshots cover different periods
+# per timeframe, hence the per-file import is kept as the default.
+BASE_TIMEFRAME = None
+
+# Read the series from the memory-mapped column stores (one per timeframe, created from the *.csv files with
+# 'python convert_data.py'), instead of importing the *.csv files.
+USE_COLUMN_STORE = False
+
+# Fetch the candles from a market data service instead of the data files, for example
+# 'http://127.0.0.1:8001/ohlcv/{}' (the timeframe is filled in) served by 'python stub_server.py', or from a SQLite
+# database, for example 'sqlite:///srv/ohlcv.db?timeframe={}' (see 'python convert_data.py --sqlite'). See
+# ``tools.backends``.
+DATA_SOURCE_URL = os.environ.get('PLOTTER_DATA_URL')
+
+# Number of most recent candles loaded per series, 'None' loads the full history. With the column stores, only
+# the pages of these rows are read.
+HISTORY = None
+
+# Number of most recent candles displayed at start (and on reset). Only the candles of the visible range and a
+# prefetch margin are sent, older candles follow as the chart is panned, so the payload depends on the screen size
+# rather than the length of the history. 'None' sends the full history.
+WINDOW_BARS = 300
+
+# Send the chart data as numeric (binary encoded) columns only: candle direction instead of colours, a single bar
+# width and no duplicated bound columns.
+COMPACT_PAYLOAD = True
+
+# Keep the data containers in compact types (float32 series within a relative deviation of 1e-6 from float64,
+# categorical pair, uint8 candle direction and no duplicated bounds), which halves their memory.
+COMPACT_DTYPES = False
+
+# Build missing data containers on the loader threads, so a slow load does not block the other sessions. The
+# update is applied on the next tick of the document, and only the latest selection is loaded.
+BACKGROUND_LOADING = True
+
+# Directory of a shared store (see ``utils.SharedStore``), set by 'serve.py --num-procs': the data containers are
+# then built once by the loader process and attached from shared memory by every server process.
+SHARED_STORE_DIR = os.environ.get('PLOTTER_SHARED_STORE')
+
+# Follow the lines appended to the displayed *.csv file (see ``tools.live``): new candles are pushed to the open
+# sessions, and the unclosed last candle is displayed and patched in place. Not available with a base timeframe or
+# the column stores, and requires BACKGROUND_LOADING (the updates are applied on the next tick of the document).
+LIVE_UPDATES = True
+
+# Fit the y-ranges on the server (range update events) instead of the browser (CustomJS callbacks).
+SERVER_AUTOSCALE = False
+
 # Indicator Configuration
 MACD_FAST_LENGTH = 13
 MACD_SLOW_LENGTH = 30
@@ -66,210 +119,22 @@ timezone_lookup = {k: v for k, v in zip(timezone_labels, timezone_signatures)}
 current_file_path_list = os.path.join(os.path.dirname(__file__)).split(OS_SEPARATOR)
 project_root_path_list = current_file_path_list[:len(current_file_path_list) - PROJECT_ROOT_SEARCH_DEPTH]
 project_root_path = (OS_SEPARATOR).join(project_root_path_list)
-full_csv_data_file_path = '{}/{}/{}'.format(project_root_path, REL_DATA_PATH, RAW_CSV_FILE)
-
-# Data Container
-source = ColumnDataSource(dict(
-    index=[],
-    time=[],
-    open=[],
-    high=[],
-    low=[],
-    close=[],
-    candle_wick_color=[],
-    candle_body_fill_color=[],
-    candle_body_line_color=[],
-    candle_bound_min=[],
-    candle_bound_max=[],
-    ma_slow=[],
-    ma_fast=[],
-    macd=[],
-    macds=[],
-    macdh=[],
-    macd_bound_min=[],
-    macd_bound_max=[],
-    volume=[],
-    volume_bound_min=[],
-    volume_bound_max=[],
-    signature=[],
-    bar_width=[]
-))
-
-# ;----------;
-# ; PLOT (1) ;
-# ;----------;
-# {{{1
-tooltips_top = [
-    ('open', '@open{0.2f}'),
-    ('high', '@high{0.2f}'),
-    ('low', '@low{0.2f}'),
-    ('close', '@close{0.2f}'),
-    ('ma-slow', '@ma_slow{0.2f}'),
-    ('ma-fast', '@ma_fast{0.2f}'),
-    ('time', '@time{%F %T}')
-]
-
-box_zoom = BoxZoomTool()
-pan_tool = PanTool(dimensions='width')
-wheel_zoom = WheelZoomTool()
-reset_tool = ResetTool()
-crosshair = CrosshairTool()
-save = SaveTool()
-hover_tool = HoverTool(
-    tooltips=tooltips_top,
-    formatters={'@time': 'datetime'}
-)
-box_selection = BoxSelectTool()
-
-tools_top = [
-    box_zoom,
-    pan_tool,
-    wheel_zoom,
-    reset_tool,
-    crosshair,
-    save,
-    hover_tool,
-    box_selection
-]
-
-p1 = figure(plot_width=PLOT_WIDTH,
-            plot_height=340,
-            tools=tools_top,
-            x_axis_type='datetime',
-            sizing_mode='stretch_width',
-            tooltips=tooltips_top,
-            active_drag=pan_tool,
-            active_scroll=wheel_zoom,
-            active_inspect=None,
-            y_axis_location="right")
-
-# Price Line
-# p1.line(x='time', y='close', alpha=0.5, line_width=1, color='navy', source=source)
-
-# MA Slow
-p1.line(x='time', y='ma_slow', color='#6cbf40', source=source)
-
-# MA Fast
-p1.line(x='time', y='ma_fast', color='#5740bf', source=source)
-
-# Plot Candlesticks (bokeh-candlestick)
-# Wicks (High/Low)
-p1.segment(x0='time', y0='high', x1='time', y1='low', source=source, color='candle_wick_color')
-
-# Open and close
-p1.vbar(x='time', width='bar_width', top='open', bottom='close', source=source,
-        fill_color='candle_body_fill_color', line_color='candle_body_line_color', line_width=0.1)
-
-p1.xaxis.formatter = DatetimeTickFormatter(
-    days=["%m/%d %H:%M"],
-    months=["%m/%d %H:%M"],
-    hours=["%m/%d %H:%M"],
-    minutes=["%m/%d %H:%M"]
-)
+raw_data_file = RAW_STORE_DIR if USE_COLUMN_STORE else RAW_CSV_FILE
+full_csv_data_file_path = '{}/{}/{}'.format(project_root_path, REL_DATA_PATH, raw_data_file)
 
-p1.y_range = Range1d(0, 1)
-p1.x_range = Range1d(0, 1)
-# }}}1
-
-# ;----------;
-# ; PLOT (2) ;
-# ;----------;
-# {{{1
-tooltips_bottom = [
-    ('histogram', '@macdh{0.2f}'),
-    ('signal', '@macds{0.2f}'),
-    ('macd', '@macd{0.2f}'),
-    ('time', '@time{%F}')
-]
-
-hover_tool_bottom = HoverTool(
-    tooltips=tooltips_bottom,
-    formatters={'@time': 'datetime'}
-)
+# Data Containers
+(source, summary_source, timezone_source) = charts.get_chart_sources(compact=COMPACT_PAYLOAD)
 
-tools_bottom = [
-    hover_tool_bottom,
-]
-
-p2 = figure(plot_width=PLOT_WIDTH,
-            plot_height=140,
-            tools=tools_bottom,
-            x_range=p1.x_range,
-            x_axis_type='datetime',
-            sizing_mode='stretch_width',
-            y_axis_location='right')
-
-# MACD Line (blue)
-p2.line(x='time', y='macd', color='#33C9FF', source=source)
-
-# MACD Signal (orange): macds
-p2.line(x='time', y='macds', color='#FF5733', source=source)
-
-# MACD Histogram: macdh
-p2.vbar(x='time', bottom=0, top='macdh', width='bar_width', fill_color='#000000', alpha=1, source=source)
-
-p2.xaxis.formatter = DatetimeTickFormatter(
-    days=["%m/%d/%Y %H:%M"],
-    months=["%m/%d/%Y %H:%M"],
-    hours=["%m/%d/%Y %H:%M"],
-    minutes=["%m/%d/%Y %H:%M"]
-)
-
-p2.y_range = Range1d(0, 1)
-# }}}1
-
-# ;----------;
-# ; PLOT (3) ;
-# ;----------;
-# {{{1
-tooltips_mid = [
-    ('volume', '@volume{0.2f}'),
-    ('time', '@time{%F}')
-]
-
-hover_tool_mid = HoverTool(
-    tooltips=tooltips_mid,
-    formatters={'@time': 'datetime'}
-)
-
-tools_mid = [
-    hover_tool_mid,
-]
-
-p3 = figure(plot_width=PLOT_WIDTH,
-            plot_height=140,
-            tools=tools_mid,
-            x_range=p1.x_range,
-            x_axis_type='datetime',
-            sizing_mode='stretch_width',
-            y_axis_location='right')
-
-# Volume Bars
-p3.vbar(x='time', bottom=0, top='volume', width='bar_width', fill_color='#000000', alpha=1, source=source)
-
-p3.xaxis.formatter = DatetimeTickFormatter(
-    days=["%m/%d/%Y %H:%M"],
-    months=["%m/%d/%Y %H:%M"],
-    hours=["%m/%d/%Y %H:%M"],
-    minutes=["%m/%d/%Y %H:%M"]
-)
-
-p3.y_range = Range1d(0, 1000)
-# }}}1
+# ;-------;
+# ; PLOTS ;
+# ;-------;
+# Candlesticks (p1), MACD (p2) and volume (p3), see ``tools.charts``.
+(p1, p2, p3) = charts.get_chart_plots(source, timezone_source, compact=COMPACT_PAYLOAD, plot_width=PLOT_WIDTH)
 
 # ;------------;
 # ; Data Table ;
 # ;------------;
-# {{{1
-columns = [TableColumn(field="time",
-                       title="Time",
-                       formatter=DateFormatter(format="%m/%d/%Y %H:%M")),
-           TableColumn(field="open", title="Open"),
-           TableColumn(field="high", title="High"),
-           TableColumn(field="low", title="Low"),
-           TableColumn(field="close", title="Close"),
-           TableColumn(field="volume", title="Volume")]
-# }}}1
+columns = charts.get_table_columns()
 
 # Intro
 print('\nGeneric Python CLI Application | {} | v{}\n'.format(
@@ -305,14 +170,11 @@ button_debug = Button(label="Debug")
 
 button_debug.js_on_click(js_debug_cb)
 
-SMA, EMA = 'SMA (13/30)', 'EMA (13/30)'
-
-mavg = Select(title='Moving Average', value=SMA, options=[SMA, EMA])
+mavg = Select(title='Moving Average', value=charts.MAVG_OPTIONS[0], options=charts.MAVG_OPTIONS)
 timezone = Select(title='Time Zone', value='(UTC+01:00) London', options=timezone_labels)
-pair = Select(title='Currency Pair', value='EUR', options=['EUR', 'USD'])
-asset = Select(title='Asset', value='BTC',
-               options=['BTC', 'ETH', 'ZEC', 'LTC', 'XMR', 'DASH', 'EOS', 'ETC', 'XLM', 'XRP'])
-timeframe = Select(title='Timeframe', value='5m', options=['5m', '15m', '1h', '4h', '1D'])
+pair = Select(title='Currency Pair', value='EUR', options=charts.PAIR_OPTIONS)
+asset = Select(title='Asset', value='BTC', options=charts.ASSET_OPTIONS)
+timeframe = Select(title='Timeframe', value='5m', options=charts.TIMEFRAME_OPTIONS)
 
 column_mavg = column(mavg, width=130)
 column_timezone = column(timezone, width=450)
@@ -343,32 +205,25 @@ def exec_reset():
     Function that returns a Python callback to reset the plots.
     """
     def python_callback(event):
-        print('__RESET__')
+        debug_print('__RESET__')
         update(task='test:main:reset', timeframe='5m', axis_reset=True, active=False)
     return python_callback
 # }}}1
 
 
-callback_range_top = wrappers.callback_on_interaction_range_fit(
-    p1.y_range, source, name='top', target='candle')
+# The y-ranges of all the plots are fitted by a single callback, using the block summaries of the source. With
+# the server side autoscale, the y-ranges are fitted by the server once the interaction has finished.
+charts.link_range_fit(source, summary_source, (p1, p2, p3), compact=COMPACT_PAYLOAD,
+                      x_range_events=not SERVER_AUTOSCALE)
 
-callback_range_bottom = wrappers.callback_on_interaction_range_fit(
-    p2.y_range, source, name='bottom', target='macd')
+# Server side level of detail: merge bars once the visible range holds more bars than pixel columns.
+p1.on_event(events.RangesUpdate, lambda event: update.update_level_of_detail(event.x0, event.x1))
 
-callback_range_middle = wrappers.callback_on_interaction_range_fit(
-    p3.y_range, source, name='middle', target='volume')
+if SERVER_AUTOSCALE:
+    p1.on_event(events.RangesUpdate, lambda event: update.autoscale(event.x0, event.x1))
 
-callback_data_update = wrappers.callback_on_source_change_range_fit2(
-    args=dict(candlestick_yr=p1.y_range, candlestick_xr=p1.x_range,
-              volume_yr=p3.y_range, volume_xr=p3.x_range,
-              macd_yr=p2.y_range, macd_xr=p2.x_range))
-
-# Attach callbacks.
-p1.x_range.js_on_change('start', callback_range_top)
-p2.x_range.js_on_change('start', callback_range_bottom)
-p3.x_range.js_on_change('start', callback_range_middle)
-
-source.js_on_change('data', callback_data_update)
+# The time labels are redrawn once the offsets of a new timezone arrive.
+timezone_source.js_on_change('data', formatters.callback_on_zone_change(p1.x_range, tables=[full_table]))
 
 p1.on_event(events.Reset, exec_reset())
 
@@ -391,21 +246,7 @@ macd_config = dict(
 )
 
 # Serialize the plot objects so we can match plots to limits.
-# This is the way of passing plot objetcs to the Updater instance by reference.
-serialized_plots = {
-    'candlestick': {
-        'plot': p1,
-        'limits': ['lower', 'upper']
-    },
-    'volume': {
-        'plot': p3,
-        'limits': ['lower', 'upper']
-    },
-    'macd': {
-        'plot': p2,
-        'limits': ['lower', 'upper']
-    }
-}
+serialized_plots = charts.get_serialized_plots((p1, p2, p3))
 
 # Serialize the widget objects.
 # This is the way of passing widgets to the Updater instance by reference.
@@ -426,57 +267,43 @@ update = MyUpdater(
     plots=serialized_plots,
     widgets=serialized_widgets,
     configs=serialized_configs,
-    file=full_csv_data_file_path,
-    source=source)
-
-
-def switch_ma(ref, config, data):
-    # {{{1
-    '''
-    This is a container callback to switch between different type of moving averages.
-    The internal task is a passive task, meaning no extra data import stages are needed.
-    '''
-    print('[DEBUG] Callback:Wrangler -> {}'.format(ref.value))
-
-    x = data['close'].values
-
-    if ref.value.split()[0] == 'SMA':
-        # Calculate the Simple Moving Average slots.
-        ma_slow = indicators.MA.sma(x, config['slow_period'])
-        ma_fast = indicators.MA.sma(x, config['fast_period'])
-    elif ref.value.split()[0] == 'EMA':
-        # Calculate the Exponential Moving Average slots.
-        ma_slow = indicators.MA.ema(x, config['slow_period'])
-        ma_fast = indicators.MA.ema(x, config['fast_period'])
-    else:
-        raise Exception('MA configuration error!')
-
-    # Update the MA components within the data-frame.
-    data['ma_slow'] = ma_slow
-    data['ma_fast'] = ma_fast
-# }}}1
-
-
-# WARNING: To fix the sync issue between the mavg and pair on pair change, we have to
-# pass the 'switch_ma' callback here.
+    file=DATA_SOURCE_URL or full_csv_data_file_path,
+    source=source,
+    summary_source=summary_source,
+    timezone_source=timezone_source,
+    base_timeframe=BASE_TIMEFRAME,
+    history=HISTORY,
+    compact_dtypes=COMPACT_DTYPES,
+    level_of_detail=PLOT_WIDTH,
+    window=WINDOW_BARS,
+    compact=COMPACT_PAYLOAD,
+    document=curdoc() if BACKGROUND_LOADING else None,
+    store=utils.get_shared_store(SHARED_STORE_DIR) if SHARED_STORE_DIR else None,
+    live=live.get_live_feed() if LIVE_UPDATES and BACKGROUND_LOADING else None)
+
+if update.live is not None:
+    curdoc().on_session_destroyed(lambda session_context: update.live.unsubscribe(update))
+
+
+# The moving average type is part of the (shared) data container selected by the updater, so the MA stays in
+# sync with the pair, asset and timeframe selections.
 pair.on_change(
-    'value', lambda attr, old, new: update(task='test:select:pair', cb=switch_ma, axis_reset=False, active=True))
+    'value', lambda attr, old, new: update(task='test:select:pair', axis_reset=False, active=True))
 
 asset.on_change(
-    'value', lambda attr, old, new: update(task='test:select:asset', cb=switch_ma, axis_reset=False, active=True))
+    'value', lambda attr, old, new: update(task='test:select:asset', axis_reset=False, active=True))
 
 mavg.on_change(
-    'value', lambda attr, old, new: update(task='test:select:mavg', cb=switch_ma, axis_reset=False, active=False))
+    'value', lambda attr, old, new: update(task='test:select:mavg', axis_reset=False, active=False))
 
-timezone.on_change(
-    'value', lambda attr, old, new: update(
-        task='test:select:timezone', axis_reset=False, active=False))
+# The data is unchanged by a timezone switch, only the offsets are sent.
+timezone.on_change('value', lambda attr, old, new: update.update_timezone())
 
 timeframe.on_change(
     'value', lambda attr, old, new: update(
-        task='test:select:timeframe', cb=switch_ma, axis_reset=True, active=True))
+        task='test:select:timeframe', axis_reset=True, active=True))
 
-button_reload.on_click(partial(update, task='test:reload', cb=switch_ma, axis_reset=True, active=True))
+button_reload.on_click(partial(update, task='test:reload', axis_reset=True, active=True))
 
 # Providing a timeframe different to the one supplied at instance time will force
 # an 'active=True' state.
@@ -0,0 +1,24 @@
+# ;------------------------------------------------------------------------------------------
+# ; Initialisation File for the "Backends" Module
+# ;------------------------------------------------------------------------------------------
+
+"""
+__init__ file for 'app/tools/backends'
+
+This file should provide the necessary import short-cuts for the module.
+For example, a ``tools.backends.csvbackend.Foo()`` class can be imported as ``tools.backends.Foo()`` by
+the main application once defined inside this module header file.
+"""
+
+from .core import NOT_LOADED, Backend, register_backend, get_backend
+from .csvbackend import CSVBackend
+from .httpbackend import HTTPBackend, ConnectionPool, RateLimiter
+from .sqlitebackend import SQLiteBackend, SQLiteStore
+
+__version__ = 'dev-v0.0.1'
+__name__ = 'tools.backends'
+__author__ = 'Muhittin Bilginer'
+__email__ = 'muhittin.bilginer@gmail.com'
+__url__ = ''
+
+# vim: ts=4 ft=python nowrap fdm=marker
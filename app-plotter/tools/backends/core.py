@@ -0,0 +1,115 @@
+# Global Imports
+import abc
+import threading
+from urllib.parse import urlsplit
+
+# Local Imports
+from os import sys
+from os import path
+
+scope = path.dirname(path.dirname(path.dirname(path.abspath(__file__))))
+sys.path.append(scope)
+
+from coreglobals import get_global_property
+from coreglobals import set_global_property
+
+# from, import * guard.
+__all__ = ['NOT_LOADED', 'Backend', 'register_backend', 'get_backend']
+
+# A data source is a string naming the candles of a timeframe for every pair, as formatted from the 'file' pattern
+# of ``MyUpdater`` (for example 'data/data_1h.csv' or 'http://127.0.0.1:8001/ohlcv/1h'). Its scheme selects the
+# backend reading it, a source without a scheme being a local path:
+#   ''          local *.csv files and column stores (``CSVBackend``)
+#   'http(s)'   a market data service (``HTTPBackend``)
+#   'sqlite'    a SQLite database (``SQLiteBackend``)
+#
+# Usage:
+#   backend = backends.get_backend(source)
+#   raw_df = backend.get_raw_data(source, 'BTC/EUR', tail=1000)
+
+# Backend factories, keyed by scheme: factory(source) -> Backend. A backend instance is shared by the sources of
+# the same scheme and location (for example a host), for the life time of the process.
+BACKEND_SCHEMES = {}
+
+# Version of the candles of a pair not fetched yet (see ``Backend.get_version()``).
+NOT_LOADED = (0,)
+
+__backends = {}
+__backends_lock = threading.Lock()
+
+
+def my_public_method():
+    # Test if we have access to the global properties.
+    NAMESPACE = get_global_property('APP_NAME') + "." + __name__
+    print('{}: Module accessed.'.format(NAMESPACE))
+
+
+class Backend(abc.ABC):
+    """
+    Interface of the market data backends. The methods are called from the sessions and the loader threads, so
+    the implementations are thread safe.
+    """
+
+    def resolve(self, source):
+        """
+        Return the canonical name of a source (for example the absolute path of a file).
+        """
+        return source
+
+    @abc.abstractmethod
+    def get_version(self, source, field=None):
+        """
+        Return the version of the candles of a pair (a tuple), which changes with them. It is part of the cache
+        keys of the data containers, so it is expected to be cheap and must not wait for the candles: a pair not
+        fetched yet is ``NOT_LOADED``, and is fetched by ``refresh()`` or ``get_raw_data()`` (which may wait).
+        """
+
+    @abc.abstractmethod
+    def get_raw_data(self, source, field, start=None, end=None, tail=None):
+        """
+        Return the candles of a pair as a raw dataFrame (see ``wrappers.get_raw_data()``), sorted by time.
+
+        :param source (``str``): The data source.
+        :param field (``str``): Pair, for example 'BTC/EUR'.
+        :param start (``int``): First epoch second (optional).
+        :param end (``int``): Last epoch second (optional).
+        :param tail (``int``): Maximum number of rows, the most recent ones are kept (optional).
+        """
+
+    def refresh(self, source, fields):
+        """
+        Bring the candles of several pairs up to date. Nothing to do for a backend which is always up to date.
+        """
+        pass
+
+
+def get_scheme(source):
+    return urlsplit(source).scheme if '://' in source else ''
+
+
+def register_backend(scheme, factory):
+    """
+    Declare the backend of a scheme, for example ``register_backend('http', HTTPBackend)``.
+
+    :param scheme (``str``): Scheme of the sources, '' for the local paths.
+    :param factory (``callable``): ``factory(source)`` returning a ``Backend`` instance.
+    """
+    BACKEND_SCHEMES[scheme] = factory
+
+
+def get_backend(source):
+    """
+    Return the (process wide) backend of a source.
+    """
+    scheme = get_scheme(source)
+    location = urlsplit(source).netloc if scheme else ''
+
+    with __backends_lock:
+        backend = __backends.get((scheme, location))
+        if backend is None:
+            if scheme not in BACKEND_SCHEMES:
+                raise ValueError('No backend for the source {}.'.format(source))
+            backend = __backends[(scheme, location)] = BACKEND_SCHEMES[scheme](source)
+        return backend
+
+# vim: ts=4 ft=python nowrap fdm=marker
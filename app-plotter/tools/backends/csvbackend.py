@@ -0,0 +1,56 @@
+# Global Imports
+# (No global imports yet.)
+
+# Local Imports
+from os import sys
+from os import path
+
+scope = path.dirname(path.dirname(path.dirname(path.abspath(__file__))))
+sys.path.append(scope)
+
+from coreglobals import get_global_property
+from coreglobals import set_global_property
+import tools.utils as utils
+from tools.backends.core import Backend, register_backend
+
+# from, import * guard.
+__all__ = ['CSVBackend']
+
+
+def my_public_method():
+    # Test if we have access to the global properties.
+    NAMESPACE = get_global_property('APP_NAME') + "." + __name__
+    print('{}: Module accessed.'.format(NAMESPACE))
+
+
+class CSVBackend(Backend):
+    """
+    Local data files: a *.csv file per timeframe (see ``utils.IO``) or its column store (see
+    ``utils.ColumnStore``). The version of the candles is the version of the file.
+    """
+
+    def resolve(self, source):
+        return path.abspath(source)
+
+    def get_version(self, source, field=None):
+        return utils.IO.get_file_signature(source)
+
+    def get_raw_data(self, source, field, start=None, end=None, tail=None):
+        # Query a field such as 'BTC/EUR'. The imported data is partitioned by pair, so only the rows
+        # of the requested pair are copied and the index already starts from zero.
+        if utils.ColumnStore.is_store(source):
+            # Only the pages of the selected rows are read from the memory-mapped columns.
+            return utils.ColumnStore.import_pair_data(source, field, start=start, end=end, tail=tail)
+
+        pair_df = utils.IO.import_pair_data(source, field)
+
+        if start is not None or end is not None or tail is not None:
+            (lo, hi) = utils.ColumnStore.get_row_range(pair_df['timestamp'].values, start=start, end=end, tail=tail)
+            pair_df = pair_df.iloc[lo:hi].reset_index(drop=True)
+
+        return pair_df
+
+
+register_backend('', lambda source: CSVBackend())
+
+# vim: ts=4 ft=python nowrap fdm=marker
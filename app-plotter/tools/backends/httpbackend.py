@@ -0,0 +1,377 @@
+# Global Imports
+import asyncio
+import itertools
+import json
+import threading
+import time
+from functools import partial
+from urllib.parse import urlsplit, urlencode
+import numpy as np
+import pandas as pd
+
+# Local Imports
+from os import sys
+from os import path
+
+scope = path.dirname(path.dirname(path.dirname(path.abspath(__file__))))
+sys.path.append(scope)
+
+from coreglobals import get_global_property
+from coreglobals import set_global_property
+from coreglobals import debug_print
+import tools.utils as utils
+from tools.backends.core import NOT_LOADED, Backend, register_backend
+
+# from, import * guard.
+__all__ = ['HTTPBackend', 'ConnectionPool', 'RateLimiter']
+
+# The service answers 'GET <source>?pair=<pair>[&since=<epoch second>]' with the candles of the pair from 'since'
+# (included, so the unclosed candle is sent again) as a JSON object of columns:
+#   {"timestamp": [...], "open": [...], "high": [...], "low": [...], "close": [...], "volume": [...]}
+# See 'stub_server.py' for a local server.
+
+# Maximum number of (keep-alive) connections per host. Every pair of a refresh gets its own connection, so all of
+# them are fetched within a single round trip.
+POOL_SIZE = 32
+
+# Requests per second (sustained), and the number of requests which may be sent at once.
+RATE_LIMIT = 50.0
+RATE_BURST = 32
+
+# Seconds between the refreshes of the candles (in the background).
+MAX_AGE = 60.0
+
+# Seconds to wait for a response.
+REQUEST_TIMEOUT = 10.0
+
+# Columns of the candles, and their types.
+CANDLE_COLUMNS = {
+    'timestamp': np.int64,
+    'open': float,
+    'high': float,
+    'low': float,
+    'close': float,
+    'volume': float,
+}
+
+
+def my_public_method():
+    # Test if we have access to the global properties.
+    NAMESPACE = get_global_property('APP_NAME') + "." + __name__
+    print('{}: Module accessed.'.format(NAMESPACE))
+
+
+class RateLimiter(object):
+    """
+    Token bucket of the requests: 'burst' requests may be sent at once, then 'rate' requests per second.
+    Only used from the event loop of the backend.
+
+    :param rate (``float``): Requests per second.
+    :param burst (``int``): Size of the bucket.
+    """
+
+    def __init__(self, rate=RATE_LIMIT, burst=RATE_BURST):
+        self.rate = rate
+        self.burst = burst
+
+        self.__tokens = float(burst)
+        self.__updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate)
+            self.__updated = now
+
+            if self.__tokens >= 1:
+                self.__tokens -= 1
+                return
+
+            await asyncio.sleep((1 - self.__tokens) / self.rate)
+
+
+class ConnectionPool(object):
+    """
+    Keep-alive HTTP/1.1 connections to a host, at most 'size' of them at once. Only used from the event loop of
+    the backend.
+
+    :param host (``str``): Host name.
+    :param port (``int``): Port.
+    :param size (``int``): Maximum number of connections.
+    :param ssl (``bool``): Use TLS connections.
+    """
+
+    def __init__(self, host, port, size=POOL_SIZE, ssl=False):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.ssl = ssl
+
+        # Number of connections opened so far, and of requests sent.
+        self.opened = 0
+        self.requests = 0
+
+        self.__idle = []
+        self.__slots = None
+
+    async def request(self, target, timeout=REQUEST_TIMEOUT):
+        """
+        Send a GET request, and return the ``(status, body)`` of the response.
+
+        :param target (``str``): Path and query of the request.
+        """
+        if self.__slots is None:
+            self.__slots = asyncio.Semaphore(self.size)
+
+        message = 'GET {} HTTP/1.1\r\nHost: {}:{}\r\nConnection: keep-alive\r\nAccept: application/json\r\n\r\n' \
+            .format(target, self.host, self.port).encode('latin-1')
+
+        async with self.__slots:
+            while True:
+                reused = bool(self.__idle)
+                (reader, writer) = self.__idle.pop() if reused else await self.__connect()
+
+                try:
+                    writer.write(message)
+                    await writer.drain()
+                    (status, headers, body) = await asyncio.wait_for(self.__read_response(reader), timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    if reused:
+                        # The server closed the idle connection, the request is sent again on another one.
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+
+                self.requests += 1
+
+                if headers.get('connection', '').lower() == 'close':
+                    writer.close()
+                else:
+                    self.__idle.append((reader, writer))
+
+                return (status, body)
+
+    def close(self):
+        for (reader, writer) in self.__idle:
+            writer.close()
+        self.__idle = []
+
+    async def __connect(self):
+        self.opened += 1
+        return await asyncio.open_connection(self.host, self.port, ssl=self.ssl or None)
+
+    async def __read_response(self, reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError('Connection closed by {}.'.format(self.host))
+
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            (name, value) = line.decode('latin-1').split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                chunk = await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            body = b''.join(chunks)
+        else:
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+        return (status, headers, body)
+
+
+class HTTPBackend(Backend):
+    """
+    Candles served over HTTP, fetched by an asyncio client running on its own thread.
+
+    The candles of every pair are kept in memory, and a refresh only requests the candles from the last one held
+    (which may have been updated since, as long as it is not closed). The pairs of a refresh are fetched
+    concurrently, over a pool of keep-alive connections (see ``ConnectionPool``) within the limits of a
+    ``RateLimiter``.
+
+    Every 'max_age' seconds, all the pairs fetched so far are refreshed for every source in use (a timeframe
+    displayed by a session), so the candles of a pair are up to date when it is selected.
+
+    Usage:
+        backend = backends.get_backend('http://127.0.0.1:8001/ohlcv/1h')
+        backend.refresh('http://127.0.0.1:8001/ohlcv/1h', ['BTC/EUR', 'BTC/USD', 'ETH/EUR'])
+
+    :param source (``str``): A source of the host, for example 'http://127.0.0.1:8001/ohlcv/1h'.
+    :param pool_size (``int``): Maximum number of connections, see ``POOL_SIZE``.
+    :param rate (``float``): Requests per second, see ``RATE_LIMIT``.
+    :param burst (``int``): Requests sent at once, see ``RATE_BURST``.
+    :param max_age (``float``): Seconds between the refreshes, see ``MAX_AGE``.
+    """
+
+    def __init__(self, source, pool_size=POOL_SIZE, rate=RATE_LIMIT, burst=RATE_BURST, max_age=MAX_AGE):
+        url = urlsplit(source)
+
+        self.max_age = max_age
+        self.pool = ConnectionPool(url.hostname, url.port or (443 if url.scheme == 'https' else 80), size=pool_size,
+                                   ssl=url.scheme == 'https')
+        self.limiter = RateLimiter(rate=rate, burst=burst)
+
+        # Candles of every (source, pair), with their version and the time of their last refresh. The entries are
+        # replaced (never modified) by the event loop, so they can be read from any thread.
+        self.__series = {}
+        self.__versions = itertools.count(1)
+
+        # Running fetches, so concurrent requests for the same pair share a single download.
+        self.__fetches = {}
+
+        # Sources in use and pairs fetched so far, refreshed periodically. Only used from the event loop.
+        self.__sources = set()
+        self.__fields = set()
+
+        self.__loop = asyncio.new_event_loop()
+        self.__thread = threading.Thread(target=self.__loop.run_forever, name='backend-http', daemon=True)
+        self.__thread.start()
+
+        self.__refresher = asyncio.run_coroutine_threadsafe(self.__refresh_periodically(), self.__loop)
+
+    def get_version(self, source, field=None):
+        series = self.__series.get((source, field))
+
+        if series is None:
+            # The first fetch is left to the loader threads, see ``get_raw_data()``.
+            return NOT_LOADED
+
+        if time.monotonic() - series['updated'] > self.max_age:
+            # Missed by the periodic refresh (for example a failed request), refreshed in the background. The new
+            # version is picked up by the next update.
+            future = asyncio.run_coroutine_threadsafe(self.__fetch(source, field), self.__loop)
+            future.add_done_callback(partial(self.__on_refreshed, source, field))
+
+        return (series['version'],)
+
+    def get_raw_data(self, source, field, start=None, end=None, tail=None):
+        series = self.__get_series(source, field)
+        (lo, hi) = utils.ColumnStore.get_row_range(series['timestamp'], start=start, end=end, tail=tail)
+
+        pair_df = pd.DataFrame({name: series[name][lo:hi] for name in CANDLE_COLUMNS})
+        pair_df['pair'] = field
+        pair_df['date'] = pd.to_datetime(pair_df['timestamp'], unit='s')
+
+        return pair_df
+
+    def refresh(self, source, fields):
+        """
+        Fetch the new candles of several pairs concurrently, and return the versions of their candles.
+        """
+        return asyncio.run_coroutine_threadsafe(self.__fetch_many(source, fields), self.__loop).result()
+
+    def close(self):
+        self.__refresher.cancel()
+        asyncio.run_coroutine_threadsafe(self.__close(), self.__loop).result()
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+
+    def __on_refreshed(self, source, field, future):
+        if not future.cancelled() and future.exception() is not None:
+            print('[ERROR] Unable to refresh {} ({}): {}'.format(field, source, future.exception()))
+
+    def __get_series(self, source, field):
+        series = self.__series.get((source, field))
+
+        if series is None:
+            # The first access waits for the candles (on a loader thread).
+            self.refresh(source, [field])
+            series = self.__series[(source, field)]
+
+        return series
+
+    async def __close(self):
+        self.pool.close()
+
+    async def __fetch_many(self, source, fields):
+        return await asyncio.gather(*(self.__fetch(source, field) for field in fields))
+
+    async def __refresh_periodically(self):
+        while True:
+            await asyncio.sleep(self.max_age)
+
+            fields = sorted(self.__fields)
+            sources = sorted(self.__sources)
+
+            # The sources of every timeframe are refreshed concurrently, a failed pair is retried on the next round.
+            results = await asyncio.gather(*(self.__fetch(source, field) for source in sources for field in fields),
+                                           return_exceptions=True)
+
+            failures = [result for result in results if isinstance(result, Exception)]
+            if failures:
+                print('[ERROR] Unable to refresh {} of {} pair(s): {}'.format(
+                    len(failures), len(results), failures[0]))
+
+            debug_print('BACKEND\t: {} pair(s) of {} source(s) refreshed', len(results) - len(failures),
+                        len(sources))
+
+    async def __fetch(self, source, field):
+        key = (source, field)
+
+        self.__sources.add(source)
+        self.__fields.add(field)
+
+        task = self.__fetches.get(key)
+        if task is None:
+            task = self.__fetches[key] = asyncio.ensure_future(self.__download(source, field))
+            task.add_done_callback(lambda t: self.__fetches.pop(key, None))
+
+        return await task
+
+    async def __download(self, source, field):
+        key = (source, field)
+        series = self.__series.get(key)
+
+        query = dict(pair=field)
+        if series is not None and len(series['timestamp']):
+            query['since'] = int(series['timestamp'][-1])
+
+        url = urlsplit(source)
+        target = '{}?{}'.format(url.path or '/', '&'.join(filter(None, (url.query, urlencode(query)))))
+
+        await self.limiter.acquire()
+        (status, body) = await self.pool.request(target)
+
+        if status != 200:
+            raise IOError('HTTP {} for {} ({}).'.format(status, field, source))
+
+        columns = json.loads(body)
+        candles = {name: np.asarray(columns[name], dtype=dtype) for name, dtype in CANDLE_COLUMNS.items()}
+
+        debug_print('BACKEND\t: {} candle(s) of {} from {}', len(candles['timestamp']), field, source)
+
+        if series is not None:
+            # The candles from 'since' replace the ones held.
+            keep = np.searchsorted(series['timestamp'], candles['timestamp'][0]) if len(candles['timestamp']) \
+                else len(series['timestamp'])
+            changed = any(not np.array_equal(series[name][keep:], candles[name]) for name in CANDLE_COLUMNS)
+
+            if not changed:
+                series = dict(series, updated=time.monotonic())
+            else:
+                series = dict({name: np.concatenate((series[name][:keep], candles[name])) for name in CANDLE_COLUMNS},
+                              version=next(self.__versions), updated=time.monotonic())
+        else:
+            series = dict(candles, version=next(self.__versions), updated=time.monotonic())
+
+        self.__series[key] = series
+
+        return (series['version'],)
+
+
+register_backend('http', HTTPBackend)
+register_backend('https', HTTPBackend)
+
+# vim: ts=4 ft=python nowrap fdm=marker
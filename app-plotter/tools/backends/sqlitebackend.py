@@ -0,0 +1,262 @@
+# Global Imports
+import sqlite3
+import threading
+from urllib.request import pathname2url
+import numpy as np
+import pandas as pd
+
+# Local Imports
+from os import sys
+from os import path
+
+scope = path.dirname(path.dirname(path.dirname(path.abspath(__file__))))
+sys.path.append(scope)
+
+from coreglobals import get_global_property
+from coreglobals import set_global_property
+from coreglobals import debug_print
+from tools.backends.core import Backend, register_backend
+
+# from, import * guard.
+__all__ = ['SQLiteStore', 'SQLiteBackend']
+
+# The candles of every pair and timeframe are held by a single table, clustered on its primary key (a WITHOUT ROWID
+# table is stored as the B-tree of its key), so the candles of a pair and timeframe are contiguous and sorted by
+# time: a range query is a single seek followed by a sequential read of the selected rows only.
+#
+# A source of the backend names the database file and the timeframe, for example
+# 'sqlite://data/ohlcv.db?timeframe=1h' (a relative path) or 'sqlite:///srv/data/ohlcv.db?timeframe=1h'.
+#
+# Usage:
+#   store = SQLiteStore('data/ohlcv.db')
+#   store.upsert('1h', raw_df)
+#   store = SQLiteStore('data/ohlcv.db', readonly=True)
+#   candles = store.query('BTC/EUR', '1h', start=int(time.time()) - 90 * 86400)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    pair TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    open REAL NOT NULL,
+    high REAL NOT NULL,
+    low REAL NOT NULL,
+    close REAL NOT NULL,
+    volume REAL NOT NULL,
+    PRIMARY KEY (pair, timeframe, timestamp)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS versions (
+    pair TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (pair, timeframe)
+) WITHOUT ROWID;
+"""
+
+# Columns of the candles, and their types.
+CANDLE_DTYPE = np.dtype([
+    ('timestamp', np.int64),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+    ('volume', np.float64),
+])
+
+UPSERT_CANDLES = """
+INSERT INTO candles (pair, timeframe, timestamp, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (pair, timeframe, timestamp) DO UPDATE SET
+    open = excluded.open, high = excluded.high, low = excluded.low, close = excluded.close, volume = excluded.volume
+"""
+
+UPSERT_VERSION = """
+INSERT INTO versions (pair, timeframe, version) VALUES (?, ?, 1)
+ON CONFLICT (pair, timeframe) DO UPDATE SET version = version + 1
+"""
+
+# Number of rows per 'executemany()' of a bulk upsert.
+UPSERT_BATCH = 100000
+
+
+def my_public_method():
+    # Test if we have access to the global properties.
+    NAMESPACE = get_global_property('APP_NAME') + "." + __name__
+    print('{}: Module accessed.'.format(NAMESPACE))
+
+
+class SQLiteStore(object):
+    """
+    Candles of every pair and timeframe in a SQLite database file.
+
+    Every thread gets its own connection. The database is in WAL mode, so the readers are not blocked by a bulk
+    upsert (they see the previous version until it is committed).
+
+    :param db_file (``str``): Path of the database file.
+    :param readonly (``bool``): Open an existing database for reading only, instead of creating it (and its
+                                tables) if needed.
+    """
+
+    def __init__(self, db_file, readonly=False):
+        self.db_file = db_file
+        self.readonly = readonly
+        self.__local = threading.local()
+
+        if readonly:
+            # A mistyped path is reported, instead of being read as an empty database.
+            if not path.isfile(db_file):
+                raise FileNotFoundError('No SQLite database {} (see convert_data.py --sqlite).'.format(db_file))
+            return
+
+        with self.connection() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(SCHEMA)
+
+    def connection(self):
+        """
+        Return the connection of the calling thread.
+        """
+        connection = getattr(self.__local, 'connection', None)
+
+        if connection is None:
+            if self.readonly:
+                connection = sqlite3.connect('file:{}?mode=ro'.format(pathname2url(path.abspath(self.db_file))),
+                                             uri=True)
+            else:
+                connection = sqlite3.connect(self.db_file)
+                connection.execute('PRAGMA synchronous=NORMAL')
+            self.__local.connection = connection
+
+        return connection
+
+    def upsert(self, timeframe, candles):
+        """
+        Insert the candles of a timeframe, replacing the candles of the same pair and time, in a single
+        transaction.
+
+        :param timeframe (``str``): Timeframe, for example '1h'.
+        :param candles (``dict``): Columns (for example a raw dataFrame): 'pair', 'timestamp' and the prices.
+        :return (``int``): Number of candles written.
+        """
+        pairs = np.asarray(candles['pair'])
+        columns = [np.asarray(candles[name], dtype=CANDLE_DTYPE[name]).tolist() for name in CANDLE_DTYPE.names]
+        count = len(pairs)
+
+        with self.connection() as connection:
+            for start in range(0, count, UPSERT_BATCH):
+                stop = min(start + UPSERT_BATCH, count)
+                connection.executemany(UPSERT_CANDLES, zip(
+                    pairs[start:stop].tolist(), [timeframe] * (stop - start),
+                    *(column[start:stop] for column in columns)))
+
+            connection.executemany(UPSERT_VERSION, [(pair, timeframe) for pair in pd.unique(pairs).tolist()])
+
+        debug_print('SQLITE\t: {} candle(s) of {} written to {}', count, timeframe, self.db_file)
+
+        return count
+
+    def query(self, pair, timeframe, start=None, end=None, tail=None):
+        """
+        Return the candles of a pair within ``[start, end]``, keeping the last 'tail' candles at most, as a
+        structured array of ``CANDLE_DTYPE`` (sorted by time). The rows are read straight into the array.
+
+        :param pair (``str``): Pair, for example 'BTC/EUR'.
+        :param timeframe (``str``): Timeframe, for example '1h'.
+        :param start (``int``): First epoch second (optional).
+        :param end (``int``): Last epoch second (optional).
+        :param tail (``int``): Maximum number of rows, the most recent ones are kept (optional).
+        """
+        sql = 'SELECT timestamp, open, high, low, close, volume FROM candles WHERE pair = ? AND timeframe = ?'
+        params = [pair, timeframe]
+
+        if start is not None:
+            sql += ' AND timestamp >= ?'
+            params.append(int(start))
+
+        if end is not None:
+            sql += ' AND timestamp <= ?'
+            params.append(int(end))
+
+        if tail is not None:
+            # The most recent rows are read backwards from the end of the range.
+            sql += ' ORDER BY timestamp DESC LIMIT ?'
+            params.append(int(tail))
+        else:
+            sql += ' ORDER BY timestamp'
+
+        candles = np.fromiter(self.connection().execute(sql, params), dtype=CANDLE_DTYPE)
+
+        return candles[::-1] if tail is not None else candles
+
+    def get_version(self, pair, timeframe):
+        """
+        Return the version of the candles of a pair, incremented by every upsert of the pair (0 if unknown).
+        """
+        row = self.connection().execute('SELECT version FROM versions WHERE pair = ? AND timeframe = ?',
+                                        (pair, timeframe)).fetchone()
+        return 0 if row is None else row[0]
+
+    def get_pairs(self, timeframe):
+        """
+        Return the pairs of a timeframe.
+        """
+        return [row[0] for row in self.connection().execute(
+            'SELECT pair FROM versions WHERE timeframe = ? ORDER BY pair', (timeframe,))]
+
+
+class SQLiteBackend(Backend):
+    """
+    Candles read from SQLite databases (see ``SQLiteStore``), for the sources
+    'sqlite://<database file>?timeframe=<timeframe>'. The databases are opened for reading only, they are written
+    by 'convert_data.py --sqlite'.
+    """
+
+    def __init__(self):
+        self.__stores = {}
+        self.__lock = threading.Lock()
+
+    def resolve(self, source):
+        (db_file, timeframe) = self.parse_source(source)
+        return 'sqlite://{}?timeframe={}'.format(path.abspath(db_file), timeframe)
+
+    def get_version(self, source, field=None):
+        (db_file, timeframe) = self.parse_source(source)
+        return (self.get_store(db_file).get_version(field, timeframe),)
+
+    def get_raw_data(self, source, field, start=None, end=None, tail=None):
+        (db_file, timeframe) = self.parse_source(source)
+        candles = self.get_store(db_file).query(field, timeframe, start=start, end=end, tail=tail)
+
+        pair_df = pd.DataFrame({name: candles[name] for name in CANDLE_DTYPE.names})
+        pair_df['pair'] = field
+        pair_df['date'] = pd.to_datetime(pair_df['timestamp'], unit='s')
+
+        return pair_df
+
+    def get_store(self, db_file):
+        """
+        Return the (read-only) store of a database file, shared by its sources.
+        """
+        with self.__lock:
+            store = self.__stores.get(db_file)
+            if store is None:
+                store = self.__stores[db_file] = SQLiteStore(db_file, readonly=True)
+            return store
+
+    @staticmethod
+    def parse_source(source):
+        """
+        Return the ``(database file, timeframe)`` of a source.
+        """
+        (db_file, _, query) = source[len('sqlite://'):].partition('?')
+        options = dict(option.partition('=')[::2] for option in query.split('&') if option)
+
+        if 'timeframe' not in options:
+            raise ValueError('No timeframe in the source {}.'.format(source))
+
+        return (db_file, options['timeframe'])
+
+
+register_backend('sqlite', lambda source: SQLiteBackend())
+
+# vim: ts=4 ft=python nowrap fdm=marker
@@ -0,0 +1,344 @@
+# Global Imports
+from bokeh.layouts import column
+from bokeh.models import ColumnDataSource, Range1d, TableColumn, HoverTool, LinearColorMapper
+from bokeh.models.tools import WheelZoomTool, PanTool, CrosshairTool, BoxZoomTool, ResetTool, SaveTool, BoxSelectTool
+from bokeh.plotting import figure
+from bokeh.transform import transform
+
+# Local Imports
+from os import sys
+from os import path
+
+# A crude solution, but should be fixed eventually.
+# 'scope' is '<PROJECT_ROOT>'
+#       for example: /home/me/dev/my-project
+# WARNING: This hack is required to import the local modules from within the current module depth.
+scope = path.dirname(path.dirname(path.dirname(path.abspath(__file__))))
+sys.path.append(scope)
+
+from coreglobals import get_global_property
+from coreglobals import set_global_property
+import tools.formatters as formatters
+import tools.wrappers as wrappers
+from tools.container import INCREASING_COLOR, DECREASING_COLOR
+
+# from, import * guard.
+__all__ = ['get_chart_sources', 'get_chart_plots', 'get_table_columns', 'link_range_fit', 'get_serialized_plots',
+           'get_chart_layout']
+
+# Options of the selection widgets, also used for the static exports (see export.py).
+ASSET_OPTIONS = ['BTC', 'ETH', 'ZEC', 'LTC', 'XMR', 'DASH', 'EOS', 'ETC', 'XLM', 'XRP']
+PAIR_OPTIONS = ['EUR', 'USD']
+TIMEFRAME_OPTIONS = ['5m', '15m', '1h', '4h', '1D']
+MAVG_OPTIONS = ['SMA (13/30)', 'EMA (13/30)']
+
+# Bokeh canvas width.
+CHART_WIDTH = 900
+
+
+def my_public_method():
+    # Test if we have access to the global properties.
+    NAMESPACE = get_global_property('APP_NAME') + "." + __name__
+    print('{}: Module accessed.'.format(NAMESPACE))
+
+# @public function get_chart_sources(compact) {{{1
+
+
+def get_chart_sources(compact=True):
+    """
+    Create the (empty) sources of the charts: the data container, its block summaries and the timezone offsets.
+
+    :param compact (``bool``): Compact payload mode, see ``wrappers.COMPACT_SOURCE_COLUMNS``.
+    :return (``tuple``): ``(source, summary_source, timezone_source)``
+    """
+    source = ColumnDataSource({name: [] for name in (
+        wrappers.COMPACT_SOURCE_COLUMNS if compact else wrappers.SOURCE_COLUMNS)})
+
+    # Block summaries (min/max) of the bound columns, used to fit the y-ranges on the client.
+    summary_source = ColumnDataSource(wrappers.get_block_summaries(
+        source.data, columns=wrappers.COMPACT_AUTOSCALE_COLUMNS if compact else wrappers.AUTOSCALE_COLUMNS))
+
+    # Offsets of the selected timezone. The time column is sent in UTC and converted by the formatters on the
+    # client, so a timezone switch only updates this (small) source.
+    timezone_source = ColumnDataSource(formatters.get_zone_offsets('Etc/UTC'), name=formatters.ZONE_SOURCE_NAME)
+
+    return (source, summary_source, timezone_source)
+# }}}1
+
+# @public function get_chart_plots(source, timezone_source, compact, plot_width) {{{1
+
+
+def get_chart_plots(source, timezone_source, compact=True, plot_width=CHART_WIDTH):
+    """
+    Create the plots of the charts, sharing the x-range of the first one:
+        - p1: Candlesticks and moving averages.
+        - p2: MACD.
+        - p3: Volume.
+
+    :param source (``ColumnDataSource object``): Data container, see ``get_chart_sources()``.
+    :param timezone_source (``ColumnDataSource object``): Offsets of the selected timezone.
+    :param compact (``bool``): Compact payload mode, the candle colours are then mapped on the client.
+    :param plot_width (``int``): Canvas width.
+    :return (``tuple``): ``(p1, p2, p3)``
+    """
+
+    # Candle colours and bar width, either mapped on the client or sent as columns.
+    if compact:
+        direction_mapper = LinearColorMapper(palette=[DECREASING_COLOR, INCREASING_COLOR], low=0, high=1)
+        candle_color = transform('direction', direction_mapper)
+        candle_wick_color = candle_body_fill_color = candle_body_line_color = candle_color
+        # The actual width is set by the updater.
+        bar_width = 1
+    else:
+        candle_wick_color = 'candle_wick_color'
+        candle_body_fill_color = 'candle_body_fill_color'
+        candle_body_line_color = 'candle_body_line_color'
+        bar_width = 'bar_width'
+
+    # ;----------;
+    # ; PLOT (1) ;
+    # ;----------;
+    # {{{2
+    tooltips_top = [
+        ('open', '@open{0.2f}'),
+        ('high', '@high{0.2f}'),
+        ('low', '@low{0.2f}'),
+        ('close', '@close{0.2f}'),
+        ('ma-slow', '@ma_slow{0.2f}'),
+        ('ma-fast', '@ma_fast{0.2f}'),
+        ('time', '@time{%F %T}')
+    ]
+
+    box_zoom = BoxZoomTool()
+    pan_tool = PanTool(dimensions='width')
+    wheel_zoom = WheelZoomTool()
+    reset_tool = ResetTool()
+    crosshair = CrosshairTool()
+    save = SaveTool()
+    hover_tool = HoverTool(
+        tooltips=tooltips_top,
+        formatters={'@time': formatters.get_hover_formatter(timezone_source)}
+    )
+    box_selection = BoxSelectTool()
+
+    tools_top = [
+        box_zoom,
+        pan_tool,
+        wheel_zoom,
+        reset_tool,
+        crosshair,
+        save,
+        hover_tool,
+        box_selection
+    ]
+
+    p1 = figure(plot_width=plot_width,
+                plot_height=340,
+                tools=tools_top,
+                x_axis_type='datetime',
+                sizing_mode='stretch_width',
+                tooltips=tooltips_top,
+                active_drag=pan_tool,
+                active_scroll=wheel_zoom,
+                active_inspect=None,
+                y_axis_location="right")
+
+    # Price Line
+    # p1.line(x='time', y='close', alpha=0.5, line_width=1, color='navy', source=source)
+
+    # MA Slow
+    p1.line(x='time', y='ma_slow', color='#6cbf40', source=source)
+
+    # MA Fast
+    p1.line(x='time', y='ma_fast', color='#5740bf', source=source)
+
+    # Plot Candlesticks (bokeh-candlestick)
+    # Wicks (High/Low)
+    p1.segment(x0='time', y0='high', x1='time', y1='low', source=source, color=candle_wick_color)
+
+    # Open and close
+    p1.vbar(x='time', width=bar_width, top='open', bottom='close', source=source,
+            fill_color=candle_body_fill_color, line_color=candle_body_line_color, line_width=0.1)
+
+    p1.xaxis.formatter = formatters.get_tick_formatter(timezone_source, "%m/%d %H:%M")
+
+    p1.y_range = Range1d(0, 1)
+    p1.x_range = Range1d(0, 1)
+    # }}}2
+
+    # ;----------;
+    # ; PLOT (2) ;
+    # ;----------;
+    # {{{2
+    tooltips_bottom = [
+        ('histogram', '@macdh{0.2f}'),
+        ('signal', '@macds{0.2f}'),
+        ('macd', '@macd{0.2f}'),
+        ('time', '@time{%F}')
+    ]
+
+    hover_tool_bottom = HoverTool(
+        tooltips=tooltips_bottom,
+        formatters={'@time': formatters.get_hover_formatter(timezone_source)}
+    )
+
+    tools_bottom = [
+        hover_tool_bottom,
+    ]
+
+    p2 = figure(plot_width=plot_width,
+                plot_height=140,
+                tools=tools_bottom,
+                x_range=p1.x_range,
+                x_axis_type='datetime',
+                sizing_mode='stretch_width',
+                y_axis_location='right')
+
+    # MACD Line (blue)
+    p2.line(x='time', y='macd', color='#33C9FF', source=source)
+
+    # MACD Signal (orange): macds
+    p2.line(x='time', y='macds', color='#FF5733', source=source)
+
+    # MACD Histogram: macdh
+    p2.vbar(x='time', bottom=0, top='macdh', width=bar_width, fill_color='#000000', alpha=1, source=source)
+
+    p2.xaxis.formatter = formatters.get_tick_formatter(timezone_source, "%m/%d/%Y %H:%M")
+
+    p2.y_range = Range1d(0, 1)
+    # }}}2
+
+    # ;----------;
+    # ; PLOT (3) ;
+    # ;----------;
+    # {{{2
+    tooltips_mid = [
+        ('volume', '@volume{0.2f}'),
+        ('time', '@time{%F}')
+    ]
+
+    hover_tool_mid = HoverTool(
+        tooltips=tooltips_mid,
+        formatters={'@time': formatters.get_hover_formatter(timezone_source)}
+    )
+
+    tools_mid = [
+        hover_tool_mid,
+    ]
+
+    p3 = figure(plot_width=plot_width,
+                plot_height=140,
+                tools=tools_mid,
+                x_range=p1.x_range,
+                x_axis_type='datetime',
+                sizing_mode='stretch_width',
+                y_axis_location='right')
+
+    # Volume Bars
+    p3.vbar(x='time', bottom=0, top='volume', width=bar_width, fill_color='#000000', alpha=1, source=source)
+
+    p3.xaxis.formatter = formatters.get_tick_formatter(timezone_source, "%m/%d/%Y %H:%M")
+
+    p3.y_range = Range1d(0, 1000)
+    # }}}2
+
+    return (p1, p2, p3)
+# }}}1
+
+# @public function get_table_columns() {{{1
+
+
+def get_table_columns():
+    """
+    Return the columns of the data table.
+    """
+    return [TableColumn(field="time",
+                        title="Time",
+                        formatter=formatters.get_table_formatter("%m/%d/%Y %H:%M")),
+            TableColumn(field="open", title="Open"),
+            TableColumn(field="high", title="High"),
+            TableColumn(field="low", title="Low"),
+            TableColumn(field="close", title="Close"),
+            TableColumn(field="volume", title="Volume")]
+# }}}1
+
+# @public function link_range_fit(source, summary_source, plots, compact, x_range_events) {{{1
+
+
+def link_range_fit(source, summary_source, plots, compact=True, x_range_events=True):
+    """
+    Attach the CustomJS callbacks fitting the y-ranges of the plots to the visible data (see
+    ``wrappers.callback_on_range_fit()``). These run in the browser, so they also apply to static documents.
+
+    :param source (``ColumnDataSource object``): Data container.
+    :param summary_source (``ColumnDataSource object``): Block summaries of the data container.
+    :param plots (``tuple``): ``(p1, p2, p3)``, see ``get_chart_plots()``.
+    :param compact (``bool``): Compact payload mode.
+    :param x_range_events (``bool``): Also fit the y-ranges on the x-range changes (interactions).
+    """
+    (p1, p2, p3) = plots
+
+    # The y-ranges of all the plots are fitted by a single callback, using the block summaries of the source.
+    callback_range_fit = wrappers.callback_on_range_fit(
+        source, summary_source, x_range=p1.x_range,
+        y_ranges=dict(candle=p1.y_range, volume=p3.y_range, macd=p2.y_range),
+        columns=wrappers.COMPACT_AUTOSCALE_COLUMNS if compact else wrappers.AUTOSCALE_COLUMNS)
+
+    callback_summary_change = wrappers.callback_on_summary_change(summary_source)
+
+    if x_range_events:
+        # The x-range is shared by all the plots.
+        p1.x_range.js_on_change('start', callback_range_fit)
+
+    source.js_on_change('data', callback_range_fit)
+    source.js_on_change('streaming', callback_range_fit)
+    source.js_on_change('patching', callback_range_fit)
+
+    summary_source.js_on_change('data', callback_summary_change)
+    summary_source.js_on_change('streaming', callback_summary_change)
+    summary_source.js_on_change('patching', callback_summary_change)
+# }}}1
+
+# @public function get_serialized_plots(plots) {{{1
+
+
+def get_serialized_plots(plots):
+    """
+    Serialize the plot objects so we can match plots to limits, this is the way of passing plot objects to the
+    Updater instance by reference.
+
+    :param plots (``tuple``): ``(p1, p2, p3)``, see ``get_chart_plots()``.
+    """
+    (p1, p2, p3) = plots
+
+    return {
+        'candlestick': {
+            'plot': p1,
+            'limits': ['lower', 'upper']
+        },
+        'volume': {
+            'plot': p3,
+            'limits': ['lower', 'upper']
+        },
+        'macd': {
+            'plot': p2,
+            'limits': ['lower', 'upper']
+        }
+    }
+# }}}1
+
+# @public function get_chart_layout(plots) {{{1
+
+
+def get_chart_layout(plots):
+    """
+    Return the three panel chart of the dashboard: candlesticks, volume and MACD.
+
+    :param plots (``tuple``): ``(p1, p2, p3)``, see ``get_chart_plots()``.
+    """
+    (p1, p2, p3) = plots
+
+    return column([p1, p3, p2], sizing_mode='stretch_width')
+# }}}1
+
+# vim: ts=4 ft=python nowrap fdm=marker
@@ -1,5 +1,7 @@
 # Global Imports
-from bokeh.models import ColumnDataSource
+from bokeh.models import ColumnDataSource, VBar
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from bokeh import events
 import types
 import datetime
@@ -23,8 +25,11 @@ sys.path.append(scope)
 import tools.wrappers as wrappers
 from coreglobals import get_global_property
 from coreglobals import set_global_property
+from coreglobals import debug_print
 import tools.utils as utils
 import tools.indicators as indicators
+import tools.formatters as formatters
+import tools.backends as backends
 from tools.timezones import ZonesList as tzl
 
 # from, import * guard.
@@ -42,6 +47,22 @@ EPOCH = datetime.datetime.utcfromtimestamp(0)
 INCREASING_COLOR = '#30A092'
 DECREASING_COLOR = '#DC5B55'
 
+# Number of threads building the data containers in the background, shared by all the sessions of the process.
+LOADER_THREADS = 4
+__loader_executor = None
+
+# Fields of a load job describing its data container, as published by a shared store (see ``utils.SharedStore``).
+STORE_SPEC_FIELDS = ('file', 'field', 'timeframe', 'base_timeframe', 'history', 'ma', 'macd', 'compact_dtypes')
+
+# Maximum time (seconds) to wait for the loader of a shared store, before building the container locally.
+STORE_TIMEOUT = 30.0
+
+# Windowed history (see the 'window' of ``MyUpdater``): the source holds the visible time range plus a prefetch
+# margin of WINDOW_MARGIN visible ranges on each side, moved once the visible range gets closer than
+# WINDOW_REFETCH visible ranges to an edge of the loaded rows.
+WINDOW_MARGIN = 1.0
+WINDOW_REFETCH = 0.5
+
 # @pubic function my_public_method() {{{1
 
 
@@ -55,35 +76,98 @@ def my_public_method():
     print('{}: Module accessed.'.format(NAMESPACE))
 # }}}1
 
+# @pubic function get_loader_executor() {{{1
+
+
+def get_loader_executor():
+    """
+    Return the process wide thread pool used to build the data containers in the background (created on first use).
+    """
+    global __loader_executor
+
+    if __loader_executor is None:
+        __loader_executor = ThreadPoolExecutor(max_workers=LOADER_THREADS, thread_name_prefix='loader')
+
+    return __loader_executor
+# }}}1
+
+# @pubic function build_data_container(job, is_current) {{{1
+
+
+def build_data_container(job, is_current=None):
+    """
+    Build the data container (data-frame, limits and range index) of a load job.
+
+    This runs on the loader threads and in the loader process of a shared store, hence only the job is used.
+    The build stops, returning 'None', as soon as 'is_current()' reports the job as superseded.
+
+    :param job (``dict``): The ``STORE_SPEC_FIELDS`` of the container, and an optional 'task' label.
+    :param is_current (``callable``): Returns 'False' once the job is superseded (optional).
+    """
+    task = job.get('task', 'loader')
+    resample = job['base_timeframe'] is not None and job['timeframe'] != job['base_timeframe']
+
+    # Number of (base) rows read, counted from the most recent one.
+    tail = job.get('history')
+    if tail is not None and resample:
+        tail *= wrappers.TIMEFRAME_MINUTES[job['timeframe']] // wrappers.TIMEFRAME_MINUTES[job['base_timeframe']]
+
+    with utils.metrics.span('load', task=task):
+        raw_df = wrappers.get_raw_data(source_file=job['file'], field=job['field'], tail=tail)
+
+    if resample:
+        if is_current is not None and not is_current():
+            return None
+
+        with utils.metrics.span('filter', task=task):
+            raw_df = wrappers.resample_raw_data(raw_df, job['timeframe'])
+
+    if is_current is not None and not is_current():
+        return None
+
+    # Get a fresh snapshot of the data and the limits.
+    with utils.metrics.span('indicators', task=task):
+        return wrappers.get_data_container(raw_df, MA=job['ma'], MACD=job['macd'], drop_last=True,
+                                           compact_dtypes=job.get('compact_dtypes', False))
+# }}}1
+
+# @pubic function get_data_version(job) {{{1
+
+
+def get_data_version(job):
+    """
+    Return the version of the source of a load job, see ``backends.Backend.get_version()``.
+
+    The candles of a pair not fetched yet are fetched first, so this may wait: it runs on the loader threads and
+    in the loader process of a shared store.
+    """
+    backend = backends.get_backend(job['file'])
+    version = backend.get_version(job['file'], job['field'])
+
+    if version == backends.NOT_LOADED:
+        backend.refresh(job['file'], [job['field']])
+        version = backend.get_version(job['file'], job['field'])
+
+    return list(version)
+# }}}1
+
 
 class MyUpdater(object):
-    # These are the core class attributes required to store the critial data at class level.
-    __data_df = []
-    __limits = []
-    __serialized_plots = []
-    __original_date_df = []
-    timedelta = 0
-    __states = {
-        'timezone': {
-            'signature': {
-                'previous': None,
-                'current': None
-            },
-            'zone': {
-                'previous': None,
-                'current': None
-            },
-        },
-        'timerange': {
-            'candlestick': {
-                'previous': {'start': None, 'end': None},
-                'current': {'start': None, 'end': None}
-            },
-        }
-    }
+    """
+    Per session updater of the plots and the sources.
+
+    The data containers (data-frame, limits and range index) are read-only and shared by every session of the
+    server process through ``utils.cache.SHARED_CACHE`` (or by every process of the host through a shared store,
+    see ``utils.SharedStore``). The view state (selections, timezone, time range, loaded window
+    and level of detail) is kept per instance.
+    """
 
     # Contructor
-    def __init__(self, plots={}, widgets={}, configs={}, file=None, source=None):
+    def __init__(self, plots={}, widgets={}, configs={}, file=None, source=None,
+                 cache_size=None, base_timeframe=None, stream_updates=True,
+                 rollover=None, level_of_detail=None, summary_source=None, timezone_source=None,
+                 compact=False, document=None, executor=None, store=None, history=None, compact_dtypes=False,
+                 window=None, live=None):
 
         self.plots = plots
         self.widgets = widgets
@@ -91,47 +175,234 @@ class MyUpdater(object):
         self.file = file
         self.source = source
 
-        # Populate class attributes at initialisation.
-        self.__populate_data_storage(self.file)
+        # Optional source receiving the block summaries used by the client side autoscale callback.
+        self.summary_source = summary_source
+
+        # Optional source receiving the offsets of the selected timezone. The time column is always sent in UTC
+        # and the offsets are applied by the formatters on the client (see ``tools.formatters``).
+        self.timezone_source = timezone_source
+        self.__zone_key = None
+
+        # Compact payload mode, see ``wrappers.COMPACT_SOURCE_COLUMNS``. The bar width is then set on the
+        # 'VBar' glyphs of the plots, instead of being sent as a column.
+        self.compact = compact
+        self.autoscale_columns = wrappers.COMPACT_AUTOSCALE_COLUMNS if compact else wrappers.AUTOSCALE_COLUMNS
+
+        # Keep the data containers in their compact types (float32 series, categorical pair and candle
+        # direction), see ``wrappers.compact_data_container()``.
+        self.compact_dtypes = compact_dtypes
+
+        # When a base timeframe (for example '5m') is provided, every other timeframe is aggregated in memory
+        # from the base series, instead of being imported from its own file.
+        self.base_timeframe = base_timeframe
+
+        # Number of most recent candles loaded per series ('None' loads the full history). With a column store
+        # (see ``utils.ColumnStore``) only these rows are read from the disk.
+        self.history = history
+
+        # Finished data containers, keyed by the selection, the configuration and the source file version.
+        # The cache exposes the 'hits' and 'misses' counters. Unless a (private) cache size is provided, the
+        # process wide cache is used.
+        self.cache = utils.cache.SHARED_CACHE if cache_size is None else utils.LRUCache(max_bytes=cache_size)
+        self.__cache_key = None
+
+        # Optional shared store (``utils.SharedStore``). The data containers are then built by the loader
+        # process of the store and attached from shared memory, instead of being built by every process.
+        self.store = store
+
+        # The displayed (shared, read-only) data container.
+        self.__data_df = None
+        self.__limits = None
+
+        # View state of the session.
+        self.__states = {
+            'timerange': {
+                'candlestick': {
+                    'previous': {'start': None, 'end': None},
+                    'current': {'start': None, 'end': None}
+                },
+            }
+        }
+
+        # When only the newest candles changed, the source is updated with 'stream' (appended rows, keeping at
+        # most 'rollover' rows) and 'patch' (the previous last row), instead of re-sending the full data.
+        self.stream_updates = stream_updates
+        self.rollover = rollover
+        self.__stream_key = None
+
+        # Maximum number of bars to display within the visible time range (about one bar per pixel column).
+        # Zooming out further merges the bars (level of detail), 'None' always sends the full resolution.
+        self.level_of_detail = level_of_detail
+        self.__lod_factor = 1
+
+        # Number of most recent bars displayed by an axis reset. When provided, the source only holds the rows of
+        # the visible time range and a prefetch margin (see ``WINDOW_MARGIN``), and older rows are sent as the
+        # visible range moves towards them. 'None' sends the full history.
+        self.window = window
+        self.__window = None
+
+        # The data-frame currently displayed by the source, and its range query structure (built on demand).
+        self.__view_df = None
+        self.__view_index = None
+
+        # Label of the task being run, attached to the timing spans (see ``utils.metrics``).
+        self.__task = 'init'
+
+        # When a document is provided, missing data containers are built on the loader threads ('executor', by
+        # default the pool of ``get_loader_executor()``) and the update is applied on the next tick of the
+        # document. Only the latest request is applied: a request arriving during a load supersedes any waiting
+        # one, and the running load is abandoned at its next stage.
+        self.document = document
+        self.executor = executor or (get_loader_executor() if document is not None else None)
+        self.__generation = 0
+        self.__request = None
+        self.__loading = False
+        self.__loaded = None
+
+        # Optional live feed (``live.LiveFeed``) following the lines appended to the displayed *.csv file. The new
+        # candles are streamed to the source, and the unclosed last candle is displayed and patched in place. The
+        # feed runs on its own thread, so its updates are applied on the next tick of the document (which holds
+        # the document lock).
+        if live is not None and document is None:
+            raise ValueError('The live updates require a document.')
+
+        self.live = live
+        self.__live_job = None
+        self.__live_version = None
+        self.__live_candle = None
+        self.__live_key = None
+
+        if self.live is not None:
+            self.live.subscribe(self)
+
+        # Populate the data container at initialisation (on the first update for background loading).
+        if self.document is None:
+            self.__populate_data_storage()
 
         # Plot references are stored at initialisation stage and are persistent per instance.
         self.__serialized_plots = self.plots
 
-        # Rest Time
-        self.__states['timezone']['signature']['current'] = '(Exchange) Exchange'
-        self.__original_date_df = self.__data_df[['date']]
+    # Private Method
+    def __get_file(self):
+        # Internally adapt the file name to support one of the timeframe: 5m, 15m, 1h, 4h, 1d
+        return self.file.format((self.base_timeframe or self.widgets['timeframe'].value).lower())
 
     # Private Method
-    def __get_raw_data(self, file):
+    def __get_ma_config(self):
+        # The type of moving average follows the selection (for example 'EMA (13/30)'), if any.
+        ma_config = dict(self.configs['ma'])
+        if 'mavg' in self.widgets:
+            ma_config['type'] = self.widgets['mavg'].value.split()[0]
+        return ma_config
 
-        local_df = wrappers.get_raw_data(
-            source_file=file,
-            field='{}/{}'.format(self.widgets['asset'].value, self.widgets['pair'].value)
-        )
-        return local_df
+    # Private Method
+    def __get_field(self):
+        return '{}/{}'.format(self.widgets['asset'].value, self.widgets['pair'].value)
 
     # Private Method
-    def __populate_data_storage(self, file):
-        # Internally adapt the file name to support one of the timeframe: 5m, 15m, 1h, 4h, 1d
-        file_signature = file.format(self.widgets['timeframe'].value.lower())
-        raw_df = self.__get_raw_data(file_signature)
+    def __get_cache_key(self, file):
+        return (file,
+                self.widgets['asset'].value,
+                self.widgets['pair'].value,
+                self.widgets['timeframe'].value,
+                tuple(sorted(self.__get_ma_config().items())),
+                tuple(sorted(self.configs['macd'].items())),
+                self.history,
+                self.compact_dtypes,
+                backends.get_backend(file).get_version(file, self.__get_field()))
 
-        # Get a fresh snapshot of the data and the limits.
-        # (DEBUG) print('{}\n{}\n{}'.format('+' * 80, self.configs['ma'], '+' * 80))
-        (self.__data_df,
-         self.__limits) = wrappers.get_data_container(raw_df, MA=self.configs['ma'],
-                                                      MACD=self.configs['macd'], drop_last=True)
+    # Private Method
+    def __get_load_job(self):
+        # Snapshot of the selection, so the container can be built without accessing the widgets.
+        file = self.__get_file()
+        key = self.__get_cache_key(file)
+        return dict(key=key,
+                    file=backends.get_backend(file).resolve(file),
+                    field=self.__get_field(),
+                    timeframe=self.widgets['timeframe'].value,
+                    base_timeframe=self.base_timeframe,
+                    history=self.history,
+                    compact_dtypes=self.compact_dtypes,
+                    ma=self.__get_ma_config(),
+                    macd=dict(self.configs['macd']),
+                    version=list(key[-1]),
+                    task=self.__task)
+
+    # Private Method
+    def __get_cached_container(self, job):
+        if self.__loaded is not None and self.__loaded[0] == job['key']:
+            return self.__loaded[1]
+
+        container = self.cache.get(job['key'])
+        if container is None and self.store is not None:
+            container = self.store.get({name: job[name] for name in STORE_SPEC_FIELDS}, job['version'])
+        return container
+
+    # Private Method
+    def __get_loaded_job(self, job):
+        # A pair not fetched yet is fetched first, and its container keyed by the version fetched (which is the
+        # version of the following updates).
+        if tuple(job['version']) != backends.NOT_LOADED:
+            return job
+
+        version = get_data_version(job)
+        return dict(job, key=job['key'][:-1] + (tuple(version),), version=version)
+
+    # Private Method
+    def __build_container(self, job, is_current=None):
+        """
+        Build the data container of a load job and store it in the cache.
+
+        This may run on a loader thread, hence only the job and the (thread safe) cache and store are used. With
+        a shared store, the container is requested from its loader process and only built locally (and cached)
+        if the loader does not publish it within ``STORE_TIMEOUT``.
+        """
+        job = self.__get_loaded_job(job)
+
+        if self.store is not None:
+            spec = {name: job[name] for name in STORE_SPEC_FIELDS}
+            container = self.store.wait(spec, job['version'], STORE_TIMEOUT, is_current=is_current)
+
+            if container is not None or (is_current is not None and not is_current()):
+                return container
+
+            print('[WARNING] No shared container for {} ({}), built locally.'.format(job['field'], job['timeframe']))
+
+        container = build_data_container(job, is_current=is_current)
+
+        if container is not None:
+            self.cache.put(job['key'], container)
+
+        return container
+
+    # Private Method
+    def __populate_data_storage(self):
+        job = self.__get_load_job()
+
+        container = self.__get_cached_container(job)
+        if container is None:
+            job = self.__get_loaded_job(job)
+            container = self.__get_cached_container(job)
+
+        if container is None:
+            container = self.__build_container(job)
+
+        debug_print('[DEBUG] {}', self.cache)
+
+        # WARNING: The container is shared with the other sessions and must not be modified.
+        self.__cache_key = job['key']
+        self.__data_df = container[0]
+        self.__limits = container[1]
+
+        # The live updates start again from the imported container.
+        self.__live_job = job
+        self.__live_version = None
+        self.__live_candle = None
+        self.__live_key = None
 
     # Private Method
     def __convert_timeframe(self):
-        lookup = {
-            '5m': 5,
-            '15m': 15,
-            '1h': 60,
-            '4h': 240,
-            '1D': 1440,
-        }
-        minutes = lookup[self.widgets['timeframe'].value]
+        minutes = wrappers.TIMEFRAME_MINUTES[self.widgets['timeframe'].value]
 
         # Percent of the width.
         bar_padding = 20
@@ -141,126 +412,118 @@ class MyUpdater(object):
         # 1 min = 60 seconds
         return (minutes * 60 * 1000) - ((minutes * 60 * 1000) * ((bar_padding / 100) * 2))
 
-    def __call__(self, task=None, cb=None, timeframe=None, active=False, axis_reset=False):
-
-        # DEBUG
-        print('__task__: {}'.format(task))
-
-        # Unpack the plots.
-        _p1 = self.__serialized_plots['candlestick']['plot']
-        _p2 = self.__serialized_plots['macd']['plot']
-        _p3 = self.__serialized_plots['volume']['plot']
+    # Private Method
+    def __span(self, name):
+        return utils.metrics.span(name, task=self.__task)
 
-        # Handle States (Part 1 of 2)
+    def __call__(self, task=None, cb=None, timeframe=None, active=False, axis_reset=False):
+        request = (task or 'update', dict(cb=cb, active=active, axis_reset=axis_reset))
 
-        # Backup the 'current' timezone signature as 'previous', then update the 'current' timezone
-        # signature with the value supplied by the live widget.
-        self.__states['timezone']['signature']['previous'] = self.__states['timezone']['signature']['current']
-        self.__states['timezone']['signature']['current'] = self.widgets['timezone'].value
+        if self.document is None:
+            self.__run(request)
+            return
 
-        # ACTIVE {{{2
-        if active:
-            # If this is an 'ACTIVE' call, we need to perform a hot reload.
-            # This process will update the data stored inside the '__data_df' and '__limits'
-            # containers. These are class level attributes and should be accessible by every
-            # instance of the 'Updater' class.
-            self.__populate_data_storage(self.file)
-
-            # Rest TimeZone
-            self.__original_date_df = self.__data_df[['date']]
-
-            if self.__states['timezone']['signature']['current'] is None:
-                self.__states['timezone']['signature']['current'] = '(Exchange) Exchange'
-            else:
-                self.__states['timezone']['signature']['previous'] = self.__states['timezone']['signature']['current']
-                self.__states['timezone']['signature']['current'] = self.widgets['timezone'].value
-        # }}}2
+        # Any request still waiting for a load is superseded.
+        self.__generation += 1
+        self.__request = request
+        self.__dispatch()
 
-        # Unpack limits from the class storage.
-        (volume_lower_limit,
-         volume_upper_limit,
-         candlestick_lower_limit,
-         candlestick_upper_limit,
-         macd_lower_limit,
-         macd_upper_limit) = wrappers.get_limits(self.__limits, padding_scale=0.05)
+    # Private Method
+    def __run(self, request):
+        (self.__task, kwargs) = request
 
-        # TIMEZONE {{{2
+        with self.__span('total'):
+            self.__update(**kwargs)
 
-        # Update timezone state.
-        print(';--- [TIMEZONE] --- (START) ---')
+    # Private Method
+    def __dispatch(self):
+        (self.__task, kwargs) = self.__request
+        job = self.__get_load_job()
 
-        previous_timezone_signature = self.__states['timezone']['signature']['previous']
-        current_timezone_signature = self.__states['timezone']['signature']['current']
+        if self.__get_cached_container(job) is not None:
+            # Nothing to load, the update is applied right away.
+            request, self.__request = self.__request, None
+            self.__run(request)
+            return
 
-        print('[update:{:<19}] <previous_signature: {}>, <current_signature: {}>'.format(
-            'TIMEZONE_SIGNATURES', previous_timezone_signature, current_timezone_signature))
+        if self.__loading:
+            # Dispatched again once the running load completes.
+            return
 
-        # Timezone Lookup
-        previous_timezone_zone = TIMEZONE_LOOKUP[previous_timezone_signature]
-        current_timezone_zone = TIMEZONE_LOOKUP[current_timezone_signature]
+        generation = self.__generation
+        self.__loading = True
 
-        print('[update:{:<19}] <previous_zone: {}>, <current_zone: {}>'.format(
-            'TIMEZONE_ZONES', previous_timezone_zone, current_timezone_zone))
+        debug_print('[DEBUG] Load {} ({}) in the background.', job['field'], job['timeframe'])
 
-        print('[update:{:<19}] <signature: {}>, <zone: {}>'.format(
-            'REQUEST', current_timezone_signature, current_timezone_zone))
+        future = self.executor.submit(self.__build_container, job, lambda: generation == self.__generation)
+        future.add_done_callback(lambda f: self.document.add_next_tick_callback(partial(self.__on_loaded, job, f)))
 
-        # Handle any new timezone requests.
-        # First we need to reset to the original 'Exchange' zone (UTC+00:00).
-        # In order to avoid time-delta calculations required to revert back to the original
-        # exchange date-time, we are simply swapping the initial date-time state here.
-        self.__data_df['date'] = self.__original_date_df
+    # Private Method
+    def __on_loaded(self, job, future):
+        self.__loading = False
 
-        if previous_timezone_signature != current_timezone_signature:
-            previous_key_time = self.__original_date_df['date'].iloc[0].tz_localize("UTC").tz_convert(previous_timezone_zone).tz_localize(None)
-            prev_kt = previous_key_time.replace(tzinfo=None).to_pydatetime()
-            print('[DEBUG] (previous_timezone_signature != current_timezone_signature) prev: {}'.format(prev_kt))
+        try:
+            container = future.result()
+        except Exception as e:
+            print('[ERROR] Unable to load {} ({}): {}'.format(job['field'], job['timeframe'], e))
+            container = None
 
-            print('[DEBUG] (previous_timezone_signature != current_timezone_signature) New timezone set.')
-            # ... then switch to the new timezone and update the dataframe.
-            self.__data_df['date'] = self.__data_df['date'].dt.tz_localize("UTC").dt.tz_convert(current_timezone_zone).dt.tz_localize(None)
+            # Do not retry the same selection in a loop.
+            if self.__request is not None and self.__get_load_job()['key'] == job['key']:
+                self.__request = None
 
-            current_key_time = self.__data_df['date'].iloc[0]
-            curr_kt = current_key_time.replace(tzinfo=None).to_pydatetime()
-            print('[DEBUG] (previous_timezone_signature != current_timezone_signature) curr: {}'.format(curr_kt))
+        if container is not None:
+            # Kept aside, in case the cache could not store it.
+            self.__loaded = (job['key'], container)
 
-            time_delta = (curr_kt - prev_kt)
+        if self.__request is not None:
+            self.__dispatch()
 
-            td = time_delta.total_seconds() * 1000
-            MyUpdater.timedelta = td
+    # Private Method
+    def __update(self, cb=None, active=False, axis_reset=False):
 
-            if axis_reset:
-                print('[DEBUG] (previous_timezone_signature != current_timezone_signature) Incoming time-delta is zero.')
-                td = 0
-                MyUpdater.timedelta = td
+        # DEBUG
+        debug_print('__task__: {}', self.__task)
 
-            print('[DEBUG] (previous_timezone_signature != current_timezone_signature) time_delta (milliseconds): {}'.format(td))
-        else:
-            # This is for conditions where we change other data fields, but the time-zone stays
-            # the same. Also when we are running for the first time.
-            print('[DEBUG] (previous_timezone_signature == current_timezone_signature) Incoming time-delta is zero.')
-            td = 0
-            MyUpdater.timedelta = td
-            print('[DEBUG] (previous_timezone_signature == current_timezone_signature) Timezone set.')
+        # Unpack the plots.
+        _p1 = self.__serialized_plots['candlestick']['plot']
+        _p2 = self.__serialized_plots['macd']['plot']
+        _p3 = self.__serialized_plots['volume']['plot']
 
-            # Transform the exchange timezone to the current timezone.
-            self.__data_df['date'] = self.__data_df['date'].dt.tz_localize("UTC").dt.tz_convert(current_timezone_zone).dt.tz_localize(None)
+        # ACTIVE {{{2
+        # If this is an 'ACTIVE' call (or the selection requires a different container), we need to perform a
+        # hot reload. This process will update the data stored inside the '__data_df' and '__limits' containers.
+        if active or self.__get_cache_key(self.__get_file()) != self.__cache_key:
+            self.__populate_data_storage()
+        # }}}2
 
-            print('[DEBUG] (previous_timezone_signature == current_timezone_signature) time_delta (milliseconds): {}'.format(td))
+        # Unpack limits from the class storage. With a window, the limits only cover the bars displayed by an
+        # axis reset.
+        with self.__span('limits'):
+            limits = None
+            if self.window is not None:
+                limits = wrappers.get_window_limits(self.__limits['range_index'], *self.__get_reset_range(),
+                                                    padding_scale=0.05)
 
-        print(';--- [TIMEZONE] --- (_END_) ---')
-        # }}}2
+            (volume_lower_limit,
+             volume_upper_limit,
+             candlestick_lower_limit,
+             candlestick_upper_limit,
+             macd_lower_limit,
+             macd_upper_limit) = limits or wrappers.get_limits(self.__limits, padding_scale=0.05)
 
-        # Extra data fields.
-        self.__data_df['candle_color'] = INCREASING_COLOR
-        self.__data_df.loc[self.__data_df.close < self.__data_df.open, 'candle_color'] = DECREASING_COLOR
+        # The dates stay in UTC, only the offsets of the selected timezone are sent.
+        self.__update_timezone()
 
         # Handle wrangle callbacks.
         if cb is not None:
-            print('[DEBUG] Callback:Handler -> {}'.format(cb.__name__))
-            cb(self.widgets['mavg'], self.configs['ma'], self.__data_df)
+            debug_print('[DEBUG] Callback:Handler -> {}', cb.__name__)
+            with self.__span('indicators'):
+                # The callback may modify the data-frame, so it gets a private copy of the shared container.
+                self.__data_df = self.__data_df.copy()
+                cb(self.widgets['mavg'], self.configs['ma'], self.__data_df)
 
-        # Handle States (Part 2 of 2) -- NEEDS TO HAPPEN AFTER THE TIMEZONE REQUEST
+        # Handle States
 
         # Backup the 'current' timerange as 'previous', then update the 'current' with the live range value.
         self.__states['timerange']['candlestick']['previous']['start'] = self.__states['timerange']['candlestick']['current']['start']
@@ -270,12 +533,12 @@ class MyUpdater(object):
 
         # Just initialize the raw time-ranges. These values are provided by the initial plot
         # configuration and are place holders. Actual range vlues will be set later.
-        print(';--- INIT_TIME-RANGE --- (START) ---')
+        debug_print(';--- INIT_TIME-RANGE --- (START) ---')
         timerange_start = self.__states['timerange']['candlestick']['current']['start']
         timerange_end = self.__states['timerange']['candlestick']['current']['end']
-        print('[DEBUG] timerange_start: {}, timerange_end: {}'.format(timerange_start, timerange_end))
-        print('[DEBUG] plotrange_start: {}, plotrange_end: {}'.format(_p1.x_range.start, _p1.x_range.end))
-        print(';--- INIT_TIME-RANGE --- ( END ) ---')
+        debug_print('[DEBUG] timerange_start: {}, timerange_end: {}', timerange_start, timerange_end)
+        debug_print('[DEBUG] plotrange_start: {}, plotrange_end: {}', _p1.x_range.start, _p1.x_range.end)
+        debug_print(';--- INIT_TIME-RANGE --- ( END ) ---')
 
         # Serialize Limits
         serialized_limits = {}
@@ -294,11 +557,10 @@ class MyUpdater(object):
         # This is usually when we run for the first time.
         if axis_reset:
             # AXIS RESET {{{2
-            print(';--- [AXIS_RESET] --- (START) ---')
+            debug_print(';--- [AXIS_RESET] --- (START) ---')
 
             # When resetting, we realy on the range(s) provided within the dataframe.
-            timerange_end = ((self.__data_df['date'].iat[-1] - EPOCH).total_seconds() * 1000)
-            timerange_start = ((self.__data_df['date'].iloc[0] - EPOCH).total_seconds() * 1000)
+            (timerange_start, timerange_end) = self.__get_reset_range()
 
             # Then merge serialized objects, merge and set the plot properties.
             # WARNING: The limit values used at this stage will include the padding margins.
@@ -307,8 +569,7 @@ class MyUpdater(object):
                 plot = val['plot']
 
                 # Setup the vertical limits (Y-axis).
-                print('[update:{:<18}] ({}), {}, <{}>'.format(
-                    'RANGE', 'y', key, serialized_limits[key]['limits']))
+                debug_print('[update:{:<18}] ({}), {}, <{}>', 'RANGE', 'y', key, serialized_limits[key]['limits'])
 
                 plot.y_range.update(
                     start=serialized_limits[key]['limits'][0],
@@ -316,8 +577,7 @@ class MyUpdater(object):
 
             # Setup the horizontal limits (X-axis) on the first plot.
             # Other plots are already linked to p1's x-axis.
-            print('[update:{:<18}] ({}), <{}>'.format(
-                'RANGE', 'x', [timerange_start, timerange_end]))
+            debug_print('[update:{:<18}] ({}), <{}>', 'RANGE', 'x', [timerange_start, timerange_end])
 
             _p1.x_range.update(start=timerange_start, end=timerange_end)
 
@@ -325,26 +585,14 @@ class MyUpdater(object):
             self.__states['timerange']['candlestick']['current']['start'] = timerange_start
             self.__states['timerange']['candlestick']['current']['end'] = timerange_end
 
-            print(';--- [AXIS_RESET] --- (_END_) ---')
+            debug_print(';--- [AXIS_RESET] --- (_END_) ---')
             # }}}2
         else:
             # AXIS SET {{{2
-            print(';--- [AXIS_SET] --- (START) ---')
+            debug_print(';--- [AXIS_SET] --- (START) ---')
             # *** WARNING: Fix the "MA out of sync on pair change" issue! ***
-            # *** WARNING: Fix the "Reset button will not reset in a different time-zone" issue! ***
-            if td != 0:
-                print('[DEBUG] Apply time-delta correction.')
-                a = timerange_start + td
-                b = timerange_end + td
-
-                _p1.x_range.update(start=a, end=b)
-
-                # Done? Reset td?
-                print('[DEBUG] Reset time-delta.')
-                td = 0
-                MyUpdater.timedelta = td
-
-            print(';--- [AXIS_SET] --- (_END_) ---')
+            # The x-range is in UTC whatever the timezone, so it is kept as is.
+            debug_print(';--- [AXIS_SET] --- (_END_) ---')
             # }}}2
 
         # Override p1 (Candlestick).
@@ -366,39 +614,445 @@ class MyUpdater(object):
         _p3_title_text = _p3_text_label.format('Volume')
         _p3.title.text = _p3_title_text
 
-        # Provide the dynamic bar width.
-        self.__data_df['bar_width'] = self.__convert_timeframe()
+        # Reduce the number of bars to the level of detail required by the visible time range, and only send the
+        # rows around it.
+        self.__lod_factor = self.__get_lod_factor(_p1.x_range.start, _p1.x_range.end)
+        self.__window = self.__get_window(_p1.x_range.start, _p1.x_range.end)
+
+        # Swap the current data with the new data.
+        self.__apply_source_data(self.__get_source_data())
+
+    def get_live_job(self):
+        """
+        Return the load job of the displayed series, or 'None' if it can not be followed by a live feed (an
+        aggregated timeframe, a column store or a source other than a *.csv file).
+        """
+        job = self.__live_job
+
+        if job is None or self.base_timeframe is not None:
+            return None
+
+        if not isinstance(backends.get_backend(job['file']), backends.CSVBackend) or \
+                utils.ColumnStore.is_store(job['file']):
+            return None
+
+        return job
+
+    @property
+    def live_version(self):
+        # Version of the live series displayed, see ``live.LiveFeed``.
+        return self.__live_version
+
+    def push_live(self, version, container, candle, signature):
+        """
+        Display a new version of the followed series: the data container of the closed candles and the unclosed
+        last candle. This may be called from any thread, the update is applied on the next tick of the document.
+
+        :param version (``tuple``): The key of the series (the cache key without the file version) and its version.
+        :param container (``tuple``): Data container of the closed candles, see ``wrappers.get_data_container()``.
+        :param candle (``Pandas Object``): Single row dataFrame of the unclosed candle, or 'None'.
+        :param signature (``tuple``): Version of the file matching the container ('None' while a line is written).
+        """
+        self.document.add_next_tick_callback(partial(self.__apply_live, version, container, candle, signature))
+
+    # Private Method
+    def __apply_live(self, version, container, candle, signature):
+        job = self.__live_job
+
+        # The selection changed since the version was pushed.
+        if job is None or job['key'][:-1] != version[0] or self.__request is not None:
+            return
+
+        self.__task = 'live'
+
+        if signature is not None:
+            # The next sessions selecting the series start from this version. It replaces the previous version of
+            # the series, which is keyed by a previous version of the file and would never be requested again.
+            key = version[0] + (signature,)
+            previous = self.__live_key or job['key']
+
+            if previous != key:
+                self.cache.pop(previous)
+            self.cache.put(key, container)
+            self.__live_key = key
+
+        # An unknown signature reloads the file on the next update.
+        self.__cache_key = version[0] + (signature,) if signature is not None else None
+        (self.__data_df, self.__limits) = container
+        self.__live_version = version
+        self.__live_candle = candle
+
+        with self.__span('total'):
+            self.__update_timezone()
+            self.__apply_source_data(self.__get_source_data())
+
+    def update_timezone(self):
+        """
+        Send the offsets of the selected timezone (for example on a timezone change), covering the dates of
+        the current data. Neither the source data nor the ranges are modified.
+        """
+        self.__task = 'timezone'
+
+        if self.__data_df is not None:
+            self.__update_timezone()
+
+    # Private Method
+    def __update_timezone(self):
+        if self.timezone_source is None:
+            return
+
+        with self.__span('timezone'):
+            self.__send_zone_offsets()
+
+    # Private Method
+    def __send_zone_offsets(self):
+
+        zone = TIMEZONE_LOOKUP[self.widgets['timezone'].value]
+        times = self.__data_df['date'].values.astype('datetime64[ms]').astype(np.int64)
+        start, end = (float(times[0]), float(times[-1])) if len(times) else (None, None)
+
+        zone_offsets = formatters.get_zone_offsets(zone, start, end)
+        zone_key = (tuple(zone_offsets['transition']), tuple(zone_offsets['offset']))
+
+        if zone_key != self.__zone_key:
+            debug_print('[update:{:<19}] <signature: {}>, <zone: {}>', 'TIMEZONE', self.widgets['timezone'].value, zone)
+            self.__zone_key = zone_key
+            self.timezone_source.data = zone_offsets
+
+    def update_level_of_detail(self, start, end):
+        """
+        Re-aggregate the displayed bars for a new visible time range (for example on a range update event), and
+        move the loaded window once the range approaches one of its edges (see ``WINDOW_REFETCH``). The source
+        is only updated when the required level of detail or the window changes.
+        """
+        if self.__data_df is None:
+            return
+
+        self.__task = 'level_of_detail'
+        lod_factor = self.__get_lod_factor(start, end)
+        window = self.__window
+
+        if lod_factor != self.__lod_factor or self.__is_window_stale(start, end):
+            window = self.__get_window(start, end)
+
+        if lod_factor != self.__lod_factor or window != self.__window:
+            debug_print('[DEBUG] Level of detail: {} bar(s) per displayed bar, window: {}.', lod_factor, window)
+            self.__lod_factor = lod_factor
+            self.__window = window
+            self.__apply_source_data(self.__get_source_data())
+
+    def autoscale(self, start, end):
+        """
+        Fit the y-ranges of the plots to the displayed bars within the visible time range.
+
+        This is the server side counterpart of the CustomJS range callbacks, for example for a range update
+        event handler. The limits are answered by the range index in O(log n).
+        """
+        if self.__view_df is None:
+            return
+
+        self.__task = 'autoscale'
+
+        if self.__view_index is None:
+            self.__view_index = wrappers.get_range_index(self.__view_df)
+
+        # The index is keyed on the displayed time column (UTC), see ``__get_source_data()``.
+        with self.__span('limits'):
+            window_limits = wrappers.get_window_limits(self.__view_index, start, end, padding_scale=0.05)
+
+        if window_limits is None:
+            return
+
+        (volume_lower_limit,
+         volume_upper_limit,
+         candlestick_lower_limit,
+         candlestick_upper_limit,
+         macd_lower_limit,
+         macd_upper_limit) = window_limits
+
+        self.__serialized_plots['candlestick']['plot'].y_range.update(
+            start=candlestick_lower_limit, end=candlestick_upper_limit)
+        self.__serialized_plots['volume']['plot'].y_range.update(
+            start=volume_lower_limit, end=volume_upper_limit)
+        self.__serialized_plots['macd']['plot'].y_range.update(
+            start=macd_lower_limit, end=macd_upper_limit)
+
+    # Private Method
+    def __get_lod_factor(self, start, end):
+        if self.level_of_detail is None or start is None or end is None:
+            return 1
+
+        times = self.__get_times()
+        visible_bars = np.searchsorted(times, end, side='right') - np.searchsorted(times, start, side='left')
+
+        if visible_bars <= self.level_of_detail:
+            return 1
+
+        # Power of two steps, so small zoom changes do not trigger a new aggregation.
+        return int(2 ** np.ceil(np.log2(visible_bars / self.level_of_detail)))
+
+    # Private Method
+    def __get_times(self):
+        # The (shared) time column of the container, epoch milliseconds.
+        return self.__limits['range_index'].times
+
+    # Private Method
+    def __get_reset_range(self):
+        # Time range of an axis reset: the full history, or its last 'window' bars.
+        first = 0 if self.window is None else max(0, len(self.__data_df) - self.window)
+
+        return (((self.__data_df['date'].iat[first] - EPOCH).total_seconds() * 1000),
+                ((self.__data_df['date'].iat[-1] - EPOCH).total_seconds() * 1000))
+
+    # Private Method
+    def __get_window(self, start, end):
+        """
+        Return the ``(start, end)`` times of the rows to send for a visible time range, the end being 'None' when
+        the window reaches the newest bars (so the new candles are streamed), or 'None' for the full history.
+        """
+        times = self.__get_times()
+
+        if self.window is None or start is None or end is None or len(times) == 0:
+            return None
+
+        margin = (end - start) * WINDOW_MARGIN
+
+        if end + margin >= times[-1]:
+            return (start - margin, None)
+
+        return (start - margin, end + margin)
+
+    # Private Method
+    def __is_window_stale(self, start, end):
+        if self.__window is None:
+            return self.window is not None
+
+        times = self.__get_times()
+        (window_start, window_end) = self.__window
+        threshold = (end - start) * WINDOW_REFETCH
+
+        if start - threshold < window_start and window_start > times[0]:
+            return True
+
+        if window_end is not None and end + threshold > window_end and window_end < times[-1]:
+            return True
+
+        # Zoomed in, the window is kept within about twice the size it would have for the visible range.
+        return ((window_end or times[-1]) - window_start) > 2 * (1 + 2 * WINDOW_MARGIN) * (end - start)
+
+    # Private Method
+    def __get_source_data(self):
+        view_df = self.__data_df
+        view_index = self.__limits['range_index']
+
+        if self.__window is not None:
+            times = self.__get_times()
+            (window_start, window_end) = self.__window
+
+            lo = int(np.searchsorted(times, window_start, side='left'))
+            hi = len(times) if window_end is None else int(np.searchsorted(times, window_end, side='right'))
+
+            # Aligned on the groups of the level of detail, so the merged bars do not depend on the window.
+            lo -= lo % self.__lod_factor
+
+            view_df = view_df.iloc[lo:hi]
+            view_index = None
+
+        if self.__live_candle is not None and (self.__window is None or self.__window[1] is None):
+            # The unclosed candle follows the newest bars.
+            view_df = pd.concat([view_df, self.__live_candle])
+            view_index = None
+
+        if self.__lod_factor > 1:
+            with self.__span('filter'):
+                view_df = wrappers.downsample_data_container(view_df, self.__lod_factor)
+            view_index = None
+
+        self.__view_df = view_df
+        self.__view_index = view_index
+
+        with self.__span('payload'):
+            return self.__build_source_data(view_df)
+
+    # Private Method
+    def __build_source_data(self, view_df):
+
+        if self.compact:
+            if 'direction' in view_df:
+                direction = view_df.direction.values
+            else:
+                direction = (~(view_df.close.values < view_df.open.values)).astype(np.int8)
+
+            # Numeric arrays only, in the smallest types the client can decode as binary.
+            return dict(
+                index=view_df.index.values.astype(np.int32),
+                time=view_df.date.values.astype('datetime64[ms]').astype(np.int64).astype(np.float64),
+                open=view_df.open.values,
+                high=view_df.high.values,
+                low=view_df.low.values,
+                close=view_df.close.values,
+                direction=direction,
+                ma_slow=view_df.ma_slow.values,
+                ma_fast=view_df.ma_fast.values,
+                macd=view_df.macd.values,
+                macds=view_df.macds.values,
+                macdh=view_df.macdh.values,
+                macd_bound_min=view_df.macd_bound_min.values,
+                macd_bound_max=view_df.macd_bound_max.values,
+                volume=view_df.volume.values
+            )
+
+        # Extra data fields.
+        candle_color = np.where(view_df.close.values < view_df.open.values,
+                                DECREASING_COLOR, INCREASING_COLOR).astype(object)
+        bar_width = np.full(len(view_df), self.__convert_timeframe() * self.__lod_factor)
 
         # Create a new data-container.
-        new_data = dict(
-            index=self.__data_df.index,
-            time=self.__data_df.date,
-            open=self.__data_df.open,
-            high=self.__data_df.high,
-            low=self.__data_df.low,
-            close=self.__data_df.close,
-            candle_wick_color=self.__data_df.candle_color,
-            candle_body_fill_color=self.__data_df.candle_color,
-            candle_body_line_color=self.__data_df.candle_color,
-            candle_bound_min=self.__data_df.candle_bound_min,
-            candle_bound_max=self.__data_df.candle_bound_max,
-            ma_slow=self.__data_df.ma_slow,
-            ma_fast=self.__data_df.ma_fast,
-            macd=self.__data_df.macd,
-            macds=self.__data_df.macds,
-            macdh=self.__data_df.macdh,
-            macd_bound_min=self.__data_df.macd_bound_min,
-            macd_bound_max=self.__data_df.macd_bound_max,
-            volume=self.__data_df.volume,
-            volume_bound_min=self.__data_df.volume_bound_min,
-            volume_bound_max=self.__data_df.volume_bound_max,
-            signature=self.__data_df.pair,
-            bar_width=self.__data_df.bar_width
+        return dict(
+            index=view_df.index.values,
+            time=view_df.date.values,
+            open=view_df.open.values,
+            high=view_df.high.values,
+            low=view_df.low.values,
+            close=view_df.close.values,
+            candle_wick_color=candle_color,
+            candle_body_fill_color=candle_color,
+            candle_body_line_color=candle_color,
+            candle_bound_min=wrappers.get_container_column(view_df, 'candle_bound_min'),
+            candle_bound_max=wrappers.get_container_column(view_df, 'candle_bound_max'),
+            ma_slow=view_df.ma_slow.values,
+            ma_fast=view_df.ma_fast.values,
+            macd=view_df.macd.values,
+            macds=view_df.macds.values,
+            macdh=view_df.macdh.values,
+            macd_bound_min=view_df.macd_bound_min.values,
+            macd_bound_max=view_df.macd_bound_max.values,
+            volume=view_df.volume.values,
+            volume_bound_min=wrappers.get_container_column(view_df, 'volume_bound_min'),
+            volume_bound_max=wrappers.get_container_column(view_df, 'volume_bound_max'),
+            signature=np.asarray(view_df.pair.values),
+            bar_width=bar_width
         )
 
-        # Swap the current data with the new data.
+    # Private Method
+    def __get_stream_key(self):
+        # Any change of these selections invalidates all the rows on the client.
+        return tuple(self.widgets[key].value for key in ('asset', 'pair', 'timeframe', 'mavg')) + \
+            (self.__lod_factor, self.__window)
+
+    # Private Method
+    def __apply_source_data(self, new_data):
+        with self.__span('source'):
+            self.__send_source_data(new_data)
+
+    # Private Method
+    def __send_source_data(self, new_data):
+        """
+        Send the new data to the source, using the smallest possible update.
+
+        If the selection is unchanged and the rows already on the client are still the leading part of the
+        new data, only the last row is patched (the candle may have changed) and any new rows are streamed.
+        Everything else results in a full replacement of the source data.
+        """
+        stream_key = self.__get_stream_key()
+        previous_stream_key, self.__stream_key = self.__stream_key, stream_key
+
+        if self.compact:
+            self.__set_bar_width(self.__convert_timeframe() * self.__lod_factor)
+
+        old_data = self.source.data
+        old_time = np.asarray(old_data.get('time', []))
+        new_time = new_data['time']
+
+        same_columns = set(old_data.keys()) == set(new_data.keys())
+
+        if not self.stream_updates or previous_stream_key != stream_key or len(old_time) == 0 or not same_columns:
+            self.__replace_source_data(new_data)
+            return
+
+        # After a rollover the client holds a trailing part of the history only.
+        offset = np.searchsorted(new_time, old_time[0])
+        last = len(old_time) - 1
+
+        if offset + last >= len(new_time) or new_time[offset] != old_time[0]:
+            self.__replace_source_data(new_data)
+            return
+
+        if new_time[offset + last] != old_time[last]:
+            self.__replace_source_data(new_data)
+            return
+
+        patches = {}
+        for key, values in new_data.items():
+            if np.asarray(old_data[key][last]) != np.asarray(values[offset + last]):
+                patches[key] = [(int(last), values[offset + last])]
+
+        streamed = len(new_time) - offset - last - 1
+
+        if not patches and streamed == 0:
+            return
+
+        # The summaries need to be in place before the source change triggers the autoscale callback.
+        self.__update_summary_source(new_data, offset, last)
+
+        if patches:
+            debug_print('[DEBUG] Patch the last row: {}', list(patches))
+            self.source.patch(patches)
+
+        if streamed > 0:
+            debug_print('[DEBUG] Stream {} new row(s).', streamed)
+            self.source.stream({key: values[offset + last + 1:] for key, values in new_data.items()},
+                               rollover=self.rollover)
+
+    # Private Method
+    def __set_bar_width(self, width):
+        # Unchanged values are not sent again by bokeh.
+        for val in self.__serialized_plots.values():
+            for renderer in val['plot'].renderers:
+                for name in ('glyph', 'selection_glyph', 'nonselection_glyph', 'hover_glyph', 'muted_glyph'):
+                    glyph = getattr(renderer, name, None)
+                    if isinstance(glyph, VBar):
+                        glyph.width = width
+
+    # Private Method
+    def __replace_source_data(self, new_data):
+        if self.summary_source is not None:
+            self.summary_source.data = wrappers.get_block_summaries(new_data, columns=self.autoscale_columns)
+
         self.source.data = new_data
 
+    # Private Method
+    def __update_summary_source(self, new_data, offset, last):
+        """
+        Update the block summaries for rows appended after (and patched at) the 'last' row of the client.
+        """
+        if self.summary_source is None:
+            return
+
+        # Only the rows held by the client are summarised, the blocks start at the first of them.
+        rows = len(new_data['time']) - offset
+        if self.rollover is not None:
+            rows = min(rows, self.rollover)
+        first_row = len(new_data['time']) - rows
+
+        summaries = wrappers.get_block_summaries({key: values[first_row:] for key, values in new_data.items()},
+                                                 columns=self.autoscale_columns)
+
+        if first_row != offset:
+            # The client rolled over, so the blocks no longer line up with the previous ones.
+            self.summary_source.data = summaries
+            return
+
+        old_blocks = len(self.summary_source.data['candle_block_min'])
+        first_block = last // wrappers.AUTOSCALE_BLOCK_SIZE
+
+        if first_block < old_blocks:
+            self.summary_source.patch({key: [(slice(first_block, old_blocks), values[first_block:old_blocks])]
+                                       for key, values in summaries.items()})
+
+        if len(summaries['candle_block_min']) > old_blocks:
+            self.summary_source.stream({key: values[old_blocks:] for key, values in summaries.items()})
+
     def __str__(self):
         x = self.__limits
         header = '{:<60}\n'.format('=' * 60)
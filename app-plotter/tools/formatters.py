@@ -0,0 +1,217 @@
+# Global Imports
+import datetime
+import numpy as np
+import pytz
+from bokeh.models import CustomJS, CustomJSHover, FuncTickFormatter, HTMLTemplateFormatter
+
+# Local Imports
+from os import sys
+from os import path
+
+# A crude solution, but should be fixed eventually.
+# 'scope' is '<PROJECT_ROOT>'
+#       for example: /home/me/dev/my-project
+# WARNING: This hack is required to import the local modules from within the current module depth.
+scope = path.dirname(path.dirname(path.dirname(path.abspath(__file__))))
+sys.path.append(scope)
+
+from coreglobals import get_global_property
+from coreglobals import set_global_property
+
+# from, import * guard.
+__all__ = ['my_public_method', 'get_zone_offsets']
+
+EPOCH = datetime.datetime.utcfromtimestamp(0)
+
+# Name of the source holding the offsets of the selected timezone. The data table formatter looks the source up
+# by name, as the template formatter can not reference other models.
+ZONE_SOURCE_NAME = 'timezone_offsets'
+
+# Extra offset transitions included after the end of the data, so the streamed candles are still covered.
+ZONE_LOOKAHEAD = datetime.timedelta(days=366)
+
+# The time columns stay in UTC (epoch milliseconds), the offset of the selected timezone is only applied when
+# the values are formatted. The zone is described by the UTC times of its offset transitions (sorted), and the
+# offset (milliseconds) that applies from each of them. Supported format codes: %Y %m %d %H %M %S %F %T %%.
+ZONE_FORMAT_JS = '''
+    function zone_offset(value, zone) {
+        var transitions = zone.transition,
+            offsets = zone.offset,
+            lo = 0,
+            hi = transitions.length;
+
+        if (hi === 0) {
+            return 0;
+        }
+
+        // Last transition at (or before) the value, the first offset also applies to any earlier value.
+        while (lo < hi) {
+            var mid = (lo + hi) >>> 1;
+            if (transitions[mid] <= value) {
+                lo = mid + 1;
+            } else {
+                hi = mid;
+            }
+        }
+        return offsets[Math.max(lo - 1, 0)];
+    }
+
+    function zone_format(value, format, zone) {
+        if (value === null || value === undefined || isNaN(value)) {
+            return '';
+        }
+
+        var date = new Date(value + (zone ? zone_offset(value, zone) : 0));
+
+        function pad(number) {
+            return (number < 10 ? '0' : '') + number;
+        }
+
+        var fields = {
+            Y: String(date.getUTCFullYear()),
+            m: pad(date.getUTCMonth() + 1),
+            d: pad(date.getUTCDate()),
+            H: pad(date.getUTCHours()),
+            M: pad(date.getUTCMinutes()),
+            S: pad(date.getUTCSeconds())
+        };
+        fields.F = fields.Y + '-' + fields.m + '-' + fields.d;
+        fields.T = fields.H + ':' + fields.M + ':' + fields.S;
+
+        return format.replace(/%([YmdHMSFT%])/g, function(match, key) {
+            return key === '%' ? '%' : fields[key];
+        });
+    }
+'''
+
+# @pubic function my_public_method() {{{1
+
+
+def my_public_method():
+    """
+    A test public method.
+    """
+
+    # Test if we have access to the global properties.
+    NAMESPACE = get_global_property('APP_NAME') + "." + __name__
+    print('{}: Module accessed.'.format(NAMESPACE))
+# }}}1
+
+# @public function get_zone_offsets(zone, start, end) {{{1
+
+
+def get_zone_offsets(zone, start=None, end=None):
+    """
+    Get the UTC offsets of a timezone, including the daylight saving transitions, as the data of the timezone
+    source used by the formatters of this module.
+
+    Only the transitions that apply between 'start' and 'end' (plus ``ZONE_LOOKAHEAD``) are returned, which
+    keeps the payload of a timezone switch to a few entries.
+
+    :param zone (``str``): A tz database zone, for example 'Europe/London' (see ``tools.timezones``).
+    :param start (``float``): UTC epoch milliseconds of the first displayed value (optional).
+    :param end (``float``): UTC epoch milliseconds of the last displayed value (optional).
+    :return (``dict``): The 'transition' (UTC epoch milliseconds) and 'offset' (milliseconds) lists.
+    """
+    tz = pytz.timezone(zone)
+
+    transition_times = getattr(tz, '_utc_transition_times', None)
+    transition_info = getattr(tz, '_transition_info', None)
+
+    if not transition_times:
+        # A static zone has a single offset.
+        offset = tz.utcoffset(EPOCH).total_seconds() * 1000
+        return dict(transition=[0.0], offset=[offset])
+
+    transitions = np.array([(t - EPOCH).total_seconds() * 1000 for t in transition_times])
+    offsets = np.array([info[0].total_seconds() * 1000 for info in transition_info])
+
+    first = 0
+    if start is not None:
+        first = max(np.searchsorted(transitions, start, side='right') - 1, 0)
+
+    last = len(transitions)
+    if end is not None:
+        lookahead = ZONE_LOOKAHEAD.total_seconds() * 1000
+        last = max(np.searchsorted(transitions, end + lookahead, side='right'), first + 1)
+
+    return dict(transition=transitions[first:last].tolist(), offset=offsets[first:last].tolist())
+# }}}1
+
+# @public function get_tick_formatter(zone_source, format) {{{1
+
+
+def get_tick_formatter(zone_source, format):
+    """
+    An axis tick formatter for UTC epoch milliseconds, displayed in the timezone of the zone source.
+
+    :param zone_source (``ColumnDataSource object``): The offsets of the selected timezone.
+    :param format (``str``): strftime like format, for example '%m/%d %H:%M'.
+    """
+    code = ZONE_FORMAT_JS + '''
+        return zone_format(tick, format, zone_source.data);
+    '''
+    return FuncTickFormatter(args=dict(zone_source=zone_source, format=format), code=code)
+# }}}1
+
+# @public function get_hover_formatter(zone_source) {{{1
+
+
+def get_hover_formatter(zone_source):
+    """
+    A hover tool formatter for UTC epoch milliseconds, displayed in the timezone of the zone source.
+    The format is taken from the tooltip field, for example '@time{%F %T}'.
+
+    :param zone_source (``ColumnDataSource object``): The offsets of the selected timezone.
+    """
+    code = ZONE_FORMAT_JS + '''
+        return zone_format(value, format, zone_source.data);
+    '''
+    return CustomJSHover(args=dict(zone_source=zone_source), code=code)
+# }}}1
+
+# @public function get_table_formatter(format) {{{1
+
+
+def get_table_formatter(format):
+    """
+    A data table cell formatter for UTC epoch milliseconds, displayed in the timezone of the zone source
+    (named ``ZONE_SOURCE_NAME``).
+
+    :param format (``str``): strftime like format, for example '%m/%d/%Y %H:%M'.
+    """
+    template = '<% ' + ZONE_FORMAT_JS + '''
+        var zone = null;
+        var documents = (window.Bokeh && window.Bokeh.documents) || [];
+        for (var i = 0; i < documents.length && zone === null; ++i) {
+            zone = documents[i].get_model_by_name('{name}');
+        }
+    %><%= zone_format(value, '{format}', zone && zone.data) %>'''
+    return HTMLTemplateFormatter(template=template.replace('{name}', ZONE_SOURCE_NAME).replace('{format}', format))
+# }}}1
+
+# @public function callback_on_zone_change(x_range, tables) {{{1
+
+
+def callback_on_zone_change(x_range, tables=[]):
+    """
+    A callback factory for the CustomJS model, redrawing the time labels after a timezone switch.
+    The source data does not change, so the plots and the tables are asked to render again.
+
+    :param x_range (``bokeh range object``): The shared x-range of the plots.
+    :param tables (``list``): Data tables with a time column.
+    """
+    code = '''
+        x_range.change.emit();
+        for (var i = 0; i < tables.length; ++i) {
+            tables[i].change.emit();
+        }
+    '''
+    return CustomJS(args=dict(x_range=x_range, tables=tables), code=code)
+# }}}1
+
+
+if __name__ == "__main__":
+    pass
+
+# vim: ts=4 ft=python nowrap fdm=marker
@@ -13,6 +13,8 @@ the main application once defined inside this module header file.
 from .core import *
 from .movingaverages import MovingAverage as MA
 # from .movingaverages import MovingAverage
+from .streaming import StreamingSMA, StreamingEMA, StreamingMACD
+from .graph import IndicatorGraph, register_indicator
 
 __version__ = 'dev-v0.0.1'
 __name__ = 'tools.indicators'
@@ -0,0 +1,127 @@
+# Global Imports
+import numpy as np
+
+# Local Imports
+from os import sys
+from os import path
+
+scope = path.dirname(path.dirname(path.dirname(path.abspath(__file__))))
+sys.path.append(scope)
+
+from coreglobals import get_global_property
+from coreglobals import set_global_property
+from tools.indicators.movingaverages import MovingAverage as MA
+
+# from, import * guard.
+__all__ = ['IndicatorGraph', 'register_indicator']
+
+# The indicators are declared as a small dependency graph of named intermediates. A node is keyed by its kind, its
+# parameters and its input node, for example:
+#   ('ema', 13, None)                       EMA(13) of the source series
+#   ('macd', 13, 30, None)                  EMA(13) - EMA(30) of the source series
+#   ('ema', 9, ('macd', 13, 30, None))      EMA(9) of the MACD, the MACD signal
+# and every node is computed once per graph (one graph per source array), so the EMA(13) of a moving average
+# overlay is the same series as the fast leg of the MACD.
+#
+# Usage:
+#   graph = indicators.IndicatorGraph(close)
+#   graph.get('ema', 13)
+#   graph.get('macd_signal', 13, 30, 9)
+
+# Node functions, keyed by kind: function(graph, source, *params) -> 1-D array. 'source' is the key of the input
+# node ('None' for the source series), see ``IndicatorGraph.get()`` to request other nodes.
+INDICATOR_KINDS = {}
+
+
+def my_public_method():
+    # Test if we have access to the global properties.
+    NAMESPACE = get_global_property('APP_NAME') + "." + __name__
+    print('{}: Module accessed.'.format(NAMESPACE))
+
+
+def register_indicator(kind, function):
+    """
+    Declare a kind of node, for example ``register_indicator('sma', lambda graph, source, period: ...)``.
+
+    :param kind (``str``): Name of the kind.
+    :param function (``callable``): ``function(graph, source, *params)`` returning a 1-D array.
+    """
+    INDICATOR_KINDS[kind] = function
+
+
+class IndicatorGraph(object):
+    """
+    Memoized indicator series of a single source array (for example the close prices of a load).
+
+    :param values (``array like``): 1-D source series.
+    """
+
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=float)
+
+        # Computed nodes, in the order of their computation.
+        self.__nodes = {}
+
+    def keys(self):
+        """
+        Return the keys of the computed nodes, in the order of their computation.
+        """
+        return list(self.__nodes)
+
+    def series(self, source=None):
+        """
+        Return the series of a node key, 'None' being the source series.
+        """
+        if source is None:
+            return self.values
+
+        return self.get(source[0], *source[1:-1], source=source[-1])
+
+    def get(self, kind, *params, source=None):
+        """
+        Return the series of a node, computing it (and the nodes it depends on) unless already done.
+
+        :param kind (``str``): Kind of the node, see ``INDICATOR_KINDS``.
+        :param params (``int``): Parameters of the node, for example the period of an EMA.
+        :param source (``tuple``): Key of the input node, the source series by default.
+        """
+        key = (kind,) + params + (source,)
+        values = self.__nodes.get(key)
+
+        if values is None:
+            values = self.__nodes[key] = INDICATOR_KINDS[kind](self, source, *params)
+
+        return values
+
+    def prefetch_ema(self, periods, source=None):
+        """
+        Compute the missing EMA nodes of several periods over the same input in a single pass, see
+        ``MA.ema_many()``. The series are identical to the ones computed one by one.
+        """
+        missing = [period for period in dict.fromkeys(periods) if ('ema', period, source) not in self.__nodes]
+
+        if missing:
+            emas = MA.ema_many(self.series(source), missing)
+
+            for i, period in enumerate(missing):
+                self.__nodes[('ema', period, source)] = emas[:, i]
+
+
+def get_macd(graph, source, fast_period, slow_period):
+    graph.prefetch_ema([fast_period, slow_period], source=source)
+    return graph.get('ema', fast_period, source=source) - graph.get('ema', slow_period, source=source)
+
+
+def get_macd_histogram(graph, source, fast_period, slow_period, signal_period):
+    return graph.get('macd', fast_period, slow_period, source=source) - \
+        graph.get('macd_signal', fast_period, slow_period, signal_period, source=source)
+
+
+register_indicator('sma', lambda graph, source, period: MA.sma(graph.series(source), period))
+register_indicator('ema', lambda graph, source, period: MA.ema(graph.series(source), period))
+register_indicator('macd', get_macd)
+register_indicator('macd_signal', lambda graph, source, fast_period, slow_period, signal_period: graph.get(
+    'ema', signal_period, source=('macd', fast_period, slow_period, source)))
+register_indicator('macd_histogram', get_macd_histogram)
+
+# vim: ts=4 ft=python nowrap fdm=marker
@@ -1,6 +1,6 @@
 # Global Imports
-import pandas as pd
 import numpy as np
+import pandas as pd
 
 # Local Imports
 from os import sys
@@ -25,6 +25,12 @@ def my_public_method():
 def sma(values, window):
     input_arr_length = len(values)
 
+    if input_arr_length == 0:
+        return np.array([], dtype=float)
+
+    # Short series (for example aggregated timeframes) are averaged over the available values.
+    window = min(window, input_arr_length)
+
     weights = np.repeat(1.0, window) / window
     smas = np.convolve(values, weights, 'valid')
 
@@ -52,12 +58,47 @@ def sma(values, window):
     return smas
 
 
-def ema(values, window):
-    # Temporary DataFrame container.
-    tmp_df = pd.DataFrame({'values': values})
-    tmp_df['results'] = tmp_df['values'].ewm(span=window, adjust=False).mean()
+def get_ema_weights(window):
+    """
+    Return the ``(old_weight, new_weight)`` pair of an EMA with the given span.
+
+    The arithmetic matches ``pandas.Series.ewm(span=window, adjust=False)``, where:
+        alpha = 1 / (1 + com), com = (span - 1) / 2
+    """
+    com = (window - 1) / 2.0
+    alpha = 1. / (1. + com)
+
+    return (1. - alpha, alpha)
+
+
+def ema_many(values, windows):
+    """
+    Calculate the Exponential Moving Average (``adjust=False``) of ``values`` for several spans at once.
 
-    return tmp_df['results']
+    Every span runs the compiled pandas recurrence over a single Series wrapping the values (no copy, and no
+    temporary DataFrame), so the results are identical to ``pd.Series(values).ewm(span=window,
+    adjust=False).mean()``.
+
+    :param values (``array like``): 1-D input values.
+    :param windows (``list``): Spans of the EMAs.
+    :return (``numpy.ndarray``): A 2-D array, one column per span (in the order of ``windows``).
+    """
+    values = np.asarray(values, dtype=float)
+    results = np.empty((len(values), len(windows)))
+
+    if len(values) == 0:
+        return results
+
+    series = pd.Series(values, copy=False)
+
+    for i, window in enumerate(windows):
+        results[:, i] = series.ewm(span=window, adjust=False).mean().to_numpy()
+
+    return results
+
+
+def ema(values, window):
+    return ema_many(values, [window])[:, 0]
 
 
 class MovingAverage:
@@ -68,6 +109,8 @@ class MovingAverage:
 
     sma = sma
     ema = ema
+    ema_many = ema_many
+    get_ema_weights = get_ema_weights
     my_public_method = my_public_method
 
 
@@ -0,0 +1,191 @@
+# Global Imports
+import numpy as np
+
+# Local Imports
+from os import sys
+from os import path
+
+scope = path.dirname(path.dirname(path.dirname(path.abspath(__file__))))
+sys.path.append(scope)
+
+from coreglobals import get_global_property
+from coreglobals import set_global_property
+from tools.indicators.movingaverages import MovingAverage as MA
+
+# from, import * guard.
+__all__ = ['StreamingSMA', 'StreamingEMA', 'StreamingMACD']
+
+# Stateful counterparts of the batch indicators in 'movingaverages'. Every instance consumes one new close at a
+# time (or a small batch of them) and produces the next indicator value without touching the history.
+#
+# The results are identical to the batch functions: the EMA uses the exact recurrence of the pandas
+# 'adjust=False' implementation, and the SMA evaluates the same convolution over a ring buffer holding the
+# last 'window' values. Until 'window' values were seen, the SMA is the mean of all of them, as the batch
+# function clamps its window to the length of the series.
+#
+# Usage:
+#   sma = indicators.StreamingSMA.from_history(closes, 13)
+#   sma.update(new_close)  # Next value of indicators.MA.sma(closes + [new_close], 13)
+#   sma.preview(open_close)  # Same as update(), but the state is left untouched (an unclosed candle).
+
+
+class StreamingSMA(object):
+    """
+    Incremental Simple Moving Average.
+
+    Each update costs a single dot product over the window, independent of the length of the history.
+
+    :param window (``int``): Length of the averaging window.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.count = 0
+        self.value = np.nan
+
+        self.__weights = np.repeat(1.0, window) / window
+
+        # Every value is written twice, so the last 'window' values are always available as a contiguous
+        # slice of the buffer (oldest first), without any re-ordering.
+        self.__buffer = np.zeros(2 * window)
+
+    @classmethod
+    def from_history(cls, values, window):
+        """
+        Build an instance which continues from the last element of ``MA.sma(values, window)``.
+        """
+        instance = cls(window)
+        instance.update_many(np.asarray(values, dtype=float)[-window:])
+        return instance
+
+    @property
+    def ready(self):
+        return self.count >= self.window
+
+    def __evaluate(self, slot, count):
+        if count < self.window:
+            # Warm-up: the values seen so far fill the first slots of the buffer, see ``MA.sma()``.
+            return np.convolve(self.__buffer[:count], np.repeat(1.0, count) / count, 'valid')[0]
+
+        window = self.__buffer[slot + 1:slot + 1 + self.window]
+        return np.convolve(window, self.__weights, 'valid')[0]
+
+    def update(self, value):
+        slot = self.count % self.window
+        self.__buffer[slot] = value
+        self.__buffer[slot + self.window] = value
+        self.count += 1
+        self.value = self.__evaluate(slot, self.count)
+
+        return self.value
+
+    def update_many(self, values):
+        return np.array([self.update(value) for value in values], dtype=float)
+
+    def preview(self, value):
+        slot = self.count % self.window
+        backup = (self.__buffer[slot], self.__buffer[slot + self.window])
+
+        self.__buffer[slot] = value
+        self.__buffer[slot + self.window] = value
+        result = self.__evaluate(slot, self.count + 1)
+        (self.__buffer[slot], self.__buffer[slot + self.window]) = backup
+
+        return result
+
+
+class StreamingEMA(object):
+    """
+    Incremental Exponential Moving Average (``adjust=False``).
+
+    :param window (``int``): The span of the EMA.
+    :param value (``float``): Optional last EMA value to continue from.
+    """
+
+    def __init__(self, window, value=None):
+        self.window = window
+        self.value = np.nan if value is None else float(value)
+
+        (self.__old_weight, self.__new_weight) = MA.get_ema_weights(window)
+
+    @classmethod
+    def from_history(cls, values, window):
+        """
+        Build an instance which continues from the last element of ``MA.ema(values, window)``.
+        """
+        return cls(window, value=np.asarray(MA.ema(values, window))[-1])
+
+    @property
+    def ready(self):
+        return self.value == self.value
+
+    def __step(self, value):
+        weighted = self.value
+        if weighted != weighted:
+            # The first observation seeds the average.
+            return float(value)
+        if weighted != value:
+            weighted = self.__old_weight * weighted + self.__new_weight * value
+            weighted /= (self.__old_weight + self.__new_weight)
+        return weighted
+
+    def update(self, value):
+        self.value = self.__step(value)
+        return self.value
+
+    def update_many(self, values):
+        return np.array([self.update(value) for value in values], dtype=float)
+
+    def preview(self, value):
+        return self.__step(value)
+
+
+class StreamingMACD(object):
+    """
+    Incremental MACD; every update returns the ``(macd, signal, histogram)`` triplet.
+
+    :param fast_period (``int``): Span of the fast EMA leg.
+    :param slow_period (``int``): Span of the slow EMA leg.
+    :param signal_period (``int``): Span of the signal EMA.
+    """
+
+    def __init__(self, fast_period, slow_period, signal_period):
+        self.fast = StreamingEMA(fast_period)
+        self.slow = StreamingEMA(slow_period)
+        self.signal = StreamingEMA(signal_period)
+
+    @classmethod
+    def from_history(cls, values, fast_period, slow_period, signal_period):
+        """
+        Build an instance which continues from the last element of the batch MACD series.
+        """
+        fast = np.asarray(MA.ema(values, fast_period))
+        slow = np.asarray(MA.ema(values, slow_period))
+        macd = fast - slow
+
+        instance = cls(fast_period, slow_period, signal_period)
+        instance.fast.value = fast[-1]
+        instance.slow.value = slow[-1]
+        instance.signal.value = np.asarray(MA.ema(macd, signal_period))[-1]
+        return instance
+
+    @property
+    def value(self):
+        macd = self.fast.value - self.slow.value
+        return (macd, self.signal.value, macd - self.signal.value)
+
+    def update(self, value):
+        macd = self.fast.update(value) - self.slow.update(value)
+        signal = self.signal.update(macd)
+        return (macd, signal, macd - signal)
+
+    def update_many(self, values):
+        results = np.array([self.update(value) for value in values], dtype=float)
+        return results.reshape(-1, 3)
+
+    def preview(self, value):
+        macd = self.fast.preview(value) - self.slow.preview(value)
+        signal = self.signal.preview(macd)
+        return (macd, signal, macd - signal)
+
+# vim: ts=4 ft=python nowrap fdm=marker
@@ -0,0 +1,404 @@
+# Global Imports
+import itertools
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+
+# Local Imports
+from os import sys
+from os import path
+
+# A crude solution, but should be fixed eventually.
+# 'scope' is '<PROJECT_ROOT>/<APP_ROOT>'
+#       for example: /home/me/dev/my-project/my-bokeh-app
+# WARNING: This hack is required to import the local modules from within the current module depth.
+scope = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.append(scope)
+
+from coreglobals import get_global_property
+from coreglobals import set_global_property
+from coreglobals import debug_print
+import tools.utils as utils
+import tools.indicators as indicators
+import tools.wrappers as wrappers
+
+# from, import * guard.
+__all__ = ['FrameBuffer', 'LiveSeries', 'LiveFeed', 'get_live_feed']
+
+# Live tailing of the data files: a single thread per process follows the lines appended to the files displayed by
+# the sessions (see ``utils.FileTailer``), and pushes the new versions of a series to every session showing it.
+#
+# A series is keyed by the load job of its sessions (pair, timeframe, indicator configuration...), without the
+# version of the file. Its last candle is the unclosed one (dropped from the data container by
+# ``wrappers.get_data_container()``): a line repeating its timestamp patches it, a line with a newer timestamp
+# closes it and appends it to the container. The indicators of the new candles are continued from the history by
+# the streaming indicators (see ``indicators.StreamingSMA``), so the history is never computed again.
+#
+# Usage:
+#   update = MyUpdater(..., document=curdoc(), live=get_live_feed())
+
+# Seconds between two checks of the followed files.
+POLL_INTERVAL = 1.0
+
+# Columns of a candle, as parsed from the *.csv lines.
+CANDLE_COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+__feed = None
+__feed_lock = threading.Lock()
+
+
+def my_public_method():
+    # Test if we have access to the global properties.
+    NAMESPACE = get_global_property('APP_NAME') + "." + __name__
+    print('{}: Module accessed.'.format(NAMESPACE))
+
+
+class FrameBuffer(object):
+    """
+    Columns of a data-frame, with room for appended rows. The columns are grouped per type in 2D blocks (see
+    ``utils.sharedstore.pack_container()``), which pandas uses as is: the frames returned by ``get_frame()`` are
+    views of the blocks, and appending rows only writes the new rows. The rows are never modified once written,
+    so the frames already returned are not changed by an append. The column order of the frames may differ.
+
+    :param frame (``Pandas Object``): Initial rows.
+    :param capacity (``int``): Number of rows to make room for.
+    """
+
+    def __init__(self, frame, capacity):
+        self.length = len(frame)
+        self.capacity = max(capacity, self.length)
+
+        # (columns, 2D block), and the codes of the categorical columns with their categories.
+        self.__blocks = []
+        self.__categories = {}
+
+        for dtype in pd.unique(frame.dtypes.values):
+            if isinstance(dtype, pd.CategoricalDtype):
+                continue
+            columns = [name for name in frame.columns if frame[name].dtype == dtype]
+            block = np.empty((len(columns), self.capacity), dtype=dtype)
+            for (row, name) in enumerate(columns):
+                block[row, :self.length] = frame[name].values
+            self.__blocks.append((columns, block))
+
+        for name in frame.columns:
+            if isinstance(frame[name].dtype, pd.CategoricalDtype):
+                codes = np.empty(self.capacity, dtype=frame[name].values.codes.dtype)
+                codes[:self.length] = frame[name].values.codes
+                self.__categories[name] = (codes, frame[name].dtype)
+
+    def append(self, frame):
+        """
+        Write rows past the current ones, and return 'False' (writing nothing) if there is not enough room.
+        """
+        (start, stop) = (self.length, self.length + len(frame))
+
+        if stop > self.capacity:
+            return False
+
+        for (columns, block) in self.__blocks:
+            for (row, name) in enumerate(columns):
+                block[row, start:stop] = frame[name].values
+
+        for (name, (codes, dtype)) in self.__categories.items():
+            codes[start:stop] = pd.Categorical(frame[name].values, dtype=dtype).codes
+
+        self.length = stop
+        return True
+
+    def get_frame(self):
+        """
+        Return the rows written so far, as a data-frame viewing the blocks.
+        """
+        frames = [pd.DataFrame(block[:, :self.length].T, columns=columns, copy=False)
+                  for (columns, block) in self.__blocks]
+        frame = pd.concat(frames, axis=1, copy=False) if len(frames) > 1 else frames[0]
+
+        for (name, (codes, dtype)) in self.__categories.items():
+            frame[name] = pd.Categorical.from_codes(codes[:self.length], dtype=dtype)
+
+        return frame
+
+
+class LiveSeries(object):
+    """
+    Data container of a series following the lines appended to its *.csv file.
+
+    The container (data-frame and limits) and the unclosed candle (a single row data-frame, with the columns of
+    the container) are replaced on every change, so the versions handed to the sessions are never modified.
+
+    :param job (``dict``): Load job of the series, see ``MyUpdater``.
+    """
+
+    def __init__(self, job):
+        self.key = job['key'][:-1]
+        self.job = job
+
+        self.__load()
+
+    def __load(self):
+        """
+        Import the file (once), and follow it from its current end.
+        """
+        job = self.job
+
+        # The size is read first: lines appended during the import are read again by the tailer, which is
+        # harmless as the candles are applied by timestamp.
+        offset = utils.IO.get_file_signature(job['file'])[0]
+
+        raw_df = wrappers.get_raw_data(source_file=job['file'], field=job['field'], tail=job['history'])
+
+        self.tailer = utils.FileTailer(job['file'], offset=offset)
+        self.columns = utils.tailer.read_csv_header(job['file'])
+        self.container = wrappers.get_data_container(raw_df, MA=job['ma'], MACD=job['macd'], drop_last=True,
+                                                     compact_dtypes=job['compact_dtypes'])
+
+        # Closed candles of the container, with room for the next ones (made on the first one).
+        self.__buffer = None
+
+        # Indicator states at the last closed candle (float64, whatever the types of the container).
+        closes = raw_df['close'].values[:-1].astype(float)
+        ma = job['ma']
+        macd = job['macd']
+
+        if ma['type'] == 'SMA':
+            self.__ma = [indicators.StreamingSMA.from_history(closes, ma[name])
+                         for name in ('slow_period', 'fast_period')]
+        else:
+            self.__ma = [indicators.StreamingEMA.from_history(closes, ma[name]) if len(closes)
+                         else indicators.StreamingEMA(ma[name]) for name in ('slow_period', 'fast_period')]
+
+        macd_periods = (macd['fast_period'], macd['slow_period'], macd['signal_period'])
+        self.__macd = indicators.StreamingMACD.from_history(closes, *macd_periods) if len(closes) \
+            else indicators.StreamingMACD(*macd_periods)
+
+        self.__candle = None
+        if len(raw_df):
+            self.__candle = {name: raw_df[name].iat[-1] for name in CANDLE_COLUMNS}
+
+        self.__set_candle(self.__candle)
+
+    @property
+    def signature(self):
+        """
+        Version of the file matching the container, 'None' while a line is still being written.
+        """
+        signature = utils.IO.get_file_signature(self.job['file'])
+        return signature if signature[0] == self.tailer.offset else None
+
+    def refresh(self):
+        """
+        Apply the lines appended to the file since the last call, and return 'True' if the series changed.
+        """
+        lines = self.tailer.read()
+
+        if lines is None:
+            # Truncated or replaced, the file is imported again.
+            self.__load()
+            return True
+
+        if not lines:
+            return False
+
+        rows = utils.tailer.parse_csv_lines(lines, self.columns)
+        selected = rows['pair'] == self.job['field']
+
+        closed = []
+        candle = self.__candle
+
+        for values in zip(*(rows[name][selected] for name in CANDLE_COLUMNS)):
+            row = dict(zip(CANDLE_COLUMNS, values))
+
+            if candle is None or row['timestamp'] > candle['timestamp']:
+                if candle is not None:
+                    closed.append(candle)
+                candle = row
+            elif row['timestamp'] == candle['timestamp']:
+                candle = row
+
+        if not closed and candle == self.__candle:
+            return False
+
+        if closed:
+            self.__extend(closed)
+
+        self.__set_candle(candle)
+        return True
+
+    def __set_candle(self, candle):
+        self.__candle = candle
+        self.candle = None if candle is None else self.__get_frame([self.__get_row(candle, close=False)])
+
+        debug_print('[DEBUG] Live {} ({}): {} closed candle(s).', self.job['field'], self.job['timeframe'],
+                    len(self.container[0]))
+
+    def __get_row(self, candle, close=True):
+        """
+        Return the container columns of a candle. The indicator states move forward for a closed candle only.
+        """
+        price = candle['close']
+
+        if close:
+            (ma_slow, ma_fast) = (ma.update(price) for ma in self.__ma)
+            (macd, macd_signal, macd_histogram) = self.__macd.update(price)
+        else:
+            (ma_slow, ma_fast) = (ma.preview(price) for ma in self.__ma)
+            (macd, macd_signal, macd_histogram) = self.__macd.preview(price)
+
+        return dict(candle,
+                    date=pd.Timestamp(candle['timestamp'], unit='s'),
+                    pair=self.job['field'],
+                    ma_slow=ma_slow,
+                    ma_fast=ma_fast,
+                    candle_bound_min=candle['low'],
+                    candle_bound_max=candle['high'],
+                    macd=macd,
+                    macds=macd_signal,
+                    macdh=macd_histogram,
+                    macd_bound_min=np.minimum.reduce([macd, macd_signal, macd_histogram]),
+                    macd_bound_max=np.maximum.reduce([macd, macd_signal, macd_histogram]),
+                    volume_bound_min=0,
+                    volume_bound_max=candle['volume'],
+                    direction=int(not price < candle['open']))
+
+    def __get_frame(self, rows):
+        """
+        Return rows following the container, in its columns and types.
+        """
+        data_df = self.container[0]
+        start = len(data_df)
+
+        return pd.DataFrame({name: pd.Series([row[name] for row in rows], dtype=data_df[name].dtype).values
+                             for name in data_df.columns}, index=pd.RangeIndex(start, start + len(rows)))
+
+    def __extend(self, candles):
+        """
+        Append closed candles to the container, updating its limits and range index. Both the rows and the index
+        are appended in place (see ``FrameBuffer`` and ``utils.AutoscaleIndex.append()``), the room doubling
+        when full, so a closed candle costs O(1) amortized whatever the length of the history.
+        """
+        (data_df, limits) = self.container
+        new_df = self.__get_frame([self.__get_row(candle) for candle in candles])
+
+        limits = dict(limits)
+        for (name, column, reduce) in (('volume_min_limit', 'volume_bound_min', np.fmin),
+                                       ('volume_max_limit', 'volume_bound_max', np.fmax),
+                                       ('macd_min_limit', 'macd_bound_min', np.fmin),
+                                       ('macd_max_limit', 'macd_bound_max', np.fmax),
+                                       ('candles_min_limit', 'candle_bound_min', np.fmin),
+                                       ('candles_max_limit', 'candle_bound_max', np.fmax)):
+            limits[name] = reduce(limits[name], reduce.reduce(wrappers.get_container_column(new_df, column)))
+
+        if self.__buffer is None or not self.__buffer.append(new_df):
+            self.__buffer = FrameBuffer(data_df, 2 * (len(data_df) + len(new_df)))
+            self.__buffer.append(new_df)
+
+        limits['range_index'] = limits['range_index'].append(*wrappers.get_range_index_rows(new_df))
+
+        self.container = (self.__buffer.get_frame(), limits)
+
+
+class LiveFeed(object):
+    """
+    Process wide follower of the data files displayed by the subscribed sessions (``MyUpdater`` instances).
+
+    A series is only followed once its file changed since a session loaded it, and as long as a session displays
+    it. Every new version of a series is pushed to the sessions showing it, see ``MyUpdater.push_live()``.
+
+    :param interval (``float``): Polling interval (seconds).
+    """
+
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+
+        self.__sessions = weakref.WeakSet()
+        self.__series = {}
+        self.__versions = {}
+        self.__counter = itertools.count(1)
+        self.__lock = threading.Lock()
+        self.__thread = None
+        self.__stop = threading.Event()
+
+    def subscribe(self, session):
+        """
+        Follow the series displayed by a session. The polling thread is started on the first subscription.
+        """
+        with self.__lock:
+            self.__sessions.add(session)
+
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, name='live', daemon=True)
+                self.__thread.start()
+
+    def unsubscribe(self, session):
+        with self.__lock:
+            self.__sessions.discard(session)
+
+    def stop(self):
+        self.__stop.set()
+
+    def __run(self):
+        while not self.__stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print('[ERROR] Live update failed: {}'.format(e))
+
+    def poll(self):
+        """
+        Check the followed files once, and push the changed series to their sessions.
+        """
+        with self.__lock:
+            sessions = list(self.__sessions)
+
+        groups = {}
+        for session in sessions:
+            job = session.get_live_job()
+            if job is not None:
+                groups.setdefault(job['key'][:-1], (job, []))[1].append(session)
+
+        # Series no longer displayed are released.
+        for key in [key for key in self.__series if key not in groups]:
+            del self.__series[key]
+            del self.__versions[key]
+
+        for key, (job, members) in groups.items():
+            series = self.__series.get(key)
+
+            try:
+                if series is None:
+                    if utils.IO.get_file_signature(job['file']) == tuple(job['version']):
+                        continue
+                    series = self.__series[key] = LiveSeries(job)
+                    self.__versions[key] = next(self.__counter)
+                elif series.refresh():
+                    self.__versions[key] = next(self.__counter)
+            except Exception as e:
+                print('[ERROR] Unable to follow {} ({}): {}'.format(job['field'], job['timeframe'], e))
+                self.__series.pop(key, None)
+                self.__versions.pop(key, None)
+                continue
+
+            # Versions are unique within the process, so a session never mistakes a rebuilt series for the
+            # version it displays.
+            version = (key, self.__versions[key])
+            signature = series.signature
+
+            for session in members:
+                if session.live_version != version:
+                    session.push_live(version, series.container, series.candle, signature)
+
+
+def get_live_feed():
+    """
+    Return the process wide live feed, shared by the sessions of the server process.
+    """
+    global __feed
+
+    with __feed_lock:
+        if __feed is None:
+            __feed = LiveFeed()
+        return __feed
+
+# vim: ts=4 ft=python nowrap fdm=marker
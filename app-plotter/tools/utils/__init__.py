@@ -12,6 +12,12 @@ the main application once defined inside this module header file.
 
 from .core import *
 from .io import InputOutput as IO
+from .cache import LRUCache
+from .rangequery import MinMaxIndex, AutoscaleIndex
+from .metrics import MetricsRegistry, MetricsHandler
+from .columnstore import ColumnStore
+from .sharedstore import SharedStore, get_shared_store
+from .tailer import FileTailer
 
 __version__ = 'dev-v0.0.1'
 __name__ = 'tools.utils'
@@ -0,0 +1,131 @@
+# Global Imports
+from collections import OrderedDict
+import threading
+import numpy as np
+import pandas as pd
+
+# Local Imports
+from os import sys
+from os import path
+
+scope = path.dirname(path.dirname(path.dirname(path.abspath(__file__))))
+sys.path.append(scope)
+
+from coreglobals import get_global_property
+from coreglobals import set_global_property
+
+# from, import * guard.
+__all__ = ['LRUCache']
+
+# Default memory budget of a cache instance (bytes).
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
+
+
+def get_object_size(value):
+    """
+    Estimate the memory footprint of a cached value (bytes).
+
+    DataFrames and NumPy arrays report their buffers, containers are measured recursively.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    elif isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    elif isinstance(value, np.ndarray) or hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    elif isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(get_object_size(item) for item in value)
+    elif isinstance(value, dict):
+        return sys.getsizeof(value) + sum(get_object_size(item) for item in value.values())
+    return sys.getsizeof(value)
+
+
+class LRUCache(object):
+    """
+    A bounded least-recently-used cache.
+
+    Entries are evicted (oldest access first) once the estimated memory of all the stored values
+    exceeds ``max_bytes``. A value larger than the whole budget is not stored at all.
+
+    :param max_bytes (``int``): Memory budget of the cache (bytes).
+    :param sizeof (``callable``): Function used to estimate the size of a value.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_SIZE, sizeof=get_object_size):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self.__entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+
+        with self.__lock:
+            if key in self.__entries:
+                self.current_bytes -= self.__entries.pop(key)[1]
+
+            if size > self.max_bytes:
+                return
+
+            self.__entries[key] = (value, size)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                (_, (_, evicted_size)) = self.__entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self.__lock:
+            entry = self.__entries.pop(key, None)
+            if entry is None:
+                return default
+
+            self.current_bytes -= entry[1]
+            return entry[0]
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        return dict(entries=len(self.__entries),
+                    bytes=self.current_bytes,
+                    max_bytes=self.max_bytes,
+                    hits=self.hits,
+                    misses=self.misses,
+                    evictions=self.evictions)
+
+    def __contains__(self, key):
+        return key in self.__entries
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __str__(self):
+        return 'LRUCache(entries={entries}, bytes={bytes}/{max_bytes}, hits={hits}, misses={misses}, ' \
+               'evictions={evictions})'.format(**self.stats())
+
+
+# Process wide cache, shared by all the sessions of a server process (the cached values must not be modified).
+SHARED_CACHE = LRUCache(max_bytes=DEFAULT_CACHE_SIZE)
+
+# vim: ts=4 ft=python nowrap fdm=marker
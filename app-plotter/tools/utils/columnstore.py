@@ -0,0 +1,218 @@
+# Global Imports
+import json
+import os
+import shutil
+import time
+import threading
+import numpy as np
+import pandas as pd
+
+# Local Imports
+from os import sys
+from os import path
+
+scope = path.dirname(path.dirname(path.dirname(path.abspath(__file__))))
+sys.path.append(scope)
+
+from coreglobals import get_global_property
+from coreglobals import set_global_property
+from coreglobals import debug_print
+
+from .io import get_file_signature, get_table
+
+# from, import * guard.
+__all__ = ['ColumnStore']
+
+# A store holds the series of one timeframe, for example data/store/5m for data/data_5m.csv:
+#   <store>/meta.json                       columns, pairs and row counts of the current generation
+#   <store>/<generation>/<pair>/<column>    fixed-width column files (native byte order), one per column
+# A conversion writes a new generation next to the current one and then replaces the manifest, so the
+# readers (which memory-map the column files) never see a partially written series.
+META_FILE = 'meta.json'
+
+# Columns of the store and their types, in the order of the data files.
+STORE_COLUMNS = (
+    ('timestamp', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+)
+
+# Bump this whenever the layout of the store changes.
+STORE_FORMAT_VERSION = 1
+
+# Opened stores, keyed by directory and refreshed when the manifest is replaced.
+__stores = {}
+__stores_lock = threading.Lock()
+
+
+def my_public_method():
+    # Test if we have access to the global properties.
+    NAMESPACE = get_global_property('APP_NAME') + "." + __name__
+    print('{}: Module accessed.'.format(NAMESPACE))
+
+
+def get_pair_slug(pair):
+    """
+    Return the directory name of a pair, for example 'BTC-EUR' for 'BTC/EUR'.
+    """
+    return pair.replace('/', '-')
+
+
+def is_store(source):
+    """
+    Return ``True`` if 'source' is the directory of a column store (rather than a *.csv file).
+    """
+    return path.isfile(path.join(source, META_FILE))
+
+
+def get_row_range(timestamps, start=None, end=None, tail=None):
+    """
+    Return the ``[lo, hi)`` rows of sorted timestamps within ``[start, end]``, keeping the last 'tail' rows
+    at most. The binary searches only touch a few (memory-mapped) pages of the timestamps.
+
+    :param timestamps (``array like``): Sorted epoch seconds.
+    :param start (``int``): First epoch second (optional).
+    :param end (``int``): Last epoch second (optional).
+    :param tail (``int``): Maximum number of rows, the most recent ones are kept (optional).
+    """
+    lo = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+    hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side='right'))
+
+    if tail is not None:
+        lo = max(lo, hi - tail)
+
+    return (lo, max(lo, hi))
+
+
+def convert_csv_data(csv_file, store_dir):
+    """
+    Convert a *.csv data file (see ``utils.IO.import_csv_data()``) into a column store.
+
+    :param csv_file (``str``): Path of the *.csv file.
+    :param store_dir (``str``): Directory of the store, created if needed.
+    :return (``dict``): The manifest of the store.
+    """
+    table = get_table(csv_file)
+    generation = 'g{:x}'.format(time.time_ns())
+
+    os.makedirs(path.join(store_dir, generation))
+
+    pairs = {}
+    for pair, (start, stop) in table['partitions'].items():
+        pair_dir = path.join(store_dir, generation, get_pair_slug(pair))
+        os.makedirs(pair_dir)
+
+        for name, dtype in STORE_COLUMNS:
+            np.ascontiguousarray(table['arrays'][name][start:stop], dtype=dtype).tofile(path.join(pair_dir, name))
+
+        pairs[pair] = dict(dir=get_pair_slug(pair), rows=stop - start)
+
+    meta = dict(format=STORE_FORMAT_VERSION,
+                source=path.abspath(csv_file),
+                source_signature=list(table['signature']),
+                generation=generation,
+                columns=[list(column) for column in STORE_COLUMNS],
+                pairs=pairs)
+
+    # Written aside first, the readers switch to the new generation at once.
+    meta_file = path.join(store_dir, META_FILE)
+    tmp_file = '{}.{}.tmp'.format(meta_file, os.getpid())
+
+    with open(tmp_file, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_file, meta_file)
+
+    # The readers still mapping the previous generation keep their (unlinked) files.
+    for name in os.listdir(store_dir):
+        if name != generation and name.startswith('g') and path.isdir(path.join(store_dir, name)):
+            shutil.rmtree(path.join(store_dir, name), ignore_errors=True)
+
+    debug_print('STORE\t: {} -> {} ({} pairs)', csv_file, store_dir, len(pairs))
+
+    return meta
+
+
+def open_store(store_dir):
+    """
+    Return the manifest of a store and its (lazily) memory-mapped columns, see ``open_pair_columns()``.
+
+    Opening a store only reads its manifest, whatever the number of rows.
+    """
+    signature = get_file_signature(path.join(store_dir, META_FILE))
+
+    with __stores_lock:
+        store = __stores.get(store_dir)
+
+        if store is None or store['signature'] != signature:
+            with open(path.join(store_dir, META_FILE)) as f:
+                meta = json.load(f)
+
+            if meta.get('format') != STORE_FORMAT_VERSION:
+                raise ValueError('Unsupported store format: {} ({})'.format(meta.get('format'), store_dir))
+
+            store = __stores[store_dir] = dict(signature=signature, meta=meta, columns={})
+
+    return store
+
+
+def open_pair_columns(store_dir, pair):
+    """
+    Return the ``{name: np.memmap}`` columns of a pair (empty arrays for an unknown pair). Nothing is read
+    until the arrays are accessed, and then only the pages sliced.
+    """
+    store = open_store(store_dir)
+    columns = store['columns'].get(pair)
+
+    if columns is None:
+        meta = store['meta']
+        info = meta['pairs'].get(pair)
+        columns = {}
+
+        for name, dtype in meta['columns']:
+            if info is None or info['rows'] == 0:
+                # A memory map can not be empty.
+                columns[name] = np.empty(0, dtype=dtype)
+            else:
+                columns[name] = np.memmap(path.join(store_dir, meta['generation'], info['dir'], name),
+                                          dtype=dtype, mode='r', shape=(info['rows'],))
+
+        store['columns'][pair] = columns
+
+    return columns
+
+
+def import_pair_data(store_dir, field, start=None, end=None, tail=None):
+    """
+    Import the rows of a single pair (for example 'BTC/EUR') from a column store into a dataFrame, in the
+    format of ``utils.IO.import_pair_data()``.
+
+    Only the selected rows are read (and copied), see ``get_row_range()`` for 'start', 'end' and 'tail'.
+    An unknown pair results in an empty dataFrame.
+    """
+    columns = open_pair_columns(store_dir, field)
+    (lo, hi) = get_row_range(columns['timestamp'], start=start, end=end, tail=tail)
+
+    pair_df = pd.DataFrame({name: np.array(values[lo:hi]) for name, values in columns.items()})
+    pair_df['pair'] = np.full(hi - lo, field, dtype=object)
+    pair_df['date'] = pd.to_datetime(pair_df['timestamp'], unit='s')
+
+    return pair_df
+
+
+class ColumnStore:
+    # Emulate a secondary name-space in-order to utilise the following usage:
+    #   utils.ColumnStore.import_pair_data()
+    #   utils.ColumnStore.convert_csv_data()
+    #   etc.
+
+    convert_csv_data = convert_csv_data
+    import_pair_data = import_pair_data
+    open_pair_columns = open_pair_columns
+    get_row_range = get_row_range
+    is_store = is_store
+    my_public_method = my_public_method
+
+# vim: ts=4 ft=python nowrap fdm=marker
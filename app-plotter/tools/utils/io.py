@@ -1,4 +1,6 @@
 # Global Imports
+import os
+import numpy as np
 import pandas as pd
 
 # Local Imports
@@ -10,12 +12,23 @@ sys.path.append(scope)
 
 from coreglobals import get_global_property
 from coreglobals import set_global_property
+from coreglobals import debug_print
 
 # module_test()
 
 # from, import * guard.
 __all__ = ['InputOutput']
 
+# Binary cache files are stored beside the source file, for example:
+#   data/data_5m.csv -> data/data_5m.csv.cache.npz
+CACHE_FILE_SUFFIX = '.cache.npz'
+
+# Bump this whenever the layout of the cache file changes, so stale caches are rebuilt.
+CACHE_FORMAT_VERSION = 3
+
+# Imported tables, stored per source file for the life time of the process.
+__tables = {}
+
 
 def my_public_method():
     # Test if we have access to the global properties.
@@ -23,16 +36,186 @@ def my_public_method():
     print('{}: Module accessed.'.format(NAMESPACE))
 
 
-def import_csv_data(csv_file):
-    print('SOURCE\t: {}\nTASK\t: {}'.format(csv_file, 'Import dataset from CSV.'))
-
+def get_file_signature(source_file):
+    """
+    Return a ``(size, mtime_ns)`` tuple used to version anything derived from the source file.
+    """
+    stat = os.stat(source_file)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def get_cache_file(csv_file):
+    return '{}{}'.format(csv_file, CACHE_FILE_SUFFIX)
+
+
+def read_csv_cache(csv_file, signature):
+    """
+    Read the binary cache of a *.csv file back into a table.
+
+    Returns ``None`` if there is no cache, or if it was built from a different version of the source file.
+    """
+    cache_file = get_cache_file(csv_file)
+
+    if not path.isfile(cache_file):
+        return None
+
+    try:
+        with np.load(cache_file, allow_pickle=False) as cache:
+            if tuple(cache['signature']) != (CACHE_FORMAT_VERSION,) + tuple(signature):
+                return None
+
+            columns = [str(name) for name in cache['columns']]
+            arrays = {name: cache['c{}'.format(i)] for i, name in enumerate(columns)}
+            partitions = [str(name) for name in cache['partitions']]
+            offsets = cache['offsets']
+    except (OSError, ValueError, KeyError):
+        # A partially written or corrupted cache is simply rebuilt.
+        return None
+
+    return make_table(signature, columns, arrays, partitions, offsets)
+
+
+def write_csv_cache(csv_file, table):
+    """
+    Store the columns of an imported table as typed NumPy arrays beside the *.csv file.
+    """
+    cache_file = get_cache_file(csv_file)
+
+    partitions = list(table['partitions'])
+    offsets = [table['partitions'][name][0] for name in partitions] + [len(table['arrays']['timestamp'])]
+
+    arrays = dict(
+        signature=np.array((CACHE_FORMAT_VERSION,) + tuple(table['signature']), dtype=np.int64),
+        columns=np.array(table['columns'], dtype=str),
+        partitions=np.array(partitions, dtype=str),
+        offsets=np.array(offsets, dtype=np.int64)
+    )
+
+    for i, name in enumerate(table['columns']):
+        values = table['arrays'][name]
+        if values.dtype == object:
+            # Store strings (the 'pair' column) as fixed width unicode, so no pickling is required.
+            values = values.astype(str)
+        arrays['c{}'.format(i)] = values
+
+    # Write to a temporary file first, so a concurrent reader never sees a partial cache.
+    tmp_file = '{}.{}.tmp'.format(cache_file, os.getpid())
+
+    try:
+        with open(tmp_file, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        # The cache is an optimisation only, a read-only data folder should not break the import.
+        print('CACHE\t: {} ({})'.format('Unable to write the binary cache.', e))
+        if path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def make_table(signature, columns, arrays, partitions, offsets):
+    """
+    Assemble the internal table structure.
+
+    :param signature (``tuple``): Version of the source file, see ``get_file_signature()``.
+    :param columns (``list``): Column names, in the order of the source file.
+    :param arrays (``dict``): Column arrays, with the rows grouped by pair.
+    :param partitions (``list``): Pair names, in the order they are stored.
+    :param offsets (``array like``): Row offsets of each pair, followed by the total row count.
+    """
+    return dict(
+        signature=tuple(signature),
+        columns=list(columns),
+        arrays=arrays,
+        partitions={name: (int(offsets[i]), int(offsets[i + 1])) for i, name in enumerate(partitions)}
+    )
+
+
+def parse_csv_table(csv_file, signature):
+    """
+    Parse a *.csv file into a table where the rows are grouped (partitioned) by pair.
+    """
     df = pd.read_csv(csv_file)
 
+    with open(csv_file, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                # The last line is still being written (see ``utils.FileTailer``).
+                df = df.iloc[:-1]
+
     # new_df = df[['created_date', 'client_name', 'amount']].copy()
     df['time'] = pd.to_datetime(df['timestamp'], unit='s')
     df.rename(columns={'time': 'date'}, inplace=True)
 
-    return df
+    # Group the rows by pair, keeping the order of first appearance and the original order within
+    # each pair. Pairs are normally stored sequentially already, in which case nothing moves.
+    codes, partitions = pd.factorize(df['pair'])
+    order = np.argsort(codes, kind='stable')
+
+    # A line repeating the timestamp of the previous candle of its pair (an appended update of the unclosed
+    # candle, see ``utils.FileTailer``) replaces that candle.
+    timestamps = df['timestamp'].values[order]
+    replaced = (codes[order][1:] == codes[order][:-1]) & (timestamps[1:] == timestamps[:-1])
+    if replaced.any():
+        order = order[np.append(~replaced, True)]
+
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(codes[order], minlength=len(partitions)))))
+
+    arrays = {name: df[name].values[order] for name in df.columns}
+
+    return make_table(signature, df.columns, arrays, partitions, offsets)
+
+
+def get_table(csv_file, use_cache=True):
+    """
+    Return the partitioned table of a *.csv file.
+
+    Tables are kept in memory for the life time of the process and are re-imported once the source
+    file changes. The binary cache is consulted before falling back to parsing the *.csv file.
+    """
+    signature = get_file_signature(csv_file)
+
+    table = __tables.get(csv_file)
+    if table is not None and table['signature'] == signature:
+        return table
+
+    debug_print('SOURCE\t: {}\nTASK\t: {}', csv_file, 'Import dataset from CSV.')
+
+    table = read_csv_cache(csv_file, signature) if use_cache else None
+
+    if table is not None:
+        debug_print('CACHE\t: {}', get_cache_file(csv_file))
+    else:
+        table = parse_csv_table(csv_file, signature)
+        if use_cache:
+            write_csv_cache(csv_file, table)
+
+    __tables[csv_file] = table
+
+    return table
+
+
+def import_csv_data(csv_file, use_cache=True):
+    """
+    Import the full dataset of a *.csv file into a dataFrame. Rows are grouped by pair.
+    """
+    table = get_table(csv_file, use_cache=use_cache)
+
+    return pd.DataFrame({name: table['arrays'][name] for name in table['columns']})
+
+
+def import_pair_data(csv_file, field, use_cache=True):
+    """
+    Import the rows of a single pair (for example 'BTC/EUR') from a *.csv file into a dataFrame.
+
+    Only the rows of the requested pair are copied, using the partition offsets of the table.
+    An unknown pair results in an empty dataFrame.
+    """
+    table = get_table(csv_file, use_cache=use_cache)
+    (start, stop) = table['partitions'].get(field, (0, 0))
+
+    return pd.DataFrame({name: table['arrays'][name][start:stop] for name in table['columns']})
 
 
 class InputOutput:
@@ -42,6 +225,9 @@ class InputOutput:
     #   etc.
 
     import_csv_data = import_csv_data
+    import_pair_data = import_pair_data
+    get_table = get_table
+    get_file_signature = get_file_signature
     my_public_method = my_public_method
 
 # vim: ts=4 ft=python nowrap fdm=marker
@@ -0,0 +1,186 @@
+# Global Imports
+import bisect
+import threading
+import time
+import tornado.web
+
+# Local Imports
+from os import sys
+from os import path
+
+scope = path.dirname(path.dirname(path.dirname(path.abspath(__file__))))
+sys.path.append(scope)
+
+from coreglobals import get_global_property
+from coreglobals import set_global_property
+
+# from, import * guard.
+__all__ = ['MetricsRegistry', 'MetricsHandler', 'span']
+
+# Upper bounds (seconds) of the histogram buckets.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Histogram receiving the durations of the spans, labelled with the span name and the task.
+SPAN_METRIC = 'app_plotter_span_seconds'
+SPAN_METRIC_HELP = 'Duration of the named steps of the updater tasks (seconds).'
+
+# Content type of the Prometheus text exposition format.
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram(object):
+    """
+    Observation counts per bucket (non cumulative), with the sum and the count of the observed values.
+
+    :param buckets (``tuple``): Sorted upper bounds of the buckets, the last (+Inf) bucket is implicit.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        # A value equal to a bound belongs to that bucket (le).
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Span(object):
+    """
+    Context manager observing its duration into a histogram of the registry.
+    """
+    __slots__ = ('registry', 'metric', 'labels', 'start')
+
+    def __init__(self, registry, metric, labels):
+        self.registry = registry
+        self.metric = metric
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.metric, time.perf_counter() - self.start, self.labels)
+        return False
+
+
+class MetricsRegistry(object):
+    """
+    In-process histograms, keyed by the metric name and the label values.
+
+    Usage:
+        registry = MetricsRegistry()
+        with registry.span('load', task='test:select:pair'):
+            ...
+        registry.to_prometheus()
+
+    :param buckets (``tuple``): Upper bounds of the histogram buckets (seconds).
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.__histograms = {}
+        self.__help = {SPAN_METRIC: SPAN_METRIC_HELP}
+        self.__lock = threading.Lock()
+
+    def describe(self, metric, text):
+        """
+        Set the help text of a metric.
+        """
+        self.__help[metric] = text
+
+    def observe(self, metric, value, labels=()):
+        """
+        Add an observation to the histogram of a metric.
+
+        :param metric (``str``): Metric name.
+        :param value (``float``): Observed value.
+        :param labels (``tuple``): Sorted (name, value) pairs of the labels.
+        """
+        key = (metric, labels)
+
+        with self.__lock:
+            histogram = self.__histograms.get(key)
+            if histogram is None:
+                histogram = self.__histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def span(self, name, metric=SPAN_METRIC, **labels):
+        """
+        Return a context manager timing a named span, for example ``with registry.span('load', task=task):``.
+        """
+        labels['span'] = name
+        return Span(self, metric, tuple(sorted(labels.items())))
+
+    def get_histogram(self, metric, **labels):
+        """
+        Return the histogram of a metric for the given labels, or ``None``.
+        """
+        return self.__histograms.get((metric, tuple(sorted(labels.items()))))
+
+    def clear(self):
+        with self.__lock:
+            self.__histograms.clear()
+
+    def to_prometheus(self):
+        """
+        Render all the histograms in the Prometheus text exposition format.
+        """
+        with self.__lock:
+            items = sorted((key, (list(histogram.counts), histogram.sum, histogram.count))
+                           for key, histogram in self.__histograms.items())
+
+        lines = []
+        previous_metric = None
+
+        for (metric, labels), (counts, total, count) in items:
+            if metric != previous_metric:
+                lines.append('# HELP {} {}'.format(metric, self.__help.get(metric, metric)))
+                lines.append('# TYPE {} histogram'.format(metric))
+                previous_metric = metric
+
+            label_text = ','.join('{}="{}"'.format(name, escape_label_value(value)) for name, value in labels)
+            separator = ',' if label_text else ''
+
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append('{}_bucket{{{}{}le="{}"}} {}'.format(metric, label_text, separator, bound, cumulative))
+
+            label_set = '{' + label_text + '}' if label_text else ''
+            lines.append('{}_sum{} {!r}'.format(metric, label_set, total))
+            lines.append('{}_count{} {}'.format(metric, label_set, count))
+
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+    """
+    Tornado handler serving the default registry in the Prometheus text format, for example as an extra route of
+    the Bokeh server: ``Server(..., extra_patterns=[('/metrics', MetricsHandler)])``.
+    """
+
+    def get(self):
+        self.set_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+        self.write(REGISTRY.to_prometheus())
+
+
+def escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Process wide registry, shared by all the sessions of the server.
+REGISTRY = MetricsRegistry()
+
+
+def span(name, **labels):
+    """
+    Time a named span into the process wide registry, see ``MetricsRegistry.span()``.
+    """
+    return REGISTRY.span(name, **labels)
+
+# vim: ts=4 ft=python nowrap fdm=marker
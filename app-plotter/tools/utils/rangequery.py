@@ -0,0 +1,229 @@
+# Global Imports
+import numpy as np
+
+# Local Imports
+from os import sys
+from os import path
+
+scope = path.dirname(path.dirname(path.dirname(path.abspath(__file__))))
+sys.path.append(scope)
+
+from coreglobals import get_global_property
+from coreglobals import set_global_property
+
+# from, import * guard.
+__all__ = ['MinMaxIndex', 'AutoscaleIndex']
+
+
+class MinMaxIndex(object):
+    """
+    Range minimum/maximum queries over a pair of lower and upper bound arrays.
+
+    Both bounds are stored in a bottom-up segment tree: building is O(n) (vectorized per tree level),
+    the memory is O(n) and a query over any range of positions is O(log n).
+
+    :param lows (``array like``): Lower bounds, the minimum of a range is taken from these values.
+    :param highs (``array like``): Upper bounds, the maximum of a range is taken from these values.
+    :param dtype (``numpy dtype``): Type of the trees, for example ``np.float32`` for float32 bounds.
+    :param capacity (``int``): Number of positions the trees have room for, see ``append()`` (optional).
+    """
+
+    def __init__(self, lows, highs, dtype=float, capacity=None):
+        self.length = len(lows)
+
+        # Number of leaves, rounded up to a power of two.
+        self.__leaves = 1 << max(max(self.length, capacity or 0) - 1, 0).bit_length()
+
+        self.__min_tree = self.__build(np.asarray(lows, dtype=dtype), np.minimum, np.inf)
+        self.__max_tree = self.__build(np.asarray(highs, dtype=dtype), np.maximum, -np.inf)
+
+    def __build(self, values, reducer, identity):
+        tree = np.full(2 * self.__leaves, identity, dtype=values.dtype)
+        tree[self.__leaves:self.__leaves + self.length] = values
+
+        # Every parent node 'i' reduces its children '2i' and '2i + 1', one tree level at a time.
+        start = self.__leaves // 2
+        while start >= 1:
+            tree[start:2 * start] = reducer(tree[2 * start:4 * start:2], tree[2 * start + 1:4 * start:2])
+            start //= 2
+
+        return tree
+
+    @classmethod
+    def from_arrays(cls, length, min_tree, max_tree):
+        """
+        Restore an index from the trees returned by ``to_arrays()``, for example views of a shared memory
+        segment. The trees are used as is (neither built nor copied).
+        """
+        index = cls.__new__(cls)
+        index.length = length
+        index.__leaves = len(min_tree) // 2
+        index.__min_tree = min_tree
+        index.__max_tree = max_tree
+        return index
+
+    def to_arrays(self):
+        return dict(min_tree=self.__min_tree, max_tree=self.__max_tree)
+
+    def append(self, lows, highs):
+        """
+        Return an index of these positions followed by new bounds, in O(k + log n) for k new positions.
+
+        The trees are shared: the new leaves and their ancestors are written past the positions of this index,
+        and a query only reads the nodes within its range, so the results of this index do not change (even
+        during the update). Only the last index of a sequence may be extended. Once the trees are full, they are
+        built again with twice the room.
+        """
+        (start, stop) = (self.length, self.length + len(lows))
+
+        if stop > self.__leaves:
+            leaves = slice(self.__leaves, self.__leaves + self.length)
+            return MinMaxIndex(np.concatenate((self.__min_tree[leaves], lows)),
+                               np.concatenate((self.__max_tree[leaves], highs)),
+                               dtype=self.__min_tree.dtype, capacity=2 * stop)
+
+        for (tree, values, reducer) in ((self.__min_tree, lows, np.minimum), (self.__max_tree, highs, np.maximum)):
+            (lo, hi) = (self.__leaves + start, self.__leaves + stop)
+            tree[lo:hi] = values
+
+            # The parents of the nodes '[lo, hi)', one tree level at a time.
+            while lo > 1:
+                (lo, hi) = (lo // 2, (hi + 1) // 2)
+                tree[lo:hi] = reducer(tree[2 * lo:2 * hi:2], tree[2 * lo + 1:2 * hi:2])
+
+        return MinMaxIndex.from_arrays(stop, self.__min_tree, self.__max_tree)
+
+    @property
+    def nbytes(self):
+        return self.__min_tree.nbytes + self.__max_tree.nbytes
+
+    def query(self, lo, hi):
+        """
+        Return the ``(min, max)`` of the positions ``[lo, hi)``, or ``None`` for an empty range.
+        """
+        lo, hi = max(lo, 0), min(hi, self.length)
+
+        if lo >= hi:
+            return None
+
+        min_tree, max_tree = self.__min_tree, self.__max_tree
+        result_min, result_max = np.inf, -np.inf
+
+        lo += self.__leaves
+        hi += self.__leaves
+
+        while lo < hi:
+            if lo & 1:
+                result_min = min(result_min, min_tree[lo])
+                result_max = max(result_max, max_tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                result_min = min(result_min, min_tree[hi])
+                result_max = max(result_max, max_tree[hi])
+            lo >>= 1
+            hi >>= 1
+
+        return (float(result_min), float(result_max))
+
+
+class AutoscaleIndex(object):
+    """
+    Visible window limits of the candlestick, volume and MACD plots.
+
+    A binary search on the (sorted) time column finds the rows of the window, the limits of each plot are
+    then answered by its ``MinMaxIndex`` in O(log n).
+
+    :param times (``array like``): Sorted times (epoch milliseconds).
+    :param bounds (``dict``): ``{'candles': (lows, highs), 'volume': (lows, highs), 'macd': (lows, highs)}``
+    :param dtype (``numpy dtype``): Type of the trees of the bounds.
+    """
+
+    def __init__(self, times, bounds, dtype=float):
+        self.times = np.asarray(times, dtype=float)
+        self.indices = {name: MinMaxIndex(lows, highs, dtype=dtype) for name, (lows, highs) in bounds.items()}
+
+        # The times, with room for appended rows (see ``append()``).
+        self.__times = self.times
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Restore an index from the arrays returned by ``to_arrays()``, without building or copying them.
+        """
+        index = cls.__new__(cls)
+        index.times = arrays['times']
+        index.indices = {}
+        index.__times = index.times
+
+        for key in arrays:
+            (name, _, tree) = key.partition('.')
+            if tree == 'min_tree':
+                index.indices[name] = MinMaxIndex.from_arrays(len(index.times), arrays[key],
+                                                              arrays[name + '.max_tree'])
+        return index
+
+    def to_arrays(self):
+        """
+        Return the times and the trees of the index as flat ``{name: array}`` items, for example
+        ``{'times': ..., 'candles.min_tree': ..., 'candles.max_tree': ...}``.
+        """
+        arrays = dict(times=self.times)
+        for name, index in self.indices.items():
+            arrays.update(('{}.{}'.format(name, tree), values) for tree, values in index.to_arrays().items())
+        return arrays
+
+    def append(self, times, bounds):
+        """
+        Return an index of these rows followed by new ones (``times`` and ``bounds`` as for the constructor).
+
+        The arrays are shared with the returned index, see ``MinMaxIndex.append()``: the cost of an append is
+        proportional to the number of new rows (amortized), instead of building the whole index again.
+        """
+        (start, stop) = (len(self.times), len(self.times) + len(times))
+
+        buffer = self.__times
+        if stop > len(buffer):
+            buffer = np.empty(2 * stop)
+            buffer[:start] = self.times
+        buffer[start:stop] = times
+
+        index = AutoscaleIndex.__new__(AutoscaleIndex)
+        index.times = buffer[:stop]
+        index.indices = {name: self.indices[name].append(lows, highs) for name, (lows, highs) in bounds.items()}
+        index.__times = buffer
+        return index
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + sum(index.nbytes for index in self.indices.values())
+
+    def get_positions(self, start, end, times=None):
+        """
+        Return the ``[lo, hi)`` row positions covering the ``[start, end]`` time window.
+
+        An alternative (for example displayed) time column of the same rows can be supplied.
+        """
+        times = self.times if times is None else times
+        return (int(np.searchsorted(times, start, side='left')),
+                int(np.searchsorted(times, end, side='right')))
+
+    def get_position_limits(self, lo, hi):
+        """
+        Return the limits of the ``[lo, hi)`` rows in the format of the ``get_data_container()`` limits,
+        or ``None`` if the range holds no rows.
+        """
+        limits = {}
+
+        for name, index in self.indices.items():
+            result = index.query(lo, hi)
+            if result is None:
+                return None
+            (limits['{}_min_limit'.format(name)], limits['{}_max_limit'.format(name)]) = result
+
+        return limits
+
+    def get_limits(self, start, end, times=None):
+        return self.get_position_limits(*self.get_positions(start, end, times=times))
+
+# vim: ts=4 ft=python nowrap fdm=marker
@@ -0,0 +1,459 @@
+# Global Imports
+import hashlib
+import json
+import os
+import signal
+import tempfile
+import threading
+import time
+import weakref
+import numpy as np
+import pandas as pd
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+
+# Local Imports
+from os import sys
+from os import path
+
+scope = path.dirname(path.dirname(path.dirname(path.abspath(__file__))))
+sys.path.append(scope)
+
+from coreglobals import get_global_property
+from coreglobals import set_global_property
+from coreglobals import debug_print
+
+from .rangequery import AutoscaleIndex
+
+# from, import * guard.
+__all__ = ['SharedStore', 'get_shared_store', 'run_loader']
+
+# Directory holding the manifest and the pending requests of a store (not the data, which lives in the
+# shared memory segments).
+DEFAULT_STORE_DIR = path.join(tempfile.gettempdir(), 'request-plotter-store')
+
+MANIFEST_FILE = 'manifest.json'
+REQUESTS_DIR = 'requests'
+
+# Bump this whenever the layout of the segments or of the manifest changes.
+STORE_FORMAT_VERSION = 1
+
+# Arrays are aligned within the segments, so the views are as fast as any other array.
+SEGMENT_ALIGNMENT = 64
+
+# Polling interval of the loader (requests and source versions) and of the readers waiting for a container.
+POLL_INTERVAL = 0.05
+LOADER_INTERVAL = 0.2
+
+# Process wide stores, keyed by directory.
+__stores = {}
+__stores_lock = threading.Lock()
+
+
+def get_spec_id(spec):
+    """
+    Return the identifier of a container specification (a JSON serializable dict).
+    """
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def pack_container(container):
+    """
+    Split a data container (data-frame, limits and range index) into flat arrays and a JSON description.
+
+    The columns of the data-frame are grouped per type in 2D blocks, which pandas uses as is. Categorical or
+    object columns (the 'pair') are stored as codes, their categories are kept in the description.
+    """
+    (frame, limits) = container
+
+    arrays = {}
+    blocks = []
+    categories = {}
+
+    for dtype in pd.unique(frame.dtypes.values):
+        if dtype == object or isinstance(dtype, pd.CategoricalDtype):
+            continue
+        columns = [name for name in frame.columns if frame[name].dtype == dtype]
+        name = 'block.{}'.format(len(blocks))
+        arrays[name] = np.ascontiguousarray(np.stack([frame[column].values for column in columns]))
+        blocks.append(dict(array=name, columns=columns))
+
+    for column in frame.columns:
+        if frame[column].dtype == object or isinstance(frame[column].dtype, pd.CategoricalDtype):
+            values = pd.Categorical(frame[column])
+            arrays['codes.{}'.format(column)] = values.codes
+            categories[column] = [str(category) for category in values.categories]
+
+    range_index = limits.get('range_index')
+    if range_index is not None:
+        arrays.update(('index.{}'.format(name), values) for name, values in range_index.to_arrays().items())
+
+    description = dict(rows=len(frame),
+                       columns=list(frame.columns),
+                       blocks=blocks,
+                       categories=categories,
+                       limits={key: float(value) for key, value in limits.items() if key != 'range_index'})
+
+    return (arrays, description)
+
+
+def unpack_container(arrays, description):
+    """
+    Rebuild a data container from the arrays and the description of ``pack_container()``, without copying
+    the blocks (only the categorical codes are copied by pandas). The column order may differ.
+    """
+    frames = [pd.DataFrame(arrays[block['array']].T, columns=block['columns'], copy=False)
+              for block in description['blocks']]
+    frame = pd.concat(frames, axis=1, copy=False) if len(frames) > 1 else frames[0]
+
+    for column, categories in description['categories'].items():
+        frame[column] = pd.Categorical.from_codes(arrays['codes.{}'.format(column)], categories=categories)
+
+    limits = dict(description['limits'])
+
+    index_arrays = {key[len('index.'):]: values for key, values in arrays.items() if key.startswith('index.')}
+    if index_arrays:
+        limits['range_index'] = AutoscaleIndex.from_arrays(index_arrays)
+
+    return (frame, limits)
+
+
+def get_layout(arrays):
+    """
+    Return the ``{name: (dtype, shape, offset)}`` layout of arrays within a segment, and the segment size.
+    """
+    layout = {}
+    offset = 0
+
+    for name, values in arrays.items():
+        offset = -(-offset // SEGMENT_ALIGNMENT) * SEGMENT_ALIGNMENT
+        layout[name] = (values.dtype.str, list(values.shape), offset)
+        offset += values.nbytes
+
+    return (layout, max(offset, 1))
+
+
+def attach_segment(name):
+    """
+    Attach an existing segment, without handing it over to the resource tracker of this process (the tracker
+    would otherwise unlink the segment of the loader when this process exits).
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13
+        segment = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(segment._name, 'shared_memory')
+        return segment
+
+
+class SharedStore(object):
+    """
+    Read-only data containers kept in ``multiprocessing.shared_memory`` segments, shared by all the processes
+    of a host (for example the workers of ``bokeh serve --num-procs``).
+
+    A single loader process builds the containers (see ``run_loader()``) and publishes one segment per
+    container, the manifest (a small JSON file) maps each container specification to its segment, its layout
+    and the version of its source. The readers attach to the segments and wrap the arrays as data-frames
+    without copying them, so the memory of the data no longer grows with the number of processes.
+
+    A reader missing a container files a request, which the loader picks up on its next poll. The loader also
+    rebuilds a published container whenever the version of its source changes, the new segment replaces the
+    previous one in the manifest (the readers still attached to the previous segment keep their mapping).
+
+    :param directory (``str``): Directory of the manifest and of the requests.
+    """
+
+    def __init__(self, directory=DEFAULT_STORE_DIR):
+        self.directory = directory
+        self.manifest_file = path.join(directory, MANIFEST_FILE)
+        self.requests_dir = path.join(directory, REQUESTS_DIR)
+
+        # Segment names are prefixed per store, two stores (directories) never share a segment.
+        self.prefix = 'rp{}'.format(hashlib.sha1(path.abspath(directory).encode('utf-8')).hexdigest()[:6])
+
+        os.makedirs(self.requests_dir, exist_ok=True)
+
+        # Reader state: the last manifest read, and the attached segments with their containers.
+        self.__manifest = ({}, None)
+        self.__attached = {}
+        self.__lock = threading.Lock()
+
+        # Loader state: the published entries and their segments.
+        self.__entries = {}
+        self.__segments = {}
+        self.__failures = {}
+
+    # Reader {{{1
+
+    def get(self, spec, version):
+        """
+        Return the container published for a specification, or ``None`` if there is none for this version of
+        the source. The arrays of the container are read-only views of the shared segment.
+
+        :param spec (``dict``): JSON serializable specification of the container.
+        :param version (``list``): Version of the source the container must be built from.
+        """
+        entry = self.__read_manifest().get(get_spec_id(spec))
+
+        if entry is None or entry['version'] != list(version):
+            return None
+
+        with self.__lock:
+            attached = self.__attached.get(entry['segment'])
+            if attached is not None:
+                return attached[0]
+
+            try:
+                segment = attach_segment(entry['segment'])
+            except FileNotFoundError:
+                # Replaced (and unlinked) since the manifest was read.
+                return None
+
+            # Every array is a view of a single root array. NumPy does not keep the buffer of the segment
+            # exported, so the segment must stay mapped until the root array (hence every view) is released.
+            root = np.frombuffer(segment.buf, dtype=np.uint8)
+            root.flags.writeable = False
+            finalizer = weakref.finalize(root, segment.close)
+            finalizer.atexit = False
+
+            arrays = {}
+            for name, (dtype, shape, offset) in entry['layout'].items():
+                dtype = np.dtype(dtype)
+                size = int(np.prod(shape)) * dtype.itemsize
+                arrays[name] = root[offset:offset + size].view(dtype).reshape(shape)
+
+            container = unpack_container(arrays, entry['description'])
+
+            # A previous version of the same container is unmapped once the sessions stop using it.
+            for name, (_, attached_id) in list(self.__attached.items()):
+                if attached_id == entry['id']:
+                    del self.__attached[name]
+
+            self.__attached[entry['segment']] = (container, entry['id'])
+
+        debug_print('[DEBUG] Attached segment {} ({} rows).', entry['segment'], entry['description']['rows'])
+
+        return container
+
+    def request(self, spec):
+        """
+        Ask the loader to build (and then keep up to date) the container of a specification.
+        """
+        request_file = path.join(self.requests_dir, '{}.json'.format(get_spec_id(spec)))
+
+        if path.exists(request_file):
+            return
+
+        tmp_file = '{}.{}.tmp'.format(request_file, os.getpid())
+        with open(tmp_file, 'w') as f:
+            json.dump(spec, f)
+        os.replace(tmp_file, request_file)
+
+    def wait(self, spec, version, timeout, is_current=None):
+        """
+        Request a container and wait for the loader to publish it. Returns ``None`` after 'timeout' seconds, or
+        as soon as 'is_current()' reports the wait as superseded.
+        """
+        container = self.get(spec, version)
+        if container is not None:
+            return container
+
+        self.request(spec)
+        deadline = time.monotonic() + timeout
+
+        while container is None and time.monotonic() < deadline:
+            if is_current is not None and not is_current():
+                return None
+            time.sleep(POLL_INTERVAL)
+            container = self.get(spec, version)
+
+        return container
+
+    def __read_manifest(self):
+        # The manifest is only parsed again when the file was replaced.
+        (entries, signature) = self.__manifest
+
+        try:
+            stat = os.stat(self.manifest_file)
+        except FileNotFoundError:
+            return {}
+
+        if (stat.st_ino, stat.st_mtime_ns) != signature:
+            try:
+                with open(self.manifest_file) as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                return entries
+
+            entries = manifest['entries'] if manifest.get('format') == STORE_FORMAT_VERSION else {}
+            self.__manifest = (entries, (stat.st_ino, stat.st_mtime_ns))
+
+        return entries
+
+    # }}}1
+
+    # Loader {{{1
+
+    def publish(self, spec, version, container):
+        """
+        Copy a container into a new segment and replace the manifest entry of its specification.
+        """
+        spec_id = get_spec_id(spec)
+        (arrays, description) = pack_container(container)
+        (layout, size) = get_layout(arrays)
+
+        serial = self.__entries[spec_id]['serial'] + 1 if spec_id in self.__entries else 0
+        while True:
+            name = '{}_{}_{}'.format(self.prefix, spec_id[:12], serial)
+            try:
+                segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+                break
+            except FileExistsError:
+                # Left behind by a previous loader.
+                serial += 1
+
+        for key, (dtype, shape, offset) in layout.items():
+            np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf, offset=offset)[...] = arrays[key]
+
+        previous = self.__segments.pop(spec_id, None)
+
+        self.__segments[spec_id] = segment
+        self.__entries[spec_id] = dict(id=spec_id,
+                                       spec=spec,
+                                       version=list(version),
+                                       segment=segment.name,
+                                       serial=serial,
+                                       size=size,
+                                       layout=layout,
+                                       description=description,
+                                       created=time.time())
+        self.__write_manifest()
+
+        if previous is not None:
+            # The readers attached to the previous segment keep their mapping.
+            previous.close()
+            previous.unlink()
+
+        debug_print('[DEBUG] Published segment {} ({} rows, {} bytes).', segment.name, description['rows'], size)
+
+    def refresh(self, build, get_version):
+        """
+        Build the requested containers, and rebuild the published ones whose source version changed.
+
+        :param build (``callable``): ``build(spec)`` returns the container of a specification.
+        :param get_version (``callable``): ``get_version(spec)`` returns the current version of its source.
+        :return (``int``): Number of published containers.
+        """
+        specs = {spec_id: entry['spec'] for spec_id, entry in self.__entries.items()}
+
+        for request_file in sorted(os.listdir(self.requests_dir)):
+            if not request_file.endswith('.json'):
+                continue
+            try:
+                with open(path.join(self.requests_dir, request_file)) as f:
+                    spec = json.load(f)
+            except (OSError, ValueError):
+                continue
+            finally:
+                os.remove(path.join(self.requests_dir, request_file))
+            specs.setdefault(get_spec_id(spec), spec)
+
+        published = 0
+
+        for spec_id, spec in specs.items():
+            try:
+                # Taken before the build, so a source modified in between is built again on the next poll.
+                version = list(get_version(spec))
+            except OSError as e:
+                print('[ERROR] Unable to read the version of {}: {}'.format(spec, e))
+                continue
+
+            entry = self.__entries.get(spec_id)
+            if (entry is not None and entry['version'] == version) or self.__failures.get(spec_id) == version:
+                continue
+
+            try:
+                container = build(spec)
+            except Exception as e:
+                # Not retried until the source changes.
+                print('[ERROR] Unable to build {}: {}'.format(spec, e))
+                self.__failures[spec_id] = version
+                continue
+
+            self.publish(spec, version, container)
+            published += 1
+
+        return published
+
+    def close(self):
+        """
+        Remove all the published segments and the manifest (loader side).
+        """
+        for segment in self.__segments.values():
+            segment.close()
+            segment.unlink()
+
+        self.__segments.clear()
+        self.__entries.clear()
+
+        if path.exists(self.manifest_file):
+            os.remove(self.manifest_file)
+
+    def __write_manifest(self):
+        # Written aside first, the readers never see a partial manifest.
+        tmp_file = '{}.{}.tmp'.format(self.manifest_file, os.getpid())
+
+        with open(tmp_file, 'w') as f:
+            json.dump(dict(format=STORE_FORMAT_VERSION, entries=self.__entries), f)
+        os.replace(tmp_file, self.manifest_file)
+    # }}}1
+
+    def stats(self):
+        return dict(published=len(self.__entries),
+                    published_bytes=sum(entry['size'] for entry in self.__entries.values()),
+                    attached=len(self.__attached))
+
+    def __str__(self):
+        return 'SharedStore(directory={}, published={published}, published_bytes={published_bytes}, ' \
+               'attached={attached})'.format(self.directory, **self.stats())
+
+
+def get_shared_store(directory=DEFAULT_STORE_DIR):
+    """
+    Return the process wide reader of a store, so the sessions of a process share the attached segments.
+    """
+    with __stores_lock:
+        store = __stores.get(directory)
+        if store is None:
+            store = __stores[directory] = SharedStore(directory)
+        return store
+
+
+def run_loader(directory, build, get_version, interval=LOADER_INTERVAL, stop=None):
+    """
+    Loader process of a store: publish the requested containers and keep them up to date, until 'stop' (a
+    ``threading.Event`` or ``multiprocessing.Event``) is set or the process is interrupted. The segments are
+    removed on exit.
+
+    :param directory (``str``): Directory of the store.
+    :param build (``callable``): ``build(spec)`` returns the container of a specification.
+    :param get_version (``callable``): ``get_version(spec)`` returns the current version of its source.
+    :param interval (``float``): Polling interval (seconds).
+    """
+    store = SharedStore(directory)
+
+    if threading.current_thread() is threading.main_thread():
+        # A terminated loader (for example the daemon process of serve.py) still removes its segments.
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    try:
+        while stop is None or not stop.is_set():
+            store.refresh(build, get_version)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+
+# vim: ts=4 ft=python nowrap fdm=marker
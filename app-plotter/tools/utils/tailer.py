@@ -0,0 +1,104 @@
+# Global Imports
+import os
+import numpy as np
+
+# Local Imports
+from os import sys
+from os import path
+
+scope = path.dirname(path.dirname(path.dirname(path.abspath(__file__))))
+sys.path.append(scope)
+
+from coreglobals import get_global_property
+from coreglobals import set_global_property
+from coreglobals import debug_print
+
+# from, import * guard.
+__all__ = ['FileTailer']
+
+# Types of the known *.csv columns (see ``utils.IO``), any other column is kept as text.
+CSV_COLUMN_TYPES = {
+    'timestamp': np.int64,
+    'open': float,
+    'high': float,
+    'low': float,
+    'close': float,
+    'volume': float,
+}
+
+
+def my_public_method():
+    # Test if we have access to the global properties.
+    NAMESPACE = get_global_property('APP_NAME') + "." + __name__
+    print('{}: Module accessed.'.format(NAMESPACE))
+
+
+def read_csv_header(source_file):
+    """
+    Return the column names of a *.csv file (its first line).
+    """
+    with open(source_file) as f:
+        return f.readline().strip().split(',')
+
+
+def parse_csv_lines(lines, columns):
+    """
+    Parse *.csv lines (without the header) into ``{name: array}`` columns, typed as ``CSV_COLUMN_TYPES``.
+    Blank lines are skipped.
+
+    :param lines (``list``): Lines of text.
+    :param columns (``list``): Column names, see ``read_csv_header()``.
+    """
+    fields = [line.strip().split(',') for line in lines if line.strip()]
+    values = list(zip(*fields)) if fields else [()] * len(columns)
+
+    return {name: np.array(column, dtype=CSV_COLUMN_TYPES.get(name, object))
+            for name, column in zip(columns, values)}
+
+
+class FileTailer(object):
+    """
+    Follow the lines appended to a file, from the byte offset of the last complete line read.
+
+    A line still being written (no line break yet) is left in the file until it is complete. A file that got
+    shorter, or was replaced by another file, can not be followed: ``read()`` then returns 'None', and the
+    caller is expected to import the file again.
+
+    Usage:
+        tailer = FileTailer('data/data_5m.csv', offset=utils.IO.get_file_signature('data/data_5m.csv')[0])
+        lines = tailer.read()
+
+    :param source_file (``str``): Path of the file.
+    :param offset (``int``): Byte offset to start from, the start of the file by default.
+    """
+
+    def __init__(self, source_file, offset=0):
+        self.source_file = source_file
+        self.offset = offset
+        self.__inode = os.stat(source_file).st_ino
+
+    def read(self):
+        """
+        Return the complete lines appended since the last call (an empty list if none), or 'None' if the file
+        can no longer be followed.
+        """
+        stat = os.stat(self.source_file)
+
+        if stat.st_ino != self.__inode or stat.st_size < self.offset:
+            debug_print('TAILER\t: {} was truncated or replaced.', self.source_file)
+            return None
+
+        if stat.st_size == self.offset:
+            return []
+
+        with open(self.source_file, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(stat.st_size - self.offset)
+
+        # Only the complete lines are consumed.
+        end = data.rfind(b'\n') + 1
+        self.offset += end
+
+        return data[:end].decode('utf-8').splitlines()
+
+# vim: ts=4 ft=python nowrap fdm=marker
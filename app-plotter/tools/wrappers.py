@@ -1,4 +1,5 @@
 # Global Imports
+import numpy as np
 import pandas as pd
 from bokeh.models import CustomJS
 
@@ -15,12 +16,91 @@ sys.path.append(scope)
 
 from coreglobals import get_global_property
 from coreglobals import set_global_property
+from coreglobals import debug_print
 import tools.utils as utils
 import tools.indicators as indicators
+import tools.backends as backends
 
 # from, import * guard.
 __all__ = ['my_public_method', 'get_raw_data']
 
+# Length of a candle (minutes) for each of the supported timeframes.
+TIMEFRAME_MINUTES = {
+    '5m': 5,
+    '15m': 15,
+    '1h': 60,
+    '4h': 240,
+    '1D': 1440,
+}
+
+# Aggregation applied to the data container columns when several bars are merged into one.
+# Any other column (moving averages, MACD series, colours etc.) takes the value of the last merged bar.
+AGGREGATION_RULES = {
+    'date': 'first',
+    'timestamp': 'first',
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'volume': 'sum',
+    'candle_bound_min': 'min',
+    'candle_bound_max': 'max',
+    'macd_bound_min': 'min',
+    'macd_bound_max': 'max',
+    'volume_bound_min': 'min',
+    'volume_bound_max': 'sum',
+    'bar_width': 'sum',
+}
+
+# Largest deviation from float64 accepted by the compact data containers, relative to the largest magnitude of a
+# column. Any column above it keeps its float64 values.
+COMPACT_PRECISION_TOLERANCE = 1e-6
+
+# Bound columns repeating another column of the data container ('None' for a zero bound), which the compact data
+# containers do not store (see ``get_container_column()``).
+COMPACT_DROPPED_COLUMNS = {
+    'candle_bound_min': 'low',
+    'candle_bound_max': 'high',
+    'volume_bound_min': None,
+    'volume_bound_max': 'volume',
+}
+
+# Number of rows summarised by a single block of the client side autoscale summaries.
+AUTOSCALE_BLOCK_SIZE = 64
+
+# Plots fitted by the autoscale callbacks, each bound by a pair of source columns (see AUTOSCALE_COLUMNS).
+AUTOSCALE_TARGETS = ['candle', 'volume', 'macd']
+
+# Source columns holding the lower and upper bounds of each autoscale target ('None' stands for a zero bound).
+AUTOSCALE_COLUMNS = {
+    'candle': ('candle_bound_min', 'candle_bound_max'),
+    'volume': ('volume_bound_min', 'volume_bound_max'),
+    'macd': ('macd_bound_min', 'macd_bound_max'),
+}
+
+# The compact payload does not repeat the bounds already held by other columns.
+COMPACT_AUTOSCALE_COLUMNS = {
+    'candle': ('low', 'high'),
+    'volume': (None, 'volume'),
+    'macd': ('macd_bound_min', 'macd_bound_max'),
+}
+
+# Columns of the chart source.
+SOURCE_COLUMNS = [
+    'index', 'time', 'open', 'high', 'low', 'close',
+    'candle_wick_color', 'candle_body_fill_color', 'candle_body_line_color', 'candle_bound_min', 'candle_bound_max',
+    'ma_slow', 'ma_fast', 'macd', 'macds', 'macdh', 'macd_bound_min', 'macd_bound_max',
+    'volume', 'volume_bound_min', 'volume_bound_max', 'signature', 'bar_width'
+]
+
+# Columns of the chart source in the compact payload mode. Every column is a numeric array (binary encoded on the
+# wire), the candle colours are mapped from the 'direction' (0: decreasing, 1: increasing) on the client and the
+# bar width is a property of the glyphs.
+COMPACT_SOURCE_COLUMNS = [
+    'index', 'time', 'open', 'high', 'low', 'close', 'direction',
+    'ma_slow', 'ma_fast', 'macd', 'macds', 'macdh', 'macd_bound_min', 'macd_bound_max', 'volume'
+]
+
 # @pubic function my_public_method() {{{1
 
 
@@ -34,29 +114,25 @@ def my_public_method():
     print('{}: Module accessed.'.format(NAMESPACE))
 # }}}1
 
-# @public function get_raw_data(source_file, field) {{{1
+# @public function get_raw_data(source_file, field, start, end, tail) {{{1
 
 
-def get_raw_data(source_file, field):
+def get_raw_data(source_file, field, start=None, end=None, tail=None):
     """
-    Import a dataFrame from a *.csv file.
+    Import a dataFrame from a data source: a *.csv file, a column store directory (see ``utils.ColumnStore``) or
+    any other source of the backends (see ``backends.get_backend()``), for example a URL.
+
+    :param source_file (``str``): Path of the *.csv file or of the store, or the data source.
+    :param field (``str``): Pair, for example 'BTC/EUR'.
+    :param start (``int``): First epoch second (optional).
+    :param end (``int``): Last epoch second (optional).
+    :param tail (``int``): Maximum number of rows, the most recent ones are kept (optional).
     """
 
     # DataSet Import
-    df = utils.IO.import_csv_data(source_file)
-
-    # Query a filed such as 'BTC/EUR'
-    pair_df = df.loc[df.pair == field].copy()
+    pair_df = backends.get_backend(source_file).get_raw_data(source_file, field, start=start, end=end, tail=tail)
     # pair_df.drop(['pair'], axis=1, inplace=True)
 
-    # After isolating the required data slice for the pair field, we need to reset the index.
-    # Since the pairs are sequentially stored, once a specific pair is removed there will be
-    # a gap in the index. For example:
-    #   The 'EUR' field is stored from 0 to 287 and the 'USD' field is stored from 288 to 576
-    #   within the dataframe. Once the 'EUR' field is removed, the index for the remaining field
-    #   needs to be reset.
-    pair_df.reset_index(drop=True, inplace=True)
-
     cols = list(pair_df)
     cols.insert(0, cols.pop(cols.index('date')))
 
@@ -66,10 +142,64 @@ def get_raw_data(source_file, field):
     return pair_df
 # }}}1
 
-# @public function get_data_container(dataFrame, MA, MACD, drop_last=True) {{{1
+# @public function resample_raw_data(dataFrame, timeframe) {{{1
+
 
+def resample_raw_data(dataFrame, timeframe):
+    """
+    Aggregate a raw (single pair) dataFrame into candles of a higher timeframe.
+
+    Candles are aligned to the exchange (UTC) boundaries of the timeframe, for example a '4h' candle
+    starts at 00:00, 04:00, 08:00 etc. Each new candle takes the first open, the highest high,
+    the lowest low, the last close and the summed volume of the candles it covers. A leading candle
+    which would not start on its boundary (a partial candle) is dropped.
 
-def get_data_container(dataFrame, MA=None, MACD=None, drop_last=True):
+    :param dataFrame (``Pandas Object``): Raw dataFrame as provided by ``get_raw_data()``, sorted by time.
+    :param timeframe (``string``): Target timeframe, one of the ``TIMEFRAME_MINUTES`` keys.
+    """
+    seconds = TIMEFRAME_MINUTES[timeframe] * 60
+    timestamps = dataFrame['timestamp'].values
+
+    if len(timestamps) == 0:
+        return dataFrame.copy()
+
+    buckets = timestamps - (timestamps % seconds)
+
+    # First row of every bucket.
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+
+    if timestamps[0] != buckets[0]:
+        # The first bucket does not contain its opening candle.
+        starts = starts[1:]
+
+    if len(starts) == 0:
+        return dataFrame.iloc[:0].copy()
+
+    # Last row of every bucket.
+    ends = np.concatenate((starts[1:] - 1, [len(timestamps) - 1]))
+
+    first = starts[0]
+    offsets = starts - first
+
+    resampled = dict(
+        timestamp=buckets[starts],
+        open=dataFrame['open'].values[starts],
+        high=np.maximum.reduceat(dataFrame['high'].values[first:], offsets),
+        low=np.minimum.reduceat(dataFrame['low'].values[first:], offsets),
+        close=dataFrame['close'].values[ends],
+        volume=np.add.reduceat(dataFrame['volume'].values[first:], offsets),
+        pair=dataFrame['pair'].values[starts]
+    )
+    resampled['date'] = pd.to_datetime(resampled['timestamp'], unit='s')
+
+    # Keep the column order of the incoming dataFrame.
+    return pd.DataFrame({name: resampled[name] for name in dataFrame.columns})
+# }}}1
+
+# @public function get_data_container(dataFrame, MA, MACD, drop_last, compact_dtypes) {{{1
+
+
+def get_data_container(dataFrame, MA=None, MACD=None, drop_last=True, compact_dtypes=False):
     """
     A wrapper used to populate a data frame container.
 
@@ -78,6 +208,9 @@ def get_data_container(dataFrame, MA=None, MACD=None, drop_last=True):
     :param MACD (``MACD configuration dict``): Configuration object for the MACD indicator.
     :param drop_last (``Boolean``): A boolean flag to force a drop on the last element
                                     within the incoming dataFrame.
+    :param compact_dtypes (``Boolean``): Store the container in the compact types of
+                                         ``compact_data_container()``. The indicators and the limits
+                                         are still computed in float64.
     """
 
     if MA is None:
@@ -95,25 +228,28 @@ def get_data_container(dataFrame, MA=None, MACD=None, drop_last=True):
         # row since the candle has not closed yet, and the values are likely to keep changing.
         local_df = local_df[:-1]
 
-    x = local_df['close'].values
+    # Every distinct indicator series (for example the EMA(13) of both the MA overlay and the MACD fast leg) is
+    # computed once, see ``indicators.IndicatorGraph``.
+    graph = indicators.IndicatorGraph(local_df['close'].values)
 
     if MA['type'] == 'SMA':
         # Calculate the Simple Moving Average slots.
 
         # local_df['sma_slow'] = local_df['close'].copy().rolling(SMA_SLOW_LENGTH).mean()
-        ma_slow = indicators.MA.sma(x, MA['slow_period'])
+        ma_slow = graph.get('sma', MA['slow_period'])
 
         # local_df['sma_fast'] = local_df['close'].copy().rolling(SMA_FAST_LENGTH).mean()
-        ma_fast = indicators.MA.sma(x, MA['fast_period'])
+        ma_fast = graph.get('sma', MA['fast_period'])
 
     elif MA['type'] == 'EMA':
-        # Calculate the Exponential Moving Average slots.
+        # Calculate the Exponential Moving Average slots, along with the MACD legs in a single pass.
+        graph.prefetch_ema([MA['slow_period'], MA['fast_period'], MACD['fast_period'], MACD['slow_period']])
 
         # ema_slow = local_df['close'].ewm(span=EMA_SLOW_LENGTH, adjust=False).mean()
-        ma_slow = indicators.MA.ema(x, MA['slow_period'])
+        ma_slow = graph.get('ema', MA['slow_period'])
 
         # ema_fast = local_df['close'].ewm(span=EMA_FAST_LENGTH, adjust=False).mean()
-        ma_fast = indicators.MA.ema(x, MA['fast_period'])
+        ma_fast = graph.get('ema', MA['fast_period'])
     else:
         raise Exception('MA configuration error!')
 
@@ -127,25 +263,22 @@ def get_data_container(dataFrame, MA=None, MACD=None, drop_last=True):
     local_df['candle_bound_max'] = local_df['high']
 
     # Calculate and store MACD series.
-    macd_fast_ma = indicators.MA.ema(x, MACD['fast_period'])
-    macd_slow_ma = indicators.MA.ema(x, MACD['slow_period'])
-
-    macd = macd_fast_ma - macd_slow_ma
-    macd_df = pd.DataFrame({"macd": macd})
+    macd_periods = (MACD['fast_period'], MACD['slow_period'])
+    macd = graph.get('macd', *macd_periods)
 
     # Calculate and store MACD signal and histogram series.
-    macd_df['signal'] = macd_df['macd'].ewm(span=MACD['signal_period'], adjust=False).mean()
-    macd_df['histogram'] = macd_df['macd'] - macd_df['signal']
+    macd_signal = graph.get('macd_signal', *macd_periods, MACD['signal_period'])
+    macd_histogram = graph.get('macd_histogram', *macd_periods, MACD['signal_period'])
+
+    local_df['macd'] = macd
+    local_df['macds'] = macd_signal
+    local_df['macdh'] = macd_histogram
 
     # Calculate and store MACD bounds.
-    macd_df['bound_min'] = macd_df.min(axis=1)
-    macd_df['bound_max'] = macd_df.max(axis=1)
+    local_df['macd_bound_min'] = np.minimum.reduce([macd, macd_signal, macd_histogram])
+    local_df['macd_bound_max'] = np.maximum.reduce([macd, macd_signal, macd_histogram])
 
-    local_df['macd'] = macd_df[['macd']]
-    local_df['macds'] = macd_df['signal']
-    local_df['macdh'] = macd_df['histogram']
-    local_df['macd_bound_min'] = macd_df['bound_min']
-    local_df['macd_bound_max'] = macd_df['bound_max']
+    debug_print('[DEBUG] Indicator series: {}', graph.keys())
 
     # Volume Bounds
     local_df['volume_bound_min'] = 0
@@ -168,58 +301,200 @@ def get_data_container(dataFrame, MA=None, MACD=None, drop_last=True):
                   candles_min_limit=candles_min_limit,
                   candles_max_limit=candles_max_limit)
 
+    if compact_dtypes:
+        (local_df, report) = compact_data_container(local_df)
+
+        for name, check in report.items():
+            debug_print('[DEBUG] Compact column {:<18} {:<8} max deviation {:.3g} ({:.3g} relative)', name,
+                        check['dtype'], check['max_deviation'], check['relative_deviation'])
+
+    # Range query structure used to answer the limits of any visible time window.
+    limits['range_index'] = get_range_index(local_df)
+
     return (local_df, limits)
 # }}}1
 
-# @public function callback_on_interaction_range_fit(range, sourcem name, target) {{{1
+# @public function compact_data_container(dataFrame, tolerance) {{{1
 
 
-def callback_on_interaction_range_fit(range, source, name='top', target='candle'):
+def compact_data_container(dataFrame, tolerance=COMPACT_PRECISION_TOLERANCE):
     """
-    A callback factory for the CustomJS model.
+    Convert a data container into its compact types, and check the precision of the float32 columns.
 
-    :param range (``bokeh range object``): The plot axis object.
-    :param source (``ColumnDataSource object ``): Data container.
-    :param name (``string``): Name signature for internal identification.
-    :param target (``string``): Source to access bounds.
+    * float64 columns become float32, unless the deviation exceeds the (relative) tolerance,
+    * the 'pair' becomes categorical, the epoch 'timestamp' (int64) and the 'date' are kept as is,
+    * the ``COMPACT_DROPPED_COLUMNS`` are dropped,
+    * a 'direction' column (uint8, 1 for an increasing candle) is added.
+
+    :param dataFrame (``Pandas Object``): Data container as provided by ``get_data_container()``.
+    :param tolerance (``float``): Largest accepted deviation, relative to the largest magnitude of a column.
+    :return (``tuple``): The compact dataFrame, and the precision report of the float columns
+                         ``{name: {'dtype': ..., 'max_deviation': ..., 'relative_deviation': ...}}``.
     """
-    code = '''
-           // Reset previous delayed process.
-           clearTimeout(window._autoscale_timeout_''' + name + '''_plot);
-
-           var index = source.data.time,
-               target = target,
-               low = source.data.''' + target + '''_bound_min,
-               high = source.data.''' + target + '''_bound_max,
-               start = cb_obj.start,
-               end = cb_obj.end,
-               min = Infinity,
-               max = -Infinity;
-
-           for (var i=0; i < index.length; ++i) {
-               if (start <= index[i] && index[i] <= end) {
-                   max = Math.max(high[i], max);
-                   min = Math.min(low[i], min);
-               }
-           }
-
-           //console.log(`[''' + name + '''_plot] x_start: ${start}, x_end: ${end}`);
-           //console.log(`[''' + name + '''_plot] y_min: ${min}, y_max: ${max}`);
-
-           // New delayed process.
-           // Here, 'range' refers to the Y-Range.
-           window._autoscale_timeout_''' + name + '''_plot = setTimeout(function() {
-               var pad = (max - min) * .05;
-               // WARNING: We DO NOT want the lower limit padding on the volume plot.
-               if(target === 'volume'){
-                    range.start = min;
-               }else{
-                    range.start = min - pad;
-               }
-               range.end = max + pad;
-           });
-        '''
-    return CustomJS(args={'range': range, 'source': source, 'target': target}, code=code)
+    columns = {}
+    report = {}
+
+    for name in dataFrame.columns:
+        values = dataFrame[name].values
+
+        if name in COMPACT_DROPPED_COLUMNS:
+            continue
+        elif name == 'pair':
+            columns[name] = pd.Categorical(values)
+        elif values.dtype == np.float64:
+            narrow = values.astype(np.float32)
+            finite = np.isfinite(values)
+
+            max_deviation = 0.0
+            relative_deviation = 0.0
+            if finite.any():
+                max_deviation = float(np.max(np.abs(narrow[finite].astype(np.float64) - values[finite])))
+                scale = float(np.max(np.abs(values[finite])))
+                relative_deviation = max_deviation / scale if scale > 0 else 0.0
+
+            columns[name] = narrow if relative_deviation <= tolerance else values
+            report[name] = dict(dtype=columns[name].dtype.name,
+                                max_deviation=max_deviation,
+                                relative_deviation=relative_deviation)
+        else:
+            columns[name] = values
+
+    columns['direction'] = (~(dataFrame['close'].values < dataFrame['open'].values)).astype(np.uint8)
+
+    return (pd.DataFrame(columns, index=dataFrame.index), report)
+# }}}1
+
+# @public function get_container_column(dataFrame, name) {{{1
+
+
+def get_container_column(dataFrame, name):
+    """
+    Return the values of a data container column, including the ``COMPACT_DROPPED_COLUMNS`` of a compact
+    container (a zero bound is returned as zeros of the type of the container prices).
+    """
+    if name in dataFrame.columns or name not in COMPACT_DROPPED_COLUMNS:
+        return dataFrame[name].values
+
+    source = COMPACT_DROPPED_COLUMNS[name]
+    if source is None:
+        return np.zeros(len(dataFrame), dtype=dataFrame['close'].dtype)
+    return dataFrame[source].values
+# }}}1
+
+# @public function get_range_index_rows(dataFrame) {{{1
+
+
+def get_range_index_rows(dataFrame):
+    """
+    Return the ``(times, bounds)`` of the rows of a data container, as indexed by ``get_range_index()`` (see
+    ``utils.AutoscaleIndex``).
+    """
+    times = dataFrame['date'].values.astype('datetime64[ms]').astype(np.int64)
+
+    bounds = {
+        'candles': (get_container_column(dataFrame, 'candle_bound_min'),
+                    get_container_column(dataFrame, 'candle_bound_max')),
+        'volume': (get_container_column(dataFrame, 'volume_bound_min'),
+                   get_container_column(dataFrame, 'volume_bound_max')),
+        'macd': (dataFrame['macd_bound_min'].values, dataFrame['macd_bound_max'].values)
+    }
+
+    return (times, bounds)
+# }}}1
+
+# @public function get_range_index(dataFrame) {{{1
+
+
+def get_range_index(dataFrame):
+    """
+    Build the range query structure over the candle, volume and MACD bounds of a data container.
+
+    :param dataFrame (``Pandas Object``): Data container as provided by ``get_data_container()``.
+    :return (``utils.AutoscaleIndex``): Index keyed on the 'date' column (epoch milliseconds).
+    """
+    (times, bounds) = get_range_index_rows(dataFrame)
+
+    # The bounds of a compact container are float32, which also holds their minimum and maximum exactly.
+    dtype = np.result_type(np.float32, *(values.dtype for pair in bounds.values() for values in pair))
+
+    return utils.AutoscaleIndex(times, bounds=bounds, dtype=dtype)
+# }}}1
+
+# @public function get_block_summaries(data, block_size, columns) {{{1
+
+
+def get_block_summaries(data, block_size=AUTOSCALE_BLOCK_SIZE, columns=None):
+    """
+    Summarise the autoscale bounds of the source data in blocks of ``block_size`` rows.
+
+    The result is the data of the summary source used by ``callback_on_range_fit()``, for example:
+        {'candle_block_min': [...], 'candle_block_max': [...], 'volume_block_min': [...], ...}
+
+    :param data (``dict``): Source data, holding the bound columns.
+    :param block_size (``int``): Number of rows summarised by a single block.
+    :param columns (``dict``): The bound columns of each target, ``AUTOSCALE_COLUMNS`` by default.
+    """
+    columns = columns or AUTOSCALE_COLUMNS
+    length = len(data['time'])
+    starts = np.arange(0, length, block_size)
+
+    summaries = {}
+    for target in AUTOSCALE_TARGETS:
+        lower, upper = columns[target]
+        lows = np.zeros(length) if lower is None else np.asarray(data[lower], dtype=float)
+        highs = np.asarray(data[upper], dtype=float)
+
+        summaries['{}_block_min'.format(target)] = np.minimum.reduceat(lows, starts) if length else lows
+        summaries['{}_block_max'.format(target)] = np.maximum.reduceat(highs, starts) if length else highs
+
+    return summaries
+# }}}1
+
+# @public function downsample_data_container(dataFrame, factor) {{{1
+
+
+def downsample_data_container(dataFrame, factor):
+    """
+    Reduce the level of detail of a data container by merging every ``factor`` consecutive bars.
+
+    Groups are counted from the first row, so appending new bars never changes the existing groups.
+    Columns are merged using ``AGGREGATION_RULES``, the indicator series are sampled at the last bar
+    of each group (the close of the merged candle).
+
+    :param dataFrame (``Pandas Object``): Data container as provided by ``get_data_container()``.
+    :param factor (``int``): Number of bars merged into one.
+    """
+    length = len(dataFrame)
+
+    if factor <= 1 or length == 0:
+        return dataFrame
+
+    starts = np.arange(0, length, factor)
+    ends = np.concatenate((starts[1:] - 1, [length - 1]))
+
+    reducers = {
+        'min': np.minimum.reduceat,
+        'max': np.maximum.reduceat,
+        'sum': np.add.reduceat
+    }
+
+    downsampled = {}
+    for name in dataFrame.columns:
+        values = dataFrame[name].values
+        rule = AGGREGATION_RULES.get(name, 'last')
+
+        if rule == 'first':
+            downsampled[name] = values[starts]
+        elif rule == 'last':
+            downsampled[name] = values[ends]
+        else:
+            downsampled[name] = reducers[rule](values, starts)
+
+    if 'direction' in downsampled:
+        # A merged candle goes from the open of its first bar to the close of its last bar.
+        downsampled['direction'] = (~(downsampled['close'] < downsampled['open'])).astype(np.uint8)
+
+    return pd.DataFrame(downsampled)
 # }}}1
 
 # @public function callback_on_source_change_range_fit(range, sourcem name, target) {{{1
@@ -267,88 +542,181 @@ def callback_on_source_change_range_fit(args=dict()):
     return CustomJS(args=args, code=code)
 # }}}1
 
-# @public function callback_on_source_change_range_fit2(range, sourcem name, target) {{{1
+# @public function callback_on_range_fit(source, summary_source, x_range, y_ranges, block_size, columns) {{{1
 
 
-def callback_on_source_change_range_fit2(args=dict()):
+def callback_on_range_fit(source, summary_source, x_range, y_ranges, block_size=AUTOSCALE_BLOCK_SIZE, columns=None):
     """
-    A callback factory for the CustomJS model.
+    A callback factory for the CustomJS model, fitting the y-ranges of all the plots in a single pass.
 
-    :param range (``bokeh range object``): The plot axis object.
-    :param source (``ColumnDataSource object ``): Data container.
-    :param name (``string``): Name signature for internal identification.
-    :param target (``string``): Source to access bounds.
+    The visible rows are found with a binary search on the (sorted) time column. The min/max of each plot
+    is then combined from the block summaries (see ``get_block_summaries()``) and a few partial blocks, so
+    the cost of an interaction does not grow with the number of bars. Coarser summary levels are derived
+    from the shipped blocks once per data change and cached on the summary source.
+
+    The same callback serves the range interactions (shared x-range) and the source changes.
+
+    :param source (``ColumnDataSource object``): Data container.
+    :param summary_source (``ColumnDataSource object``): Block summaries of the data container.
+    :param x_range (``bokeh range object``): The shared x-range of the plots.
+    :param y_ranges (``dict``): The y-range for each target, for example ``{'candle': p1.y_range, ...}``.
+    :param block_size (``int``): Number of rows summarised by a single block.
+    :param columns (``dict``): The bound columns of each target, ``AUTOSCALE_COLUMNS`` by default.
     """
     code = '''
         // Reset previous delayed process.
-        clearTimeout(window.my_autoscale_timeout);
+        clearTimeout(window._autoscale_timeout);
 
-        var index = cb_obj.data.time,
-        candlestick_low = cb_obj.data.candle_bound_min,
-        candlestick_high = cb_obj.data.candle_bound_max,
-        candlestick_start = candlestick_xr.start,
-        candlestick_end = candlestick_xr.end,
-        volume_low = cb_obj.data.volume_bound_min,
-        volume_high = cb_obj.data.volume_bound_max,
-        volume_start = volume_xr.start,
-        volume_end = volume_xr.end,
-        macd_low = cb_obj.data.macd_bound_min,
-        macd_high = cb_obj.data.macd_bound_max,
-        macd_start = macd_xr.start,
-        macd_end = macd_xr.end,
-        candlestick_min = Infinity,
-        candlestick_max = -Infinity,
-        volume_min = Infinity,
-        volume_max = -Infinity,
-        macd_min = Infinity,
-        macd_max = -Infinity,
-        signature = cb_obj.data.signature[0];
+        window._autoscale_timeout = setTimeout(function() {
+            var data = source.data,
+                index = data.time,
+                length = index.length,
+                start = x_range.start,
+                end = x_range.end;
 
-        for (var i=0; i < index.length; ++i) {
-            if (candlestick_start <= index[i] && index[i] <= candlestick_end) {
-                candlestick_max = Math.max(candlestick_high[i], candlestick_max);
-                candlestick_min = Math.min(candlestick_low[i], candlestick_min);
+            if (length === 0) {
+                return;
             }
 
-            if (volume_start <= index[i] && index[i] <= volume_end) {
-                volume_max = Math.max(volume_high[i], volume_max);
-                volume_min = Math.min(volume_low[i], volume_min);
+            // First row at (or after) the start, and the first row after the end.
+            function bisect(value, right) {
+                var lo = 0, hi = length;
+                while (lo < hi) {
+                    var mid = (lo + hi) >>> 1;
+                    if (index[mid] < value || (right && index[mid] === value)) {
+                        lo = mid + 1;
+                    } else {
+                        hi = mid;
+                    }
+                }
+                return lo;
             }
 
-            if (macd_start <= index[i] && index[i] <= macd_end) {
-                macd_max = Math.max(macd_high[i], macd_max);
-                macd_min = Math.min(macd_low[i], macd_min);
+            var first = bisect(start, false),
+                last = bisect(end, true);
+
+            if (first >= last) {
+                return;
             }
-        }
 
-        //console.log(`*[selected_currency_pair: ${signature}] candlestick: x_start: ${candlestick_start}, x_end: ${candlestick_end}`);
-        //console.log(`*[selected_currency_pair: ${signature}] candlestick: y_min: ${candlestick_min}, y_max: ${candlestick_max}`);
+            var result = {min: Infinity, max: -Infinity};
 
-        //console.log(`*[selected_currency_pair: ${signature}] volume: x_start: ${volume_start}, x_end: ${volume_end}`);
-        //console.log(`*[selected_currency_pair: ${signature}] volume: y_min: ${volume_min}, y_max: ${volume_max}`);
+            function scan(lows, highs, from, to) {
+                for (var i = from; i < to; ++i) {
+                    result.min = Math.min(lows === null ? 0 : lows[i], result.min);
+                    result.max = Math.max(highs[i], result.max);
+                }
+            }
 
-        //console.log(`*[selected_currency_pair: ${signature}] macd: x_start: ${macd_start}, x_end: ${macd_end}`);
-        //console.log(`*[selected_currency_pair: ${signature}] macd: y_min: ${macd_min}, y_max: ${macd_max}`);
+            // Summary levels, level 0 is shipped by the server and every next level merges 'block_size'
+            // entries of the previous one. The levels are only valid for the current source data.
+            var levels = summary_source._autoscale_levels,
+                expected = Math.ceil(length / block_size);
+
+            if (levels === undefined || levels === null || levels.rows !== length) {
+                levels = {rows: length};
+
+                for (var t = 0; t < targets.length; ++t) {
+                    var target = targets[t],
+                        mins = summary_source.data[target + '_block_min'],
+                        maxs = summary_source.data[target + '_block_max'];
+
+                    if (mins === undefined || mins.length !== expected) {
+                        // The summaries are out of sync, the rows are scanned directly.
+                        levels[target] = {mins: [], maxs: []};
+                        continue;
+                    }
+
+                    levels[target] = {mins: [mins], maxs: [maxs]};
+
+                    while (mins.length > block_size) {
+                        var next_mins = [], next_maxs = [];
+                        for (var i = 0; i < mins.length; i += block_size) {
+                            var block_min = Infinity, block_max = -Infinity;
+                            for (var j = i; j < Math.min(i + block_size, mins.length); ++j) {
+                                block_min = Math.min(block_min, mins[j]);
+                                block_max = Math.max(block_max, maxs[j]);
+                            }
+                            next_mins.push(block_min);
+                            next_maxs.push(block_max);
+                        }
+                        mins = next_mins;
+                        maxs = next_maxs;
+                        levels[target].mins.push(mins);
+                        levels[target].maxs.push(maxs);
+                    }
+                }
+
+                summary_source._autoscale_levels = levels;
+            }
 
-        // New delayed process.
-        window.my_autoscale_timeout = setTimeout(function() {
-            var candlestick_pad = (candlestick_max - candlestick_min) * .05;
-            candlestick_yr.start = candlestick_min - candlestick_pad;
-            candlestick_yr.end = candlestick_max + candlestick_pad;
-
-            var volume_pad = (volume_max - volume_min) * .05;
-            // WARNING: We DO NOT want the lower limit padding on the volume plot.
-            volume_yr.start = volume_min;
-            volume_yr.end = volume_max + volume_pad;
-
-            var macd_pad = (macd_max - macd_min) * .05;
-            macd_yr.start = macd_min - macd_pad;
-            macd_yr.end = macd_max + macd_pad;
+            for (var t = 0; t < targets.length; ++t) {
+                var target = targets[t],
+                    lows = columns[target][0] === null ? null : data[columns[target][0]],
+                    highs = data[columns[target][1]],
+                    mins = levels[target].mins,
+                    maxs = levels[target].maxs,
+                    lo = first,
+                    hi = last,
+                    level = -1;
+
+                result.min = Infinity;
+                result.max = -Infinity;
+
+                // Scan the partial blocks at both ends, then continue with the whole blocks one level up.
+                while (lo < hi) {
+                    if (hi - lo <= 2 * block_size || level + 1 >= mins.length) {
+                        scan(lows, highs, lo, hi);
+                        break;
+                    }
+
+                    var block_lo = Math.ceil(lo / block_size) * block_size,
+                        block_hi = Math.floor(hi / block_size) * block_size;
+
+                    scan(lows, highs, lo, block_lo);
+                    scan(lows, highs, block_hi, hi);
+
+                    lo = block_lo / block_size;
+                    hi = block_hi / block_size;
+                    level += 1;
+                    lows = mins[level];
+                    highs = maxs[level];
+                }
+
+                var yr = y_ranges[target],
+                    pad = (result.max - result.min) * .05;
+
+                // WARNING: We DO NOT want the lower limit padding on the volume plot.
+                if (target === 'volume') {
+                    yr.start = result.min;
+                } else {
+                    yr.start = result.min - pad;
+                }
+                yr.end = result.max + pad;
+            }
         });
     '''
+    args = dict(source=source, summary_source=summary_source, x_range=x_range, y_ranges=y_ranges,
+                targets=[target for target in AUTOSCALE_TARGETS if target in y_ranges], block_size=block_size,
+                columns=columns or AUTOSCALE_COLUMNS)
     return CustomJS(args=args, code=code)
 # }}}1
 
+# @public function callback_on_summary_change(summary_source) {{{1
+
+
+def callback_on_summary_change(summary_source):
+    """
+    A callback factory for the CustomJS model, dropping the cached summary levels of the range fit callback.
+
+    :param summary_source (``ColumnDataSource object``): Block summaries of the data container.
+    """
+    code = '''
+        summary_source._autoscale_levels = null;
+    '''
+    return CustomJS(args={'summary_source': summary_source}, code=code)
+# }}}1
+
 # @public function get_limits(limits, padding_sca,le) {{{1
 
 
@@ -385,14 +753,14 @@ def get_limits(limits, padding_scale=0.05):
     # A bit of padding for the the macd bounds.
     macd_padding = abs(macd_upper_limit - macd_lower_limit) * padding_scale
 
-    print(';\nvolume_upper_limit: {}, volume_lower_limit: {}, volume_padding: {}'.format(
-        volume_upper_limit, volume_lower_limit, volume_padding))
+    debug_print(';\nvolume_upper_limit: {}, volume_lower_limit: {}, volume_padding: {}',
+                volume_upper_limit, volume_lower_limit, volume_padding)
 
-    print('candlestick_upper_limit: {}, candlestick_lower_limit: {}, candlestick_padding: {}'.format(
-        candlestick_upper_limit, candlestick_lower_limit, candlestick_padding))
+    debug_print('candlestick_upper_limit: {}, candlestick_lower_limit: {}, candlestick_padding: {}',
+                candlestick_upper_limit, candlestick_lower_limit, candlestick_padding)
 
-    print('macd_upper_limit: {}, macd_lower_limit: {}, macd_padding: {}\n;'.format(
-        macd_upper_limit, macd_lower_limit, macd_padding))
+    debug_print('macd_upper_limit: {}, macd_lower_limit: {}, macd_padding: {}\n;',
+                macd_upper_limit, macd_lower_limit, macd_padding)
 
     # ;----------------;
     # ; Apply Paddings ;
@@ -411,4 +779,26 @@ def get_limits(limits, padding_scale=0.05):
             macd_lower_limit, macd_upper_limit)
 # }}}1
 
+# @public function get_window_limits(range_index, start, end, padding_scale, times) {{{1
+
+
+def get_window_limits(range_index, start, end, padding_scale=0.05, times=None):
+    """
+    Calculate the (padded) limits of the bars within a visible time window, see ``get_limits()``.
+
+    :param range_index (``utils.AutoscaleIndex``): Range query structure, see ``get_range_index()``.
+    :param start (``float``): Start of the visible window (epoch milliseconds).
+    :param end (``float``): End of the visible window (epoch milliseconds).
+    :param padding_scale (``float``): Padding, relative to the range of the limits.
+    :param times (``array like``): Optional time column to search, instead of the one of the index.
+    :return: The ``get_limits()`` tuple, or ``None`` if the window holds no bars.
+    """
+    limits = range_index.get_limits(start, end, times=times)
+
+    if limits is None:
+        return None
+
+    return get_limits(limits, padding_scale=padding_scale)
+# }}}1
+
 # vim: ts=4 ft=python nowrap fdm=marker
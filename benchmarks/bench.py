@@ -0,0 +1,436 @@
+"""
+Benchmarks of the data pipeline and the updater hot paths, over synthetic datasets.
+
+Run the suite and store the results (JSON):
+    python benchmarks/bench.py run --sizes 1000 100000 10000000 --output base.json
+
+The exit status of a run is 1 if a benchmark is slower than its budget relative to a reference implementation
+(see REFERENCE_BUDGETS), or if the streaming indicators do not match the batch ones (see check_streaming()).
+Compare two runs, the exit status is 1 if any benchmark got slower by more than the threshold:
+    python benchmarks/bench.py compare base.json new.json --threshold 0.1
+"""
+
+# Global Imports
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+import pandas as pd
+from bokeh import __version__ as bokeh_version
+from bokeh.models import ColumnDataSource, Range1d, Select
+from bokeh.plotting import figure
+
+# Local Imports
+# WARNING: This hack is required to import the app modules, as done by 'bokeh serve app-plotter'.
+scope = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app-plotter')
+sys.path.append(scope)
+
+from coreglobals import get_global_property
+from coreglobals import set_global_property
+import tools.utils as utils
+import tools.indicators as indicators
+import tools.wrappers as wrappers
+from tools.container import MyUpdater
+
+from datasets import get_dataset
+
+set_global_property('APP_NAME', 'app-plotter-benchmarks')
+
+# Version of the results file format.
+RESULTS_FORMAT_VERSION = 1
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), 'request-plotter-benchmarks')
+DEFAULT_THRESHOLD = 0.1
+
+# Indicator configuration of the app (see main.py).
+MA_CONFIG = {'type': 'SMA', 'slow_period': 30, 'fast_period': 13}
+EMA_CONFIG = {'type': 'EMA', 'slow_period': 30, 'fast_period': 13}
+MACD_CONFIG = {'slow_period': 30, 'fast_period': 13, 'signal_period': 9}
+
+# Spans of the EMAs of the closes (the moving averages and the legs of the MACD), the signal EMA is then applied to
+# the MACD line.
+EMA_SPANS = [EMA_CONFIG['slow_period'], EMA_CONFIG['fast_period'], MACD_CONFIG['fast_period'],
+             MACD_CONFIG['slow_period']]
+
+# Budgets of the benchmarks relative to a reference implementation run on the same dataset: the run exits with a
+# non-zero status if a benchmark takes longer than 'ratio' times its reference.
+REFERENCE_BUDGETS = {
+    'indicators.MA.ema_many': ('baseline.ema', 1.0),
+}
+
+# @public function get_headless_updater(pattern) {{{1
+
+
+def get_headless_updater(pattern):
+    """
+    Create an updater wired to plots, widgets and sources that are not attached to any document, configured
+    as in main.py. The container cache is disabled so every call computes the data again.
+
+    :param pattern (``str``): File name pattern of the dataset, see ``datasets.get_dataset()``.
+    """
+    source = ColumnDataSource({name: [] for name in wrappers.COMPACT_SOURCE_COLUMNS})
+    summary_source = ColumnDataSource(wrappers.get_block_summaries(
+        source.data, columns=wrappers.COMPACT_AUTOSCALE_COLUMNS))
+    timezone_source = ColumnDataSource(dict(transition=[], offset=[]))
+
+    plots = {}
+    for key in ('candlestick', 'volume', 'macd'):
+        plot = figure(x_axis_type='datetime', x_range=Range1d(0, 1), y_range=Range1d(0, 1))
+        plot.vbar(x='time', width=1, top='close', bottom='open', source=source)
+        plots[key] = {'plot': plot, 'limits': ['lower', 'upper']}
+
+    widgets = {
+        'asset': Select(value='BTC', options=['BTC']),
+        'pair': Select(value='EUR', options=['EUR', 'USD']),
+        'mavg': Select(value='SMA (13/30)', options=['SMA (13/30)', 'EMA (13/30)']),
+        'timezone': Select(value='(UTC+01:00) London', options=['(UTC+01:00) London']),
+        'timeframe': Select(value='5m', options=['5m'])
+    }
+
+    return MyUpdater(plots=plots, widgets=widgets, configs={'ma': dict(MA_CONFIG), 'macd': dict(MACD_CONFIG)},
+                     file=pattern, source=source, cache_size=0, level_of_detail=900, summary_source=summary_source,
+                     timezone_source=timezone_source, compact=True)
+# }}}1
+
+# @public function get_emas(close) {{{1
+
+
+def get_emas(close):
+    """
+    Compute the EMAs of a data container (see ``EMA_SPANS``) as ``wrappers.get_data_container()`` does.
+    """
+    emas = indicators.MA.ema_many(close, list(dict.fromkeys(EMA_SPANS)))
+    macd = emas[:, EMA_SPANS.index(MACD_CONFIG['fast_period'])] - emas[:, EMA_SPANS.index(MACD_CONFIG['slow_period'])]
+    return (emas, indicators.MA.ema(macd, MACD_CONFIG['signal_period']))
+# }}}1
+
+# @public function get_baseline_emas(close) {{{1
+
+
+def get_baseline_emas(close):
+    """
+    Compute the EMAs of ``get_emas()`` the way the data containers did before ``MA.ema_many()``: a temporary
+    DataFrame and an 'ewm()' per span, then the signal EMA over a DataFrame of the MACD line.
+    """
+    emas = []
+    for span in EMA_SPANS:
+        tmp_df = pd.DataFrame({'values': close})
+        tmp_df['results'] = tmp_df['values'].ewm(span=span, adjust=False).mean()
+        emas.append(tmp_df['results'])
+
+    macd_df = pd.DataFrame({'macd': emas[2] - emas[3]})
+    macd_df['signal'] = macd_df['macd'].ewm(span=MACD_CONFIG['signal_period'], adjust=False).mean()
+    return (emas, macd_df['signal'])
+# }}}1
+
+# @public function get_cases(pattern) {{{1
+
+
+def get_cases(pattern):
+    """
+    Return the benchmarks of a dataset, as a list of (name, callable) pairs.
+
+    :param pattern (``str``): File name pattern of the dataset, see ``datasets.get_dataset()``.
+    """
+    csv_file = pattern.format('5m')
+
+    def import_csv_data_parse():
+        # A new modification time invalidates the in-memory table, the file is parsed again.
+        os.utime(csv_file)
+        utils.IO.import_csv_data(csv_file, use_cache=False)
+
+    def import_csv_data_memory():
+        utils.IO.import_csv_data(csv_file)
+
+    def get_raw_data():
+        wrappers.get_raw_data(source_file=csv_file, field='BTC/EUR')
+
+    raw_df = wrappers.get_raw_data(source_file=csv_file, field='BTC/EUR')
+    close = raw_df['close'].values
+    (data_df, limits) = wrappers.get_data_container(raw_df, MA=MA_CONFIG, MACD=MACD_CONFIG)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        updater = get_headless_updater(pattern)
+
+    def updater_call():
+        # Every call switches the pair, so the source data is replaced in full.
+        pair = updater.widgets['pair']
+        pair.value = 'USD' if pair.value == 'EUR' else 'EUR'
+        updater(task='benchmark', axis_reset=True, active=True)
+
+    return [
+        ('utils.IO.import_csv_data:parse', import_csv_data_parse),
+        ('utils.IO.import_csv_data:memory', import_csv_data_memory),
+        ('wrappers.get_raw_data', get_raw_data),
+        ('wrappers.get_data_container:sma', lambda: wrappers.get_data_container(raw_df, MA=MA_CONFIG,
+                                                                                MACD=MACD_CONFIG)),
+        ('wrappers.get_data_container:ema', lambda: wrappers.get_data_container(raw_df, MA=EMA_CONFIG,
+                                                                                MACD=MACD_CONFIG)),
+        ('wrappers.get_data_container:compact', lambda: wrappers.get_data_container(raw_df, MA=MA_CONFIG,
+                                                                                    MACD=MACD_CONFIG,
+                                                                                    compact_dtypes=True)),
+        ('indicators.MA.sma', lambda: indicators.MA.sma(close, MA_CONFIG['slow_period'])),
+        ('indicators.MA.ema', lambda: indicators.MA.ema(close, EMA_CONFIG['slow_period'])),
+        ('indicators.MA.ema_many', lambda: get_emas(close)),
+        ('baseline.ema', lambda: get_baseline_emas(close)),
+        ('wrappers.get_limits', lambda: wrappers.get_limits(limits, padding_scale=0.05)),
+        ('MyUpdater.__call__', updater_call),
+    ]
+# }}}1
+
+# @public function measure(func, repeat, min_time) {{{1
+
+
+def measure(func, repeat=5, min_time=0.2):
+    """
+    Time a callable, in seconds per call.
+
+    Each of the 'repeat' samples runs the callable as many times as needed to last at least 'min_time' seconds
+    (at least once), the statistics are taken over the samples.
+    """
+    timer = timeit.Timer(func)
+
+    # The calibration call also serves as a warm up.
+    number = 1
+    elapsed = timer.timeit(number)
+    if elapsed < min_time:
+        number = int(min_time / max(elapsed, 1e-9)) + 1
+
+    samples = [elapsed / number for elapsed in timer.repeat(repeat=repeat, number=number)]
+
+    return dict(number=number,
+                repeat=repeat,
+                min=min(samples),
+                median=statistics.median(samples),
+                mean=statistics.mean(samples),
+                stdev=statistics.stdev(samples) if len(samples) > 1 else 0.0)
+# }}}1
+
+# @public function run(sizes, data_dir, repeat, min_time, select) {{{1
+
+
+def run(sizes, data_dir=DEFAULT_DATA_DIR, repeat=5, min_time=0.2, select=None):
+    """
+    Run the benchmarks over the datasets and return the results (see ``RESULTS_FORMAT_VERSION``).
+
+    :param sizes (``list``): Number of rows of the datasets.
+    :param data_dir (``str``): Directory holding the datasets.
+    :param repeat (``int``): Number of samples per benchmark.
+    :param min_time (``float``): Minimum duration of a sample (seconds).
+    :param select (``list``): Run only the benchmarks with a name starting with one of these prefixes.
+    """
+    results = []
+
+    for rows in sizes:
+        pattern = get_dataset(data_dir, rows)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            cases = get_cases(pattern)
+
+        for name, func in cases:
+            if select and not any(name.startswith(prefix) for prefix in select):
+                continue
+
+            # The functions under test report their progress on stdout.
+            with contextlib.redirect_stdout(io.StringIO()):
+                timing = measure(func, repeat=repeat, min_time=min_time)
+
+            print('{:<36} {:>10} rows {:>12.3f} ms (median, {} x {})'.format(
+                name, rows, timing['median'] * 1000, timing['repeat'], timing['number']))
+
+            results.append(dict(name=name, rows=rows, **timing))
+
+    return dict(version=RESULTS_FORMAT_VERSION,
+                created=datetime.datetime.utcnow().isoformat() + 'Z',
+                environment=dict(app=get_global_property('APP_VERSION'),
+                                 python=platform.python_version(),
+                                 platform=platform.platform(),
+                                 numpy=np.__version__,
+                                 pandas=pd.__version__,
+                                 bokeh=bokeh_version),
+                results=results)
+# }}}1
+
+# @public function check_streaming(close) {{{1
+
+
+def check_streaming(close):
+    """
+    Check that the streaming indicators continue the batch ones exactly (see ``indicators.StreamingSMA``), for
+    histories shorter and longer than the windows: every prefix of the closes primes the streaming indicators,
+    whose update (and preview) of the next close must equal the last element of the batch indicator.
+
+    :param close (``array like``): Closes, longer than the longest window.
+    :return (``list``): The (indicator, history length) of the mismatches.
+    """
+    close = np.asarray(close, dtype=float)
+    macd_periods = (MACD_CONFIG['fast_period'], MACD_CONFIG['slow_period'], MACD_CONFIG['signal_period'])
+    mismatches = []
+
+    for length in range(2 * max(macd_periods) + 1):
+        (history, head) = (close[:length], close[:length + 1])
+
+        for window in (MA_CONFIG['slow_period'], MA_CONFIG['fast_period']):
+            batch = indicators.MA.sma(head, window)[-1]
+            if indicators.StreamingSMA.from_history(history, window).preview(close[length]) != batch or \
+                    indicators.StreamingSMA.from_history(history, window).update(close[length]) != batch:
+                mismatches.append(('sma({})'.format(window), length))
+
+            batch = indicators.MA.ema(head, window)[-1]
+            streaming = indicators.StreamingEMA.from_history(history, window) if length \
+                else indicators.StreamingEMA(window)
+            if streaming.preview(close[length]) != batch or streaming.update(close[length]) != batch:
+                mismatches.append(('ema({})'.format(window), length))
+
+        fast = indicators.MA.ema(head, macd_periods[0])
+        slow = indicators.MA.ema(head, macd_periods[1])
+        macd = fast - slow
+        signal = indicators.MA.ema(macd, macd_periods[2])
+        batch = (macd[-1], signal[-1], macd[-1] - signal[-1])
+        streaming = indicators.StreamingMACD.from_history(history, *macd_periods) if length \
+            else indicators.StreamingMACD(*macd_periods)
+        if streaming.preview(close[length]) != batch or streaming.update(close[length]) != batch:
+            mismatches.append(('macd{}'.format(macd_periods), length))
+
+    for (name, length) in mismatches:
+        print('{:<36} {:>10} rows MISMATCH (streaming != batch)'.format(name, length))
+
+    return mismatches
+# }}}1
+
+# @public function check_budgets(results) {{{1
+
+
+def check_budgets(results):
+    """
+    Compare the median timings of a run with the ones of their reference (see ``REFERENCE_BUDGETS``), per dataset
+    size.
+
+    :param results (``dict``): Results of a run.
+    :return (``list``): The (name, rows, reference median, median, ratio) of the benchmarks over budget.
+    """
+    timings = {(result['name'], result['rows']): result['median'] for result in results['results']}
+    violations = []
+
+    for (name, rows), median in sorted(timings.items()):
+        if name not in REFERENCE_BUDGETS:
+            continue
+
+        (reference, budget) = REFERENCE_BUDGETS[name]
+        if (reference, rows) not in timings:
+            continue
+
+        ratio = median / timings[(reference, rows)] if timings[(reference, rows)] > 0 else 0.0
+        status = 'OVER BUDGET' if ratio > budget else ''
+
+        print('{:<36} {:>10} rows {:>8.2f} x {} (budget {:.1f} x) {}'.format(
+            name, rows, ratio, reference, budget, status))
+
+        if status:
+            violations.append((name, rows, timings[(reference, rows)], median, ratio))
+
+    return violations
+# }}}1
+
+# @public function compare(base, current, threshold) {{{1
+
+
+def compare(base, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare the median timings of two runs, matched on the benchmark name and the dataset size.
+
+    :param base (``dict``): Reference results.
+    :param current (``dict``): New results.
+    :param threshold (``float``): Relative slow down reported as a regression, for example 0.1 (10%).
+    :return (``list``): The (name, rows, base median, current median, change) of the regressions.
+    """
+    base_timings = {(result['name'], result['rows']): result['median'] for result in base['results']}
+    regressions = []
+
+    for result in current['results']:
+        key = (result['name'], result['rows'])
+
+        if key not in base_timings:
+            print('{:<36} {:>10} rows {:>12} (new)'.format(key[0], key[1], ''))
+            continue
+
+        change = result['median'] / base_timings[key] - 1 if base_timings[key] > 0 else 0.0
+        status = 'REGRESSION' if change > threshold else ''
+
+        print('{:<36} {:>10} rows {:>12.3f} ms -> {:>12.3f} ms {:>+8.1%} {}'.format(
+            key[0], key[1], base_timings[key] * 1000, result['median'] * 1000, change, status))
+
+        if status:
+            regressions.append((key[0], key[1], base_timings[key], result['median'], change))
+
+    return regressions
+# }}}1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks of the request plotter data pipeline.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the benchmarks.')
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                            help='Rows of the synthetic datasets (default: %(default)s).')
+    run_parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR,
+                            help='Directory holding the datasets (default: %(default)s).')
+    run_parser.add_argument('--repeat', type=int, default=5, help='Samples per benchmark (default: %(default)s).')
+    run_parser.add_argument('--min-time', type=float, default=0.2,
+                            help='Minimum duration of a sample in seconds (default: %(default)s).')
+    run_parser.add_argument('--select', nargs='+', help='Only run the benchmarks starting with these names.')
+    run_parser.add_argument('--output', help='Write the results to this JSON file.')
+
+    compare_parser = commands.add_parser('compare', help='Compare two result files.')
+    compare_parser.add_argument('base', help='Reference results (JSON).')
+    compare_parser.add_argument('current', help='New results (JSON).')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help='Relative slow down reported as a regression (default: %(default)s).')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run(args.sizes, data_dir=args.data_dir, repeat=args.repeat, min_time=args.min_time,
+                      select=args.select)
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+            print('[DEBUG] Results: {}'.format(args.output))
+
+        violations = check_budgets(results)
+
+        # The streaming indicators are checked on the closes of the smallest dataset.
+        pattern = get_dataset(args.data_dir, min(args.sizes))
+        with contextlib.redirect_stdout(io.StringIO()):
+            close = wrappers.get_raw_data(source_file=pattern.format('5m'), field='BTC/EUR')['close'].values
+        mismatches = check_streaming(close)
+
+        return 1 if violations or mismatches else 0
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    regressions = compare(base, current, threshold=args.threshold)
+    print('{} regression(s) above {:.1%}.'.format(len(regressions), args.threshold))
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# vim: ts=4 ft=python nowrap fdm=marker
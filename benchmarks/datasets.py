@@ -0,0 +1,79 @@
+# Global Imports
+import os
+import numpy as np
+import pandas as pd
+
+# Pairs written to the synthetic data files, the rows of a file are split evenly between them.
+DATASET_PAIRS = ['BTC/EUR', 'BTC/USD']
+
+# Candle length (seconds) and first timestamp of the synthetic series.
+DATASET_STEP = 300
+DATASET_START = 1592000000
+
+# Same naming as the data files of the app ('data_5m.csv' etc.).
+DATASET_FILE = 'data_{}.csv'
+
+# @public function make_dataset(csv_file, rows, pairs, seed) {{{1
+
+
+def make_dataset(csv_file, rows, pairs=DATASET_PAIRS, seed=0):
+    """
+    Write a synthetic *.csv file in the format of the app data files (timestamp, OHLC, volume and pair),
+    using a random walk for the close prices.
+
+    :param csv_file (``str``): Path of the file.
+    :param rows (``int``): Total number of rows, split evenly between the pairs.
+    :param pairs (``list``): Pairs written to the file, grouped in this order.
+    :param seed (``int``): Seed of the random generator.
+    """
+    rng = np.random.default_rng(seed)
+    length = max(rows // len(pairs), 1)
+
+    with open(csv_file, 'w') as f:
+        f.write('timestamp,open,high,low,close,volume,pair\n')
+
+        for pair in pairs:
+            close = np.round(8000 + np.cumsum(rng.normal(scale=5, size=length)), 1)
+            open_ = np.concatenate(([close[0]], close[:-1]))
+            high = np.round(np.maximum(open_, close) + rng.random(length) * 3, 1)
+            low = np.round(np.minimum(open_, close) - rng.random(length) * 3, 1)
+
+            pd.DataFrame(dict(
+                timestamp=DATASET_START + DATASET_STEP * np.arange(length),
+                open=open_,
+                high=high,
+                low=low,
+                close=close,
+                volume=np.round(rng.random(length) * 10, 8),
+                pair=pair
+            )).to_csv(f, header=False, index=False)
+# }}}1
+
+# @public function get_dataset(data_dir, rows, seed) {{{1
+
+
+def get_dataset(data_dir, rows, seed=0):
+    """
+    Return the file name pattern (see ``DATASET_FILE``) of a synthetic 5m dataset, creating the file on first use.
+    Datasets are kept in 'data_dir' between runs.
+
+    :param data_dir (``str``): Directory holding the datasets.
+    :param rows (``int``): Total number of rows.
+    :param seed (``int``): Seed of the random generator.
+    """
+    dataset_dir = os.path.join(data_dir, 'rows_{}_seed_{}'.format(rows, seed))
+    pattern = os.path.join(dataset_dir, DATASET_FILE)
+    csv_file = pattern.format('5m')
+
+    if not os.path.exists(csv_file):
+        os.makedirs(dataset_dir, exist_ok=True)
+        print('[DEBUG] Create dataset: {} ({} rows)'.format(csv_file, rows))
+
+        # Written aside first, an interrupted run does not leave a truncated dataset behind.
+        make_dataset(csv_file + '.tmp', rows, seed=seed)
+        os.replace(csv_file + '.tmp', csv_file)
+
+    return pattern
+# }}}1
+
+# vim: ts=4 ft=python nowrap fdm=marker
@@ -0,0 +1,82 @@
+"""
+Convert the *.csv data files of the app into memory-mapped column stores (see ``tools.utils.ColumnStore``), one
+per timeframe:
+
+    python convert_data.py
+
+converts app-plotter/data/data_5m.csv into app-plotter/data/store/5m, and so on for every data file. Set
+``USE_COLUMN_STORE = True`` in main.py to read the series from the stores. Run the conversion again to pick up
+updated data files, the sessions switch to the new version of a store at their next load.
+
+    python convert_data.py --sqlite app-plotter/data/ohlcv.db
+
+upserts the candles of every data file into a SQLite database instead (see ``tools.backends.SQLiteStore``), read by
+the app with ``PLOTTER_DATA_URL=sqlite://<path of the database>?timeframe={}``.
+"""
+
+# Global Imports
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+# Local Imports
+# WARNING: The app directory is added to the module search path, as done by 'bokeh serve' for the app code.
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app-plotter')
+sys.path.insert(0, APP_PATH)
+
+import tools.utils as utils
+import tools.backends as backends
+
+DEFAULT_DATA_DIR = os.path.join(APP_PATH, 'data')
+
+# Data files and their timeframe, for example 'data_5m.csv' (see RAW_CSV_FILE in main.py).
+DATA_FILE_PATTERN = re.compile(r'^data_(?P<timeframe>\w+)\.csv$')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert the request plotter data files into column stores.')
+    parser.add_argument('files', nargs='*',
+                        help='Data files to convert (default: every data_<timeframe>.csv of the data directory).')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Data directory (default: %(default)s).')
+    parser.add_argument('--output', default=None, help='Directory of the stores (default: <data-dir>/store).')
+    parser.add_argument('--sqlite', default=None, metavar='DB_FILE',
+                        help='Upsert the candles into a SQLite database instead of the column stores.')
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.join(args.data_dir, 'store')
+    files = args.files or sorted(glob.glob(os.path.join(args.data_dir, 'data_*.csv')))
+
+    for csv_file in files:
+        match = DATA_FILE_PATTERN.match(os.path.basename(csv_file))
+        if match is None:
+            print('[ERROR] Not a data file: {}'.format(csv_file))
+            return 1
+
+        start = time.perf_counter()
+
+        if args.sqlite is not None:
+            # The timeframes are named as in the data files (see the 'file' pattern of the updater).
+            count = backends.SQLiteStore(args.sqlite).upsert(match.group('timeframe'),
+                                                             utils.IO.import_csv_data(csv_file))
+
+            print('{} -> {} ({} rows, {:.2f} s)'.format(csv_file, args.sqlite, count, time.perf_counter() - start))
+            continue
+
+        store_dir = os.path.join(output, match.group('timeframe'))
+
+        meta = utils.ColumnStore.convert_csv_data(csv_file, store_dir)
+
+        print('{} -> {} ({} pairs, {} rows, {:.2f} s)'.format(
+            csv_file, store_dir, len(meta['pairs']), sum(pair['rows'] for pair in meta['pairs'].values()),
+            time.perf_counter() - start))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# vim: ts=4 ft=python nowrap fdm=marker
@@ -0,0 +1,188 @@
+"""
+Export the charts of the app (candlesticks and moving averages, volume and MACD, see ``tools.charts``) as
+standalone HTML pages, without a Bokeh server:
+
+    python export.py --output reports
+
+exports every asset, pair and timeframe of the app into reports/<asset>-<pair>-<timeframe>.html, with an index
+page. Any subset of the selections can be exported, for example:
+
+    python export.py --assets BTC ETH --pairs EUR --timeframes 1h 1D --output reports
+
+The pages are built by a pool of processes. Every data file is imported once, before the worker processes are
+forked, so all the pairs of a timeframe share the same (copy-on-write) table. The y-ranges follow the zoom in the
+exported pages too, as they are fitted by the browser.
+"""
+
+# Global Imports
+import argparse
+import html
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bokeh.embed import file_html
+from bokeh.models import Select
+from bokeh.resources import CDN, INLINE
+
+# Local Imports
+# WARNING: The app directory is added to the module search path, as done by 'bokeh serve' for the app code.
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app-plotter')
+sys.path.insert(0, APP_PATH)
+
+import tools.utils as utils
+import tools.charts as charts
+from tools.container import MyUpdater, TIMEZONE_LOOKUP
+
+DEFAULT_DATA_DIR = os.path.join(APP_PATH, 'data')
+
+# Data file (or column store) of each timeframe, see RAW_CSV_FILE and RAW_STORE_DIR in main.py.
+RAW_CSV_FILE = 'data_{}.csv'
+RAW_STORE_DIR = 'store/{}'
+
+# Default selections of the app (see main.py).
+DEFAULT_MAVG = charts.MAVG_OPTIONS[0]
+DEFAULT_TIMEZONE = '(UTC+01:00) London'
+
+# Indicator configuration of the app (see main.py).
+MA_CONFIG = {'type': 'SMA', 'slow_period': 30, 'fast_period': 13}
+MACD_CONFIG = {'slow_period': 30, 'fast_period': 13, 'signal_period': 9}
+
+INDEX_FILE = 'index.html'
+
+
+def get_page_name(asset, pair, timeframe):
+    return '{}-{}-{}.html'.format(asset, pair, timeframe)
+
+
+def get_resources(inline):
+    """
+    Return the BokehJS resources of the pages, shared by every page of the batch.
+    """
+    return INLINE if inline else CDN
+
+
+def export_chart(job):
+    """
+    Build the chart of a selection and write it as a standalone HTML page (runs in the worker processes).
+
+    :param job (``dict``): Selection (asset, pair, timeframe), data file pattern, options and output file.
+    :return (``tuple``): ``(job, seconds, error)``, the error being ``None`` on success.
+    """
+    start = time.perf_counter()
+
+    try:
+        (source, summary_source, timezone_source) = charts.get_chart_sources(compact=True)
+        plots = charts.get_chart_plots(source, timezone_source, compact=True, plot_width=job['width'])
+        charts.link_range_fit(source, summary_source, plots, compact=True)
+
+        # The widgets are not displayed, they only hold the selection of the updater.
+        widgets = {
+            'asset': Select(value=job['asset'], options=[job['asset']]),
+            'pair': Select(value=job['pair'], options=[job['pair']]),
+            'mavg': Select(value=job['mavg'], options=charts.MAVG_OPTIONS),
+            'timezone': Select(value=job['timezone'], options=[job['timezone']]),
+            'timeframe': Select(value=job['timeframe'], options=[job['timeframe']])
+        }
+
+        # Full resolution (no server to merge the bars on zoom) and a single update, so nothing is cached.
+        update = MyUpdater(plots=charts.get_serialized_plots(plots), widgets=widgets,
+                           configs={'ma': dict(MA_CONFIG), 'macd': dict(MACD_CONFIG)}, file=job['file'],
+                           source=source, summary_source=summary_source, timezone_source=timezone_source,
+                           cache_size=0, history=job['history'], compact=True)
+        update(task='export', axis_reset=True)
+
+        title = 'Request Plotter | {}/{} {}'.format(job['asset'], job['pair'], job['timeframe'])
+        page = file_html(charts.get_chart_layout(plots), get_resources(job['inline']), title)
+
+        tmp_file = '{}.{}.tmp'.format(job['output'], os.getpid())
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(page)
+        os.replace(tmp_file, job['output'])
+    except Exception as e:
+        return (job, time.perf_counter() - start, '{}: {}'.format(type(e).__name__, e))
+
+    return (job, time.perf_counter() - start, None)
+
+
+def write_index(output_dir, jobs):
+    """
+    Write the index page linking the exported charts.
+    """
+    links = '\n'.join('<li><a href="{0}">{1}/{2} {3}</a></li>'.format(
+        html.escape(os.path.basename(job['output'])), html.escape(job['asset']), html.escape(job['pair']),
+        html.escape(job['timeframe'])) for job in jobs)
+
+    with open(os.path.join(output_dir, INDEX_FILE), 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"><title>Request Plotter</title></head>\n'
+                '<body>\n<ul>\n{}\n</ul>\n</body>\n</html>\n'.format(links))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export the request plotter charts as standalone HTML pages.')
+    parser.add_argument('--assets', nargs='+', default=charts.ASSET_OPTIONS, choices=charts.ASSET_OPTIONS,
+                        metavar='ASSET', help='Assets to export (default: all).')
+    parser.add_argument('--pairs', nargs='+', default=charts.PAIR_OPTIONS, choices=charts.PAIR_OPTIONS,
+                        metavar='PAIR', help='Pairs to export (default: all).')
+    parser.add_argument('--timeframes', nargs='+', default=charts.TIMEFRAME_OPTIONS,
+                        choices=charts.TIMEFRAME_OPTIONS, metavar='TIMEFRAME',
+                        help='Timeframes to export (default: all).')
+    parser.add_argument('--mavg', default=DEFAULT_MAVG, choices=charts.MAVG_OPTIONS,
+                        help='Moving average (default: %(default)s).')
+    parser.add_argument('--timezone', default=DEFAULT_TIMEZONE, choices=sorted(TIMEZONE_LOOKUP), metavar='TIMEZONE',
+                        help='Time zone of the labels, as listed by the app (default: %(default)s).')
+    parser.add_argument('--history', type=int, default=None,
+                        help='Number of most recent candles per chart (default: the full history).')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Data directory (default: %(default)s).')
+    parser.add_argument('--column-store', action='store_true',
+                        help='Read the column stores of the data directory (see convert_data.py).')
+    parser.add_argument('--output', default='reports', help='Output directory (default: %(default)s).')
+    parser.add_argument('--processes', type=int, default=0,
+                        help='Number of worker processes, 0 for one per CPU (default: %(default)s).')
+    parser.add_argument('--inline', action='store_true',
+                        help='Embed the BokehJS resources in every page, instead of linking the CDN.')
+    parser.add_argument('--width', type=int, default=charts.CHART_WIDTH, help='Canvas width (default: %(default)s).')
+    args = parser.parse_args(argv)
+
+    file = os.path.join(args.data_dir, RAW_STORE_DIR if args.column_store else RAW_CSV_FILE)
+    os.makedirs(args.output, exist_ok=True)
+
+    jobs = [dict(asset=asset, pair=pair, timeframe=timeframe, file=file, mavg=args.mavg, timezone=args.timezone,
+                 history=args.history, width=args.width, inline=args.inline,
+                 output=os.path.join(args.output, get_page_name(asset, pair, timeframe)))
+            for timeframe in args.timeframes for asset in args.assets for pair in args.pairs]
+
+    start = time.perf_counter()
+
+    # Every data file is imported once, and inherited by the forked workers. Without 'fork', every worker imports
+    # the files it needs (once).
+    context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+
+    if context is not None and not args.column_store:
+        for timeframe in args.timeframes:
+            utils.IO.get_table(file.format(timeframe.lower()))
+
+    processes = args.processes or os.cpu_count()
+    failed = 0
+
+    with ProcessPoolExecutor(max_workers=min(processes, len(jobs)) or 1, mp_context=context) as executor:
+        for (job, seconds, error) in executor.map(export_chart, jobs, chunksize=max(1, len(jobs) // (4 * processes))):
+            if error is None:
+                print('{} ({:.2f} s)'.format(job['output'], seconds))
+            else:
+                failed += 1
+                print('[ERROR] {}/{} {}: {}'.format(job['asset'], job['pair'], job['timeframe'], error))
+
+    write_index(args.output, [job for job in jobs if os.path.isfile(job['output'])])
+
+    print('Exported {} of {} charts in {:.2f} s.'.format(len(jobs) - failed, len(jobs), time.perf_counter() - start))
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# vim: ts=4 ft=python nowrap fdm=marker
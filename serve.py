@@ -0,0 +1,92 @@
+"""
+Launch the app on a Bokeh server, with the extra routes of the project.
+
+    python serve.py --show
+
+is the equivalent of ``bokeh serve --show app-plotter``, and also serves the timing histograms of the updater in
+the Prometheus text format at http://localhost:5006/metrics.
+
+    python serve.py --num-procs 4
+
+runs 4 server processes sharing the data containers: a loader process builds them once and publishes them in
+shared memory segments (see ``tools.utils.SharedStore``), the server processes attach to them. To use the shared
+store with 'bokeh serve', run the loader on its own and point the app to the store directory:
+
+    python serve.py --loader-only --shared-store /tmp/plotter-store
+    PLOTTER_SHARED_STORE=/tmp/plotter-store bokeh serve --num-procs 4 app-plotter
+"""
+
+# Global Imports
+import argparse
+import multiprocessing
+import os
+import sys
+
+from bokeh.application import Application
+from bokeh.application.handlers import DirectoryHandler
+from bokeh.server.server import Server
+
+# Local Imports
+# WARNING: The app directory is added to the module search path (as done by 'bokeh serve' for the app code),
+# so the app sessions and the server share the same metrics registry.
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app-plotter')
+sys.path.insert(0, APP_PATH)
+
+import tools.utils as utils
+from tools.container import build_data_container, get_data_version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the request plotter app.')
+    parser.add_argument('--port', type=int, default=5006, help='Port to listen on (default: %(default)s).')
+    parser.add_argument('--address', default=None, help='Address to listen on.')
+    parser.add_argument('--allow-websocket-origin', action='append', default=None,
+                        help='Public hostnames allowed to connect to the app (default: localhost).')
+    parser.add_argument('--show', action='store_true', help='Open the app in a browser.')
+    parser.add_argument('--num-procs', type=int, default=1,
+                        help='Number of server processes, 0 for one per CPU (default: %(default)s).')
+    parser.add_argument('--shared-store', default=None,
+                        help='Directory of the shared store, used by default with several server processes.')
+    parser.add_argument('--loader-only', action='store_true',
+                        help='Only run the loader process of the shared store (no server).')
+    args = parser.parse_args(argv)
+
+    store_dir = args.shared_store
+    if store_dir is None and (args.num_procs != 1 or args.loader_only):
+        store_dir = utils.sharedstore.DEFAULT_STORE_DIR
+
+    if args.loader_only:
+        print('Loading the shared store {}.'.format(store_dir))
+        utils.sharedstore.run_loader(store_dir, build_data_container, get_data_version)
+        return
+
+    if store_dir is not None:
+        # Started before the server processes are forked, and stopped (removing the segments) with the server.
+        loader = multiprocessing.Process(target=utils.sharedstore.run_loader, name='loader', daemon=True,
+                                         args=(store_dir, build_data_container, get_data_version))
+        loader.start()
+
+        # Inherited by the server processes, see 'SHARED_STORE_DIR' in main.py.
+        os.environ['PLOTTER_SHARED_STORE'] = store_dir
+
+    app_name = os.path.basename(APP_PATH)
+    server = Server({'/{}'.format(app_name): Application(DirectoryHandler(filename=APP_PATH))},
+                    port=args.port,
+                    address=args.address,
+                    allow_websocket_origin=args.allow_websocket_origin,
+                    num_procs=args.num_procs,
+                    extra_patterns=[(r'/metrics', utils.MetricsHandler)])
+    server.start()
+
+    print('Serving /{} and /metrics on port {}.'.format(app_name, server.port))
+
+    if args.show:
+        server.io_loop.add_callback(server.show, '/{}'.format(app_name))
+
+    server.io_loop.start()
+
+
+if __name__ == "__main__":
+    main()
+
+# vim: ts=4 ft=python nowrap fdm=marker
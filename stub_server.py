@@ -0,0 +1,121 @@
+"""
+Serve the data files of the app over HTTP, as a local stand-in for a market data service (see
+``tools.backends.HTTPBackend``):
+
+    python stub_server.py --port 8001 --latency 0.1
+
+answers 'GET /ohlcv/<timeframe>?pair=BTC/EUR[&since=<epoch second>]' with the candles of the pair in
+data/data_<timeframe>.csv (from 'since', included), after the given latency. Point the app to it with:
+
+    PLOTTER_DATA_URL=http://127.0.0.1:8001/ohlcv/{} bokeh serve app-plotter
+"""
+
+# Global Imports
+import argparse
+import json
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+
+# Local Imports
+# WARNING: The app directory is added to the module search path, as done by 'bokeh serve' for the app code.
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app-plotter')
+sys.path.insert(0, APP_PATH)
+
+import tools.utils as utils
+from tools.backends.httpbackend import CANDLE_COLUMNS
+
+DEFAULT_DATA_DIR = os.path.join(APP_PATH, 'data')
+
+# Data file of each timeframe, see RAW_CSV_FILE in main.py.
+RAW_CSV_FILE = 'data_{}.csv'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Keep-alive connections (every response has a Content-Length).
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = url.path.strip('/').split('/')
+        query = parse_qs(url.query)
+
+        if len(parts) != 2 or parts[0] != 'ohlcv' or 'pair' not in query:
+            self.__send(404, {'error': 'Unknown resource {}.'.format(url.path)})
+            return
+
+        data_file = os.path.join(self.server.data_dir, RAW_CSV_FILE.format(parts[1].lower()))
+        if not os.path.isfile(data_file):
+            self.__send(404, {'error': 'Unknown timeframe {}.'.format(parts[1])})
+            return
+
+        time.sleep(self.server.latency)
+
+        pair_df = utils.IO.import_pair_data(data_file, query['pair'][0])
+        timestamps = pair_df['timestamp'].values
+        first = int(np.searchsorted(timestamps, int(query['since'][0]))) if 'since' in query else 0
+
+        self.__send(200, {name: pair_df[name].values[first:].tolist() for name in CANDLE_COLUMNS})
+
+    def __send(self, status, content):
+        body = json.dumps(content).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Threaded server of the data files, one thread per connection.
+
+    :param address (``tuple``): ``(host, port)`` to listen on.
+    :param data_dir (``str``): Directory of the data files.
+    :param latency (``float``): Seconds added to every response.
+    """
+    daemon_threads = True
+    request_queue_size = 64
+
+    def __init__(self, address, data_dir=DEFAULT_DATA_DIR, latency=0.0, verbose=False):
+        super().__init__(address, StubHandler)
+
+        self.data_dir = data_dir
+        self.latency = latency
+        self.verbose = verbose
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the data files over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: %(default)s).')
+    parser.add_argument('--port', type=int, default=8001, help='Port to listen on (default: %(default)s).')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Data directory (default: %(default)s).')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds added to every response (default: %(default)s).')
+    parser.add_argument('--verbose', action='store_true', help='Log the requests.')
+    args = parser.parse_args(argv)
+
+    server = StubServer((args.host, args.port), data_dir=args.data_dir, latency=args.latency, verbose=args.verbose)
+    print('Serving {} on http://{}:{}/ohlcv/<timeframe>'.format(args.data_dir, args.host, args.port))
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# vim: ts=4 ft=python nowrap fdm=marker